@@ -0,0 +1,148 @@
+# browser_pool.py
+# One long-lived Chromium per bot process, handing out a fresh BrowserContext per action.
+# Shared by the F2F bots; imported through bots/common on sys.path.
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from playwright.async_api import async_playwright, Browser, BrowserContext
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+MB = 1024 * 1024
+
+
+def log(msg: str) -> None:
+    print(f"[BrowserPool] {msg}", flush=True)
+
+def _tree_rss_bytes(root_pid: int) -> int:
+    """RSS of every process below root_pid (Playwright driver + Chromium), 0 if unknown"""
+    parents: Dict[int, int] = {}
+    rss: Dict[int, int] = {}
+    try:
+        entries = os.listdir("/proc")
+    except OSError:
+        return 0
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "r") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            parents[int(entry)] = int(fields[1])
+            rss[int(entry)] = int(fields[21]) * PAGE_SIZE
+        except (OSError, IndexError, ValueError):
+            continue
+    total = 0
+    for pid in rss:
+        p = parents.get(pid)
+        while p and p != root_pid:
+            p = parents.get(p)
+        if p == root_pid:
+            total += rss[pid]
+    return total
+
+
+class BrowserPool:
+    """Keeps one Chromium open for the whole run.
+
+    Each action gets its own BrowserContext (separate cookies, storage and cache)
+    with the model's cookies already loaded, so actions stay isolated while only
+    paying for a context instead of a full browser launch. The browser is relaunched
+    after `max_uses` contexts, or when the browser's memory has grown by more than
+    `max_growth_mb` since launch.
+    """
+
+    def __init__(self, cfg: Dict[str, Any], storage_state_path: str):
+        pool_cfg = cfg.get("browser_pool", {}) or {}
+        self.headless = cfg.get("headless", True)
+        self.default_cookies_path = cfg.get("cookies_path")
+        self.storage_state_path = storage_state_path
+        self.max_uses = int(pool_cfg.get("max_uses", 20))
+        self.max_growth_mb = int(pool_cfg.get("max_growth_mb", 1024))
+        self._pw = None
+        self._browser: Optional[Browser] = None
+        self._uses = 0
+        self._baseline_rss = 0
+        self._cookies: Dict[str, List[Dict[str, Any]]] = {}
+
+    def _load_cookies(self, cookies_path: str) -> List[Dict[str, Any]]:
+        """Cookies for a path, read from disk once per run"""
+        if cookies_path in self._cookies:
+            return self._cookies[cookies_path]
+        cookies: List[Dict[str, Any]] = []
+        p = Path(cookies_path)
+        if not p.exists():
+            log(f"No cookies at {cookies_path}; proceeding unauthenticated")
+        else:
+            try:
+                cookies = json.loads(p.read_text(encoding="utf-8"))
+                log(f"Loaded cookies from {cookies_path}")
+            except Exception as e:
+                log(f"Failed to load cookies: {e}")
+        self._cookies[cookies_path] = cookies
+        return cookies
+
+    async def _launch(self):
+        if self._pw is None:
+            self._pw = await async_playwright().start()
+        log("Launching Chromium")
+        self._browser = await self._pw.chromium.launch(headless=self.headless)
+        self._uses = 0
+        self._baseline_rss = _tree_rss_bytes(os.getpid())
+
+    async def _recycle_if_needed(self):
+        if self._browser is None:
+            return
+        reason = None
+        if self._uses >= self.max_uses:
+            reason = f"{self._uses} uses"
+        else:
+            growth = _tree_rss_bytes(os.getpid()) - self._baseline_rss
+            if self._baseline_rss and growth > self.max_growth_mb * MB:
+                reason = f"memory grew by {growth // MB} MB"
+        if reason:
+            log(f"Recycling Chromium ({reason})")
+            await self._close_browser()
+
+    async def _close_browser(self):
+        browser, self._browser = self._browser, None
+        if browser is not None:
+            try:
+                await browser.close()
+            except Exception as e:
+                log(f"Failed to close Chromium: {e}")
+
+    async def context(self, model: Optional[Dict[str, Any]] = None) -> BrowserContext:
+        """A new isolated context with the model's cookies (model.cookies_path, else the global one)"""
+        if self._browser is None or not self._browser.is_connected():
+            await self._launch()
+        self._uses += 1
+        context = await self._browser.new_context()
+        cookies_path = (model or {}).get("cookies_path") or self.default_cookies_path
+        cookies = self._load_cookies(cookies_path) if cookies_path else []
+        if cookies:
+            try:
+                await context.add_cookies(cookies)
+            except Exception as e:
+                log(f"Failed to load cookies: {e}")
+        return context
+
+    async def release(self, context: BrowserContext):
+        """Close a context handed out by context(), keeping the browser for the next action"""
+        try:
+            await context.storage_state(path=self.storage_state_path)
+        except Exception:
+            pass
+        try:
+            await context.close()
+        except Exception:
+            pass
+        await self._recycle_if_needed()
+
+    async def close(self):
+        await self._close_browser()
+        if self._pw is not None:
+            await self._pw.stop()
+            self._pw = None
@@ -0,0 +1,48 @@
+# run_checkpoint.py
+# Run-scoped checkpoint in the control plane, shared by the bots that resume
+# retried runs. The worker sets CHECKPOINT_URL; outside it there is none.
+
+import json
+import os
+import urllib.error
+import urllib.request
+from typing import Any, Dict, Optional
+
+CHECKPOINT_URL = os.getenv("CHECKPOINT_URL")
+
+
+def log(msg: str) -> None:
+    print(f"[Checkpoint] {msg}", flush=True)
+
+def load_run_checkpoint() -> Optional[Dict[str, Any]]:
+    """Fetch this run's checkpoint ({} if none yet), or None outside the control plane.
+
+    Raises if CHECKPOINT_URL is set but the control plane can't be reached."""
+    if not CHECKPOINT_URL:
+        return None
+    try:
+        with urllib.request.urlopen(CHECKPOINT_URL, timeout=10) as resp:
+            return json.load(resp).get("data") or {}
+    except urllib.error.HTTPError as e:
+        if e.code == 404:
+            return {}
+        raise RuntimeError(f"Run checkpoint unavailable at {CHECKPOINT_URL}: {e}") from e
+    except Exception as e:
+        # Starting without the checkpoint would redo what this run already
+        # sent, so an unreachable control plane fails the run instead
+        raise RuntimeError(f"Run checkpoint unavailable at {CHECKPOINT_URL}: {e}") from e
+
+def save_run_checkpoint(step: Optional[str], data: Dict[str, Any]):
+    """Store this run's checkpoint in the control plane"""
+    if not CHECKPOINT_URL:
+        return
+    request = urllib.request.Request(
+        CHECKPOINT_URL,
+        data=json.dumps({"step": step, "data": data}).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+        method="PUT",
+    )
+    try:
+        urllib.request.urlopen(request, timeout=10).close()
+    except Exception as e:
+        log(f"⚠️ Failed to save run checkpoint: {e}")
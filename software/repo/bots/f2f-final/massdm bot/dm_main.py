@@ -1,11 +1,12 @@
 # dm_main.py
 # F2F Mass DM Bot — async Playwright
 # Adds per-campaign scheduling (HH:MM local), MESSAGE MOVE workflow (Excel -> archive JSON/Excel -> replenish),
-# and per-model/per-campaign overrides. Fresh browser per campaign. Heavy # [BTN]/[FIELD]/[STEP] comments.
+# and per-model/per-campaign overrides. Fresh browser context per campaign. Heavy # [BTN]/[FIELD]/[STEP] comments.
 
 import asyncio
 import json
 import random
+import sys
 import time
 import traceback
 from datetime import datetime
@@ -14,10 +15,15 @@ from typing import Any, Dict, List, Optional
 
 import yaml
 from zoneinfo import ZoneInfo
-from playwright.async_api import async_playwright, Page, Browser, BrowserContext
+from playwright.async_api import Page, BrowserContext
 from openpyxl import load_workbook, Workbook
 from openpyxl.utils import column_index_from_string
 
+# Modules shared between bots live in bots/common
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "common"))
+from browser_pool import BrowserPool
+from run_checkpoint import load_run_checkpoint, save_run_checkpoint
+
 # ========================= 0. LOG + CONFIG =========================
 
 def log(msg: str) -> None:
@@ -27,6 +33,12 @@ def load_cfg(path: str = "dm_config.yaml") -> Dict[str, Any]:
     with open(path, "r", encoding="utf-8") as f:
         return yaml.safe_load(f)
 
+# Campaigns are keyed in the run checkpoint so a retried run skips those
+# already sent earlier in the same run
+
+def _campaign_key(model: Dict[str, Any], c_i: int, campaign: Dict[str, Any]) -> str:
+    return f"{model['name']}/{c_i}:{campaign.get('name', 'campaign')}"
+
 # ========================= 1. TIME / PACE =========================
 
 def _tz(cfg: Dict[str, Any]) -> ZoneInfo:
@@ -252,23 +264,8 @@ def resolve_message_archive_cfg(campaign: Dict[str, Any], model: Dict[str, Any],
 
 # ========================= 4. BROWSER + LOGIN =========================
 
-async def load_cookies(context: BrowserContext, cookies_path: str):
-    p = Path(cookies_path)
-    if not p.exists():
-        log(f"No cookies at {cookies_path}; proceeding unauthenticated")
-        return
-    try:
-        cookies = json.loads(p.read_text(encoding="utf-8"))
-        await context.add_cookies(cookies)
-        log(f"Loaded cookies from {cookies_path}")
-    except Exception as e:
-        log(f"Failed to load cookies: {e}")
-
-async def open_creators_page(cfg: Dict[str, Any]):
-    pw = await async_playwright().start()
-    browser: Browser = await pw.chromium.launch(headless=cfg.get("headless", True))
-    context: BrowserContext = await browser.new_context()
-    await load_cookies(context, cfg["cookies_path"])
+async def open_creators_page(pool: BrowserPool, cfg: Dict[str, Any], model: Dict[str, Any]):
+    context: BrowserContext = await pool.context(model)
     page: Page = await context.new_page()
     log("# [NAV] Go to creators page")
     await page.goto("https://f2f.com/agency/creators/", wait_until="domcontentloaded", timeout=cfg["timeouts"]["long_ms"])
@@ -284,15 +281,7 @@ async def open_creators_page(cfg: Dict[str, Any]):
     except Exception:
         log("# [INFO] No cookie popup found or already accepted")
 
-    return pw, browser, context, page
-
-async def close_browser(pw, browser: Browser, context: BrowserContext):
-    try:
-        await context.storage_state(path="storage_state_dm.json")
-    except Exception:
-        pass
-    await browser.close()
-    await pw.stop()
+    return context, page
 
 # ========================= 5. SEARCH MODEL + OPEN MESSENGER =========================
 
@@ -643,8 +632,8 @@ async def schedule_and_send_now(page: Page, cfg: Dict[str, Any]):
 
 # ========================= 9. ORCHESTRATION =========================
 
-async def run_campaign_for_model(cfg: Dict[str, Any], model: Dict[str, Any], campaign: Dict[str, Any]):
-    # Per-campaign wait until time (before we even open a browser)
+async def run_campaign_for_model(pool: BrowserPool, cfg: Dict[str, Any], model: Dict[str, Any], campaign: Dict[str, Any]):
+    # Per-campaign wait until time (before we even open a browser context)
     await maybe_wait_for_campaign_time(campaign, cfg)
 
     # Resolve message + archive cfgs
@@ -661,7 +650,7 @@ async def run_campaign_for_model(cfg: Dict[str, Any], model: Dict[str, Any], cam
         inline_vals = (msg_cfg.get("inline") or [])
         dm_text = random.choice([v for v in inline_vals if str(v).strip()]) if inline_vals else ""
 
-    pw, browser, context, page = await open_creators_page(cfg)
+    context, page = await open_creators_page(pool, cfg, model)
     used_text_archived = False
     try:
         await search_and_open_creator(page, cfg, model)
@@ -719,40 +708,56 @@ async def run_campaign_for_model(cfg: Dict[str, Any], model: Dict[str, Any], cam
                 log(f"⚠️ Failed to restore message: {ee}")
         raise
     finally:
-        await close_browser(pw, browser, context)
+        await pool.release(context)
 
 async def main():
     cfg = load_cfg()
     between_models = cfg.get("pace", {}).get("between_models", {}) or {"mode": "none"}
     between_campaigns_default = cfg.get("pace", {}).get("between_campaigns", {}) or {"mode": "none"}
 
-    models: List[Dict[str, Any]] = cfg.get("models", [])
-    for m_i, model in enumerate(models, start=1):
-        log("=" * 70)
-        log(f"MODEL {m_i}/{len(models)}: {model['name']}")
-        log("=" * 70)
-        campaigns: List[Dict[str, Any]] = model.get("campaigns", [])
-
-        # allow per-model override for campaign pacing
-        between_campaigns = model.get("pace", {}).get("between_campaigns", between_campaigns_default)
-
-        for c_i, campaign in enumerate(campaigns, start=1):
-            log(f"--- Campaign {c_i}/{len(campaigns)} :: {campaign.get('name','campaign')} ---")
-            await run_campaign_for_model(cfg, model, campaign)
+    checkpoint = load_run_checkpoint() or {}
+    sent = set(checkpoint.get("sent_campaigns", []))
+    if sent:
+        log(f"♻️ Resuming run: {len(sent)} campaign(s) already sent")
 
-            # pacing between campaigns for this model
-            if c_i < len(campaigns):
-                sec = _pick_delay_seconds(between_campaigns)
+    # One browser for the whole run; each campaign gets its own context
+    pool = BrowserPool(cfg, storage_state_path="storage_state_dm.json")
+    try:
+        models: List[Dict[str, Any]] = cfg.get("models", [])
+        for m_i, model in enumerate(models, start=1):
+            log("=" * 70)
+            log(f"MODEL {m_i}/{len(models)}: {model['name']}")
+            log("=" * 70)
+            campaigns: List[Dict[str, Any]] = model.get("campaigns", [])
+
+            # allow per-model override for campaign pacing
+            between_campaigns = model.get("pace", {}).get("between_campaigns", between_campaigns_default)
+
+            for c_i, campaign in enumerate(campaigns, start=1):
+                key = _campaign_key(model, c_i, campaign)
+                if key in sent:
+                    log(f"--- Campaign {c_i}/{len(campaigns)} :: {campaign.get('name','campaign')} already sent, skipping ---")
+                    continue
+                log(f"--- Campaign {c_i}/{len(campaigns)} :: {campaign.get('name','campaign')} ---")
+                await run_campaign_for_model(pool, cfg, model, campaign)
+                sent.add(key)
+                save_run_checkpoint(key, {"sent_campaigns": sorted(sent)})
+
+                # pacing between campaigns for this model
+                if c_i < len(campaigns):
+                    sec = _pick_delay_seconds(between_campaigns)
+                    if sec > 0:
+                        log(f"⏳ Waiting {sec}s between campaigns...")
+                        await asyncio.sleep(sec)
+
+            # pacing between models
+            if m_i < len(models):
+                sec = _pick_delay_seconds(between_models)
                 if sec > 0:
-                    log(f"⏳ Waiting {sec}s between campaigns...")
+                    log(f"⏳ Waiting {sec}s between models...")
                     await asyncio.sleep(sec)
-
-        # pacing between models
-        if m_i < len(models):
-            sec = _pick_delay_seconds(between_models)
-            if sec > 0:
-                log(f"⏳ Waiting {sec}s between models...")
-                await asyncio.sleep(sec)
+    finally:
+        await pool.close()
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -1,10 +1,11 @@
 # main.py
-# F2F Posting Bot — async Playwright (multi-post per model + pacing + caption MOVE + per-post fresh browser)
+# F2F Posting Bot — async Playwright (multi-post per model + pacing + caption MOVE + per-post fresh browser context)
 # Each action is tagged: # [NAV], # [STEP], # [BTN], # [FIELD]
 
 import asyncio
 import json
 import random
+import sys
 import time
 import traceback
 from datetime import datetime
@@ -14,10 +15,15 @@ from typing import Any, Dict, List, Optional
 import pandas as pd
 import yaml
 from zoneinfo import ZoneInfo
-from playwright.async_api import async_playwright, Page, Browser, BrowserContext, TimeoutError as PWTimeout
+from playwright.async_api import Page, BrowserContext, TimeoutError as PWTimeout
 from openpyxl import Workbook, load_workbook
 from openpyxl.utils import column_index_from_string, get_column_letter
 
+# Modules shared between bots live in bots/common
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "common"))
+from browser_pool import BrowserPool
+from run_checkpoint import load_run_checkpoint, save_run_checkpoint
+
 
 # ---------------------------- Logging & Config ----------------------------
 
@@ -28,8 +34,16 @@ def load_cfg(path: str = "config.yaml") -> Dict[str, Any]:
     with open(path, "r", encoding="utf-8") as f:
         return yaml.safe_load(f)
 
+# The run checkpoint (bots/common/run_checkpoint.py), when present, is the
+# source of truth for progress, since local state files are lost with the
+# container.
+
 def load_state(cfg: Dict[str, Any]) -> Dict[str, Any]:
-    """Load posting state from file"""
+    """Load posting state from the run checkpoint, else from file"""
+    remote = load_run_checkpoint()
+    if remote:
+        log(f"♻️ Resuming from run checkpoint: {remote.get('model_posts')}")
+        return remote
     state_file = cfg.get("state_file", "./posting_state.json")
     try:
         with open(state_file, "r", encoding="utf-8") as f:
@@ -49,6 +63,7 @@ def save_state(cfg: Dict[str, Any], state: Dict[str, Any]):
     state["last_run"] = datetime.utcnow().isoformat() + "Z"
     with open(state_file, "w", encoding="utf-8") as f:
         json.dump(state, f, indent=2)
+    save_run_checkpoint(f"cycle_{state['current_cycle']}", state)
 
 def get_next_posts_for_cycle(cfg: Dict[str, Any], state: Dict[str, Any]) -> List[Dict[str, Any]]:
     """Get the next posts for current cycle (one per model)"""
@@ -156,23 +171,8 @@ async def maybe_wait_for_post_time(post: Dict[str, Any], cfg: Dict[str, Any]):
 
 # ---------------------------- Browser lifecycle (per post) ----------------------------
 
-async def load_cookies(context: BrowserContext, cookies_path: str):
-    p = Path(cookies_path)
-    if not p.exists():
-        log(f"No cookies at {cookies_path}; proceeding unauthenticated")
-        return
-    try:
-        cookies = json.loads(p.read_text(encoding="utf-8"))
-        await context.add_cookies(cookies)
-        log(f"Loaded cookies from {cookies_path}")
-    except Exception as e:
-        log(f"Failed to load cookies: {e}")
-
-async def open_creators_page(cfg: Dict[str, Any]):
-    pw = await async_playwright().start()
-    browser: Browser = await pw.chromium.launch(headless=cfg.get("headless", True))
-    context: BrowserContext = await browser.new_context()
-    await load_cookies(context, cfg["cookies_path"])
+async def open_creators_page(pool: BrowserPool, cfg: Dict[str, Any], model: Dict[str, Any]):
+    context: BrowserContext = await pool.context(model)
     page: Page = await context.new_page()
     log("# [NAV] Go to creators page")
     await page.goto("https://f2f.com/agency/creators/", wait_until="domcontentloaded", timeout=cfg["timeouts"]["long_ms"])
@@ -188,15 +188,7 @@ async def open_creators_page(cfg: Dict[str, Any]):
     except Exception:
         log("# [INFO] No cookie popup found or already accepted")
     
-    return pw, browser, context, page
-
-async def close_browser(pw, browser: Browser, context: BrowserContext):
-    try:
-        await context.storage_state(path="storage_state.json")
-    except Exception:
-        pass
-    await browser.close()
-    await pw.stop()
+    return context, page
 
 
 # ---------------------------- Generic helpers ----------------------------
@@ -809,10 +801,10 @@ async def paid_flow(page: Page, cfg: Dict[str, Any], post: Dict[str, Any]):
 
 # Removed _normalize_posts_for_model - using rotation logic instead
 
-async def run_single_post(model: Dict[str, Any], post: Dict[str, Any], cfg: Dict[str, Any]):
+async def run_single_post(pool: BrowserPool, model: Dict[str, Any], post: Dict[str, Any], cfg: Dict[str, Any]):
     await maybe_wait_for_post_time(post, cfg)
 
-    pw, browser, context, page = await open_creators_page(cfg)
+    context, page = await open_creators_page(pool, cfg, model)
     try:
         await search_and_open_creator(page, cfg, model)
         await click_create_then_post(page, cfg)
@@ -830,7 +822,7 @@ async def run_single_post(model: Dict[str, Any], post: Dict[str, Any], cfg: Dict
             log("# [FLOW] Free path selected")
             await free_flow_publish_now(page, cfg)
 
-        # Return to creators page before closing (safer)
+        # Return to creators page before closing the context (safer)
         await page.goto("https://f2f.com/agency/creators/", wait_until="domcontentloaded")
 
     except Exception as e:
@@ -838,7 +830,7 @@ async def run_single_post(model: Dict[str, Any], post: Dict[str, Any], cfg: Dict
         log(f"❌ Error: {e}\n{traceback.format_exc()}\nScreenshot: {fp}")
         raise
     finally:
-        await close_browser(pw, browser, context)
+        await pool.release(context)
 
 def _normalize_posts_for_model(model: Dict[str, Any]) -> List[Dict[str, Any]]:
     """Convert model pattern to individual posts (for sequential mode)"""
@@ -877,12 +869,17 @@ async def main():
     log(f"F2F POSTING BOT - {posting_mode.upper()} MODE")
     log("=" * 72)
     
-    if posting_mode == "rotation":
-        await run_rotation_mode(cfg)
-    else:
-        await run_sequential_mode(cfg)
+    # One browser for the whole run; each post gets its own context
+    pool = BrowserPool(cfg, storage_state_path="storage_state.json")
+    try:
+        if posting_mode == "rotation":
+            await run_rotation_mode(pool, cfg)
+        else:
+            await run_sequential_mode(pool, cfg)
+    finally:
+        await pool.close()
 
-async def run_rotation_mode(cfg: Dict[str, Any]):
+async def run_rotation_mode(pool: BrowserPool, cfg: Dict[str, Any]):
     """Run in rotation mode: auto-complete all cycles until done"""
     state = load_state(cfg)
     max_cycles = 50  # Safety limit
@@ -918,7 +915,7 @@ async def run_rotation_mode(cfg: Dict[str, Any]):
             log("=" * 50)
             
             try:
-                await run_single_post(model, post, cfg)
+                await run_single_post(pool, model, post, cfg)
                 
                 # Update state - increment this model's post count
                 state["model_posts"][model["name"]] = post_number
@@ -967,7 +964,7 @@ async def run_rotation_mode(cfg: Dict[str, Any]):
     
     log("=" * 72)
 
-async def run_sequential_mode(cfg: Dict[str, Any]):
+async def run_sequential_mode(pool: BrowserPool, cfg: Dict[str, Any]):
     """Run in sequential mode: complete all posts for each model before next"""
     models: List[Dict[str, Any]] = cfg.get("models", [])
     between_models_delay = cfg.get("pace", {}).get("between_models", 1200)
@@ -981,7 +978,7 @@ async def run_sequential_mode(cfg: Dict[str, Any]):
         posts = _normalize_posts_for_model(model)
         for p_i, post in enumerate(posts, start=1):
             log(f"--- Post {p_i}/{len(posts)} :: {post.get('name')} ---")
-            await run_single_post(model, post, cfg)
+            await run_single_post(pool, model, post, cfg)
 
             # Delay BETWEEN POSTS (same model)
             if p_i < len(posts):
@@ -7,7 +7,6 @@ Copy this folder + config + excel files for new clients
 
 import os
 import json
-import time
 import random
 import pandas as pd
 import asyncio
@@ -17,7 +16,6 @@ from datetime import datetime, timedelta
 from pathlib import Path
 from typing import List, Dict, Optional
 
-from playwright.async_api import async_playwright
 import logging
 
 # Set up logging
@@ -31,6 +29,24 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Modules shared between bots live in bots/common. The run checkpoint, when
+# present, replaces crash_recovery.json, which is lost with the container.
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "common"))
+try:
+    from run_checkpoint import CHECKPOINT_URL, load_run_checkpoint, save_run_checkpoint
+except ImportError:
+    # Client copies made without bots/common run outside the control plane,
+    # where there is no checkpoint to load or save
+    if os.getenv("CHECKPOINT_URL"):
+        raise
+    CHECKPOINT_URL = None
+
+    def load_run_checkpoint() -> Optional[dict]:
+        return None
+
+    def save_run_checkpoint(step: Optional[str], data: dict):
+        pass
+
 
 class PhaseTracker:
     def __init__(self, config_dir: str = "."):
@@ -193,6 +209,9 @@ class FanvueMassDMBot:
         # Crash recovery
         self.crash_recovery_file = self.config_dir / 'crash_recovery.json'
         self.ensure_crash_recovery_file()
+        remote_recovery = load_run_checkpoint()
+        if remote_recovery is not None:
+            self.write_crash_recovery(remote_recovery or self.default_crash_recovery())
         
         # Browser session
         self.playwright = None
@@ -201,17 +220,26 @@ class FanvueMassDMBot:
         
         logger.info(f"📋 Loaded {len(self.config.get('phases', {}))} phases")
         
+    def default_crash_recovery(self) -> dict:
+        """Empty crash recovery data"""
+        return {
+            'last_phase': None,
+            'last_message_index': 0,
+            'last_timestamp': None,
+            'completed_phases': []
+        }
+    
     def ensure_crash_recovery_file(self):
         """Ensure crash recovery file exists"""
         if not self.crash_recovery_file.exists():
-            recovery_data = {
-                'last_phase': None,
-                'last_message_index': 0,
-                'last_timestamp': None,
-                'completed_phases': []
-            }
             with open(self.crash_recovery_file, 'w') as f:
-                json.dump(recovery_data, f, indent=2)
+                json.dump(self.default_crash_recovery(), f, indent=2)
+    
+    def write_crash_recovery(self, recovery_data: dict):
+        """Write crash recovery data locally and to the run checkpoint"""
+        with open(self.crash_recovery_file, 'w') as f:
+            json.dump(recovery_data, f, indent=2)
+        save_run_checkpoint(recovery_data.get('last_phase'), recovery_data)
     
     def save_crash_recovery(self, phase: str, message_index: int):
         """Save crash recovery information"""
@@ -221,8 +249,7 @@ class FanvueMassDMBot:
             'last_timestamp': datetime.now().isoformat(),
             'completed_phases': self.load_crash_recovery().get('completed_phases', [])
         }
-        with open(self.crash_recovery_file, 'w') as f:
-            json.dump(recovery_data, f, indent=2)
+        self.write_crash_recovery(recovery_data)
     
     def load_crash_recovery(self) -> dict:
         """Load crash recovery information"""
@@ -238,24 +265,26 @@ class FanvueMassDMBot:
         if phase not in completed_phases:
             completed_phases.append(phase)
             recovery_data['completed_phases'] = completed_phases
-            with open(self.crash_recovery_file, 'w') as f:
-                json.dump(recovery_data, f, indent=2)
+            self.write_crash_recovery(recovery_data)
     
     def is_phase_completed(self, phase: str) -> bool:
         """Check if phase was completed"""
         recovery_data = self.load_crash_recovery()
         return phase in recovery_data.get('completed_phases', [])
     
+    def get_resume_phase(self) -> Optional[str]:
+        """Phase interrupted earlier in this run, if retried from a run checkpoint"""
+        if not CHECKPOINT_URL:
+            return None
+        recovery_data = self.load_crash_recovery()
+        phase = recovery_data.get('last_phase')
+        if phase and phase not in recovery_data.get('completed_phases', []):
+            return phase
+        return None
+    
     def reset_crash_recovery(self):
         """Reset crash recovery data"""
-        recovery_data = {
-            'last_phase': None,
-            'last_message_index': 0,
-            'last_timestamp': None,
-            'completed_phases': []
-        }
-        with open(self.crash_recovery_file, 'w') as f:
-            json.dump(recovery_data, f, indent=2)
+        self.write_crash_recovery(self.default_crash_recovery())
         logger.info("🔄 Crash recovery data reset")
         
     def load_config(self) -> dict:
@@ -371,6 +400,8 @@ class FanvueMassDMBot:
         logger.info("🚀 Initializing Playwright browser...")
         
         try:
+            # Imported here so runs that have nothing to send never load Playwright
+            from playwright.async_api import async_playwright
             self.playwright = await async_playwright().start()
             
             browser_settings = self.config.get("browser_settings", {})
@@ -636,7 +667,7 @@ class FanvueMassDMBot:
             
             await self.page.wait_for_selector(new_mass_dm_selector, timeout=10000)
             await self.page.click(new_mass_dm_selector)
-            time.sleep(3)
+            await asyncio.sleep(3)
             
             logger.info("✅ Clicked new mass DM button")
             return True
@@ -645,7 +676,7 @@ class FanvueMassDMBot:
             logger.error(f"❌ Error clicking new mass DM button: {e}")
             return False
 
-    def click_select_lists_button(self):
+    async def click_select_lists_button(self):
         """Click the select lists button using the exact selector"""
         try:
             # Exact selector from the provided HTML
@@ -653,7 +684,7 @@ class FanvueMassDMBot:
             
             await self.page.wait_for_selector(select_lists_selector, timeout=10000)
             await self.page.click(select_lists_selector)
-            time.sleep(3)
+            await asyncio.sleep(3)
             
             logger.info("✅ Clicked select lists button")
             return True
@@ -684,10 +715,10 @@ class FanvueMassDMBot:
             radio_selector = f'input[type="radio"][value="{value}"]'
             
             # Wait for the radio button to be available
-            self.page.wait_for_selector(radio_selector, timeout=10000)
+            await self.page.wait_for_selector(radio_selector, timeout=10000)
             
             # Check if the radio button is disabled
-            is_disabled = self.page.locator(radio_selector).is_disabled()
+            is_disabled = await self.page.locator(radio_selector).is_disabled()
             
             if is_disabled:
                 logger.warning(f"⚠️ {audience_type} option is disabled, trying fallback options")
@@ -702,8 +733,8 @@ class FanvueMassDMBot:
                     try:
                         is_fallback_disabled = await self.page.locator(fallback_selector).is_disabled()
                         if not is_fallback_disabled:
-                            self.page.click(fallback_selector)
-                            time.sleep(1)
+                            await self.page.click(fallback_selector)
+                            await asyncio.sleep(1)
                             logger.info(f"✅ Selected fallback audience: {fallback}")
                             return True
                     except:
@@ -713,8 +744,8 @@ class FanvueMassDMBot:
                 return False
             else:
                 # Click the radio button
-                self.page.click(radio_selector)
-                time.sleep(1)
+                await self.page.click(radio_selector)
+                await asyncio.sleep(1)
                 logger.info(f"✅ Selected audience: {audience_type}")
                 return True
                 
@@ -722,15 +753,15 @@ class FanvueMassDMBot:
             logger.error(f"❌ Error selecting audience: {e}")
             return False
 
-    def click_save_button(self):
+    async def click_save_button(self):
         """Click the save button using the exact selector"""
         try:
             # Exact selector from the provided HTML
             save_selector = 'button:has-text("Save")'
             
-            self.page.wait_for_selector(save_selector, timeout=10000)
-            self.page.click(save_selector)
-            time.sleep(3)
+            await self.page.wait_for_selector(save_selector, timeout=10000)
+            await self.page.click(save_selector)
+            await asyncio.sleep(3)
             
             logger.info("✅ Clicked save button")
             return True
@@ -739,19 +770,19 @@ class FanvueMassDMBot:
             logger.error(f"❌ Error clicking save button: {e}")
             return False
 
-    def click_excluding_list_button(self):
+    async def click_excluding_list_button(self):
         """Click the excluding list button (optional step)"""
         try:
             # Look for the excluding list button (same structure as select lists)
             excluding_selector = 'button:has-text("Select lists")'
             
             # Check if there are multiple "Select lists" buttons (indicating excluding list option)
-            buttons = self.page.query_selector_all('button:has-text("Select lists")')
+            buttons = await self.page.query_selector_all('button:has-text("Select lists")')
             
             if len(buttons) > 1:
                 # Click the second "Select lists" button (excluding list)
-                buttons[1].click()
-                time.sleep(3)
+                await buttons[1].click()
+                await asyncio.sleep(3)
                 logger.info("✅ Clicked excluding list button")
                 return True
             else:
@@ -762,7 +793,7 @@ class FanvueMassDMBot:
             logger.error(f"❌ Error clicking excluding list button: {e}")
             return False
 
-    def select_excluding_audience(self, excluding_type=None):
+    async def select_excluding_audience(self, excluding_type=None):
         """Select excluding audience (optional)"""
         try:
             if not excluding_type:
@@ -784,12 +815,12 @@ class FanvueMassDMBot:
             value = audience_mapping.get(excluding_type, "6")
             radio_selector = f'input[type="radio"][value="{value}"]'
             
-            self.page.wait_for_selector(radio_selector, timeout=10000)
-            is_disabled = self.page.locator(radio_selector).is_disabled()
+            await self.page.wait_for_selector(radio_selector, timeout=10000)
+            is_disabled = await self.page.locator(radio_selector).is_disabled()
             
             if not is_disabled:
-                self.page.click(radio_selector)
-                time.sleep(1)
+                await self.page.click(radio_selector)
+                await asyncio.sleep(1)
                 logger.info(f"✅ Selected excluding audience: {excluding_type}")
                 return True
             else:
@@ -800,15 +831,15 @@ class FanvueMassDMBot:
             logger.error(f"❌ Error selecting excluding audience: {e}")
             return False
 
-    def fill_message_text(self, message):
+    async def fill_message_text(self, message):
         """Fill the message text in the textarea"""
         try:
             # Exact selector from the provided HTML
             textarea_selector = 'textarea[placeholder="Type a message..."]'
             
-            self.page.wait_for_selector(textarea_selector, timeout=10000)
-            self.page.fill(textarea_selector, message)
-            time.sleep(1)
+            await self.page.wait_for_selector(textarea_selector, timeout=10000)
+            await self.page.fill(textarea_selector, message)
+            await asyncio.sleep(1)
             
             logger.info(f"✅ Filled message text: {message[:50]}...")
             return True
@@ -817,15 +848,15 @@ class FanvueMassDMBot:
             logger.error(f"❌ Error filling message text: {e}")
             return False
 
-    def click_vault_button(self):
+    async def click_vault_button(self):
         """Click the vault button to add media from vault"""
         try:
             # Exact selector from the provided HTML
             vault_selector = 'svg[data-sentry-component="PhotoLibraryOutlinedIcon"]'
             
-            self.page.wait_for_selector(vault_selector, timeout=10000)
-            self.page.click(vault_selector)
-            time.sleep(3)
+            await self.page.wait_for_selector(vault_selector, timeout=10000)
+            await self.page.click(vault_selector)
+            await asyncio.sleep(3)
             
             logger.info("✅ Clicked vault button")
             return True
@@ -834,15 +865,15 @@ class FanvueMassDMBot:
             logger.error(f"❌ Error clicking vault button: {e}")
             return False
 
-    def click_filter_button(self):
+    async def click_filter_button(self):
         """Click the filter button to select folders"""
         try:
             # Exact selector from the provided HTML
             filter_selector = 'div[role="combobox"][aria-label="folders"]'
             
-            self.page.wait_for_selector(filter_selector, timeout=10000)
-            self.page.click(filter_selector)
-            time.sleep(2)
+            await self.page.wait_for_selector(filter_selector, timeout=10000)
+            await self.page.click(filter_selector)
+            await asyncio.sleep(2)
             
             logger.info("✅ Clicked filter button")
             return True
@@ -851,15 +882,15 @@ class FanvueMassDMBot:
             logger.error(f"❌ Error clicking filter button: {e}")
             return False
 
-    def select_filter_option(self, filter_name):
+    async def select_filter_option(self, filter_name):
         """Select a specific filter option"""
         try:
             # Click on the filter option that matches the name
             filter_option_selector = f'li:has-text("{filter_name}"), div:has-text("{filter_name}")'
             
-            self.page.wait_for_selector(filter_option_selector, timeout=10000)
-            self.page.click(filter_option_selector)
-            time.sleep(2)
+            await self.page.wait_for_selector(filter_option_selector, timeout=10000)
+            await self.page.click(filter_option_selector)
+            await asyncio.sleep(2)
             
             logger.info(f"✅ Selected filter: {filter_name}")
             return True
@@ -868,14 +899,14 @@ class FanvueMassDMBot:
             logger.error(f"❌ Error selecting filter option: {e}")
             return False
 
-    def select_media_from_vault(self, filter_name, media_count=1):
+    async def select_media_from_vault(self, filter_name, media_count=1):
         """Select media from vault using scrolling and selection logic"""
         try:
             logger.info(f"📸 Selecting {media_count} media items from vault with filter: {filter_name}")
             
             # Wait for media grid to load
-            self.page.wait_for_selector('[data-testid="media-item"], .media-item, img', timeout=10000)
-            time.sleep(2)
+            await self.page.wait_for_selector('[data-testid="media-item"], .media-item, img', timeout=10000)
+            await asyncio.sleep(2)
             
             selected_count = 0
             max_scroll_attempts = 10
@@ -883,7 +914,7 @@ class FanvueMassDMBot:
             
             while selected_count < media_count and scroll_attempts < max_scroll_attempts:
                 # Find all media items
-                media_items = self.page.query_selector_all('[data-testid="media-item"], .media-item, img')
+                media_items = await self.page.query_selector_all('[data-testid="media-item"], .media-item, img')
                 
                 if not media_items:
                     logger.warning("⚠️ No media items found")
@@ -896,11 +927,11 @@ class FanvueMassDMBot:
                     
                     try:
                         # Check if item is already selected
-                        is_selected = item.evaluate('el => el.classList.contains("selected") || el.getAttribute("data-selected") === "true"')
+                        is_selected = await item.evaluate('el => el.classList.contains("selected") || el.getAttribute("data-selected") === "true"')
                         
                         if not is_selected:
-                            item.click()
-                            time.sleep(0.5)
+                            await item.click()
+                            await asyncio.sleep(0.5)
                             selected_count += 1
                             logger.info(f"✅ Selected media item {selected_count}")
                     except Exception as e:
@@ -909,8 +940,8 @@ class FanvueMassDMBot:
                 
                 # If we need more items, scroll down
                 if selected_count < media_count:
-                    self.page.evaluate('window.scrollBy(0, 500)')
-                    time.sleep(2)
+                    await self.page.evaluate('window.scrollBy(0, 500)')
+                    await asyncio.sleep(2)
                     scroll_attempts += 1
                     logger.info(f"📜 Scrolled down (attempt {scroll_attempts})")
             
@@ -921,15 +952,15 @@ class FanvueMassDMBot:
             logger.error(f"❌ Error selecting media from vault: {e}")
             return False
 
-    def click_add_media_button(self):
+    async def click_add_media_button(self):
         """Click the add media button"""
         try:
             # Exact selector from the provided HTML
             add_media_selector = 'button:has-text("Add Media")'
             
-            self.page.wait_for_selector(add_media_selector, timeout=10000)
-            self.page.click(add_media_selector)
-            time.sleep(3)
+            await self.page.wait_for_selector(add_media_selector, timeout=10000)
+            await self.page.click(add_media_selector)
+            await asyncio.sleep(3)
             
             logger.info("✅ Clicked add media button")
             return True
@@ -938,15 +969,15 @@ class FanvueMassDMBot:
             logger.error(f"❌ Error clicking add media button: {e}")
             return False
 
-    def click_send_mass_dm_button(self):
+    async def click_send_mass_dm_button(self):
         """Click the send mass DM button"""
         try:
             # Exact selector from the provided HTML
             send_selector = 'button[aria-label="Send"][type="submit"]'
             
-            self.page.wait_for_selector(send_selector, timeout=10000)
-            self.page.click(send_selector)
-            time.sleep(3)
+            await self.page.wait_for_selector(send_selector, timeout=10000)
+            await self.page.click(send_selector)
+            await asyncio.sleep(3)
             
             logger.info("✅ Clicked send mass DM button")
             return True
@@ -955,15 +986,15 @@ class FanvueMassDMBot:
             logger.error(f"❌ Error clicking send mass DM button: {e}")
             return False
 
-    def click_price_button(self):
+    async def click_price_button(self):
         """Click the set post price button"""
         try:
             # Exact selector from the provided HTML
             price_button_selector = 'button[aria-label="Set post price"]'
             
-            self.page.wait_for_selector(price_button_selector, timeout=10000)
-            self.page.click(price_button_selector)
-            time.sleep(2)
+            await self.page.wait_for_selector(price_button_selector, timeout=10000)
+            await self.page.click(price_button_selector)
+            await asyncio.sleep(2)
             
             logger.info("✅ Clicked price button")
             return True
@@ -972,29 +1003,29 @@ class FanvueMassDMBot:
             logger.error(f"❌ Error clicking price button: {e}")
             return False
 
-    def set_price_value(self, price):
+    async def set_price_value(self, price):
         """Set the price value in the price input field"""
         try:
             # Exact selector from the provided HTML
             price_input_selector = 'input[name="price"][type="number"]'
             
-            self.page.wait_for_selector(price_input_selector, timeout=10000)
+            await self.page.wait_for_selector(price_input_selector, timeout=10000)
             
             # Click on the input field to focus it
-            self.page.click(price_input_selector)
-            time.sleep(0.5)
+            await self.page.click(price_input_selector)
+            await asyncio.sleep(0.5)
             
             # Clear the field by pressing backspace multiple times
-            self.page.keyboard.press("Backspace")
-            time.sleep(0.2)
-            self.page.keyboard.press("Backspace")
-            time.sleep(0.2)
-            self.page.keyboard.press("Backspace")
-            time.sleep(0.2)
+            await self.page.keyboard.press("Backspace")
+            await asyncio.sleep(0.2)
+            await self.page.keyboard.press("Backspace")
+            await asyncio.sleep(0.2)
+            await self.page.keyboard.press("Backspace")
+            await asyncio.sleep(0.2)
             
             # Type the new price value
-            self.page.fill(price_input_selector, str(price))
-            time.sleep(1)
+            await self.page.fill(price_input_selector, str(price))
+            await asyncio.sleep(1)
             
             logger.info(f"✅ Set price value: ${price}")
             return True
@@ -1003,15 +1034,15 @@ class FanvueMassDMBot:
             logger.error(f"❌ Error setting price value: {e}")
             return False
 
-    def click_set_price_button(self):
+    async def click_set_price_button(self):
         """Click the 'Set the price' button"""
         try:
             # Exact selector from the provided HTML
             set_price_selector = 'button:has-text("Set the price")'
             
-            self.page.wait_for_selector(set_price_selector, timeout=10000)
-            self.page.click(set_price_selector)
-            time.sleep(2)
+            await self.page.wait_for_selector(set_price_selector, timeout=10000)
+            await self.page.click(set_price_selector)
+            await asyncio.sleep(2)
             
             logger.info("✅ Clicked set price button")
             return True
@@ -1020,15 +1051,15 @@ class FanvueMassDMBot:
             logger.error(f"❌ Error clicking set price button: {e}")
             return False
 
-    def click_post_button(self):
+    async def click_post_button(self):
         """Click the post/send button after setting price"""
         try:
             # Exact selector from the provided HTML (same as send button)
             post_selector = 'button[aria-label="Send"][type="submit"]'
             
-            self.page.wait_for_selector(post_selector, timeout=10000)
-            self.page.click(post_selector)
-            time.sleep(3)
+            await self.page.wait_for_selector(post_selector, timeout=10000)
+            await self.page.click(post_selector)
+            await asyncio.sleep(3)
             
             logger.info("✅ Clicked post button")
             return True
@@ -1064,12 +1095,12 @@ class FanvueMassDMBot:
             logger.error(f"❌ Error checking login status: {e}")
             return False
 
-    def navigate_to_messages(self):
+    async def navigate_to_messages(self):
         """Navigate to messages page"""
         try:
             messages_url = self.config.get("messages_url", "https://www.fanvue.com/messages")
-            self.page.goto(messages_url)
-            time.sleep(3)
+            await self.page.goto(messages_url)
+            await asyncio.sleep(3)
             
             logger.info("✅ Navigated to messages page")
             return True
@@ -1078,13 +1109,13 @@ class FanvueMassDMBot:
             logger.error(f"❌ Error navigating to messages: {e}")
             return False
 
-    def get_conversations(self):
+    async def get_conversations(self):
         """Get all conversation elements"""
         try:
             # Wait for conversations to load
-            self.page.wait_for_selector('[data-testid="conversation-item"]', timeout=10000)
+            await self.page.wait_for_selector('[data-testid="conversation-item"]', timeout=10000)
             
-            conversations = self.page.query_selector_all('[data-testid="conversation-item"]')
+            conversations = await self.page.query_selector_all('[data-testid="conversation-item"]')
             
             if not conversations:
                 logger.warning("⚠️ No conversations found")
@@ -1097,11 +1128,11 @@ class FanvueMassDMBot:
             logger.error(f"❌ Error getting conversations: {e}")
             return []
 
-    def step_click_conversation(self, conversation_element):
+    async def step_click_conversation(self, conversation_element):
         """Click on a conversation"""
         try:
-            conversation_element.click()
-            time.sleep(2)
+            await conversation_element.click()
+            await asyncio.sleep(2)
             logger.info("✅ Clicked conversation")
             return True
             
@@ -1109,10 +1140,10 @@ class FanvueMassDMBot:
             logger.error(f"❌ Error clicking conversation: {e}")
             return False
 
-    def step_wait_for_message_input(self):
+    async def step_wait_for_message_input(self):
         """Wait for message input to be available"""
         try:
-            self.page.wait_for_selector('textarea[placeholder*="message"], textarea[placeholder*="Message"]', timeout=10000)
+            await self.page.wait_for_selector('textarea[placeholder*="message"], textarea[placeholder*="Message"]', timeout=10000)
             logger.info("✅ Message input ready")
             return True
             
@@ -1120,12 +1151,12 @@ class FanvueMassDMBot:
             logger.error(f"❌ Error waiting for message input: {e}")
             return False
 
-    def step_fill_message_text(self, message):
+    async def step_fill_message_text(self, message):
         """Fill message text"""
         try:
             textarea_selector = 'textarea[placeholder*="message"], textarea[placeholder*="Message"]'
-            self.page.fill(textarea_selector, message)
-            time.sleep(1)
+            await self.page.fill(textarea_selector, message)
+            await asyncio.sleep(1)
             
             logger.info(f"✅ Filled message text: {message[:50]}...")
             return True
@@ -1134,7 +1165,7 @@ class FanvueMassDMBot:
             logger.error(f"❌ Error filling message text: {e}")
             return False
 
-    def step_click_attach_button(self):
+    async def step_click_attach_button(self):
         """Click attach button"""
         try:
             attach_selectors = [
@@ -1145,9 +1176,9 @@ class FanvueMassDMBot:
             
             for selector in attach_selectors:
                 try:
-                    if self.page.locator(selector).is_visible(timeout=2000):
-                        self.page.click(selector)
-                        time.sleep(2)
+                    if await self.page.locator(selector).is_visible(timeout=2000):
+                        await self.page.click(selector)
+                        await asyncio.sleep(2)
                         logger.info("✅ Clicked attach button")
                         return True
                 except:
@@ -1160,13 +1191,13 @@ class FanvueMassDMBot:
             logger.error(f"❌ Error clicking attach button: {e}")
             return False
 
-    def step_upload_media(self, file_paths):
+    async def step_upload_media(self, file_paths):
         """Upload media files"""
         try:
             # Handle file upload
             file_input_selector = 'input[type="file"]'
-            self.page.set_input_files(file_input_selector, file_paths)
-            time.sleep(3)
+            await self.page.set_input_files(file_input_selector, file_paths)
+            await asyncio.sleep(3)
             
             logger.info(f"✅ Uploaded {len(file_paths)} media files")
             return True
@@ -1175,12 +1206,12 @@ class FanvueMassDMBot:
             logger.error(f"❌ Error uploading media: {e}")
             return False
 
-    def step_select_bundle_option(self, bundle_size):
+    async def step_select_bundle_option(self, bundle_size):
         """Select bundle option"""
         try:
             bundle_selector = f'input[value="{bundle_size}"], [data-testid="bundle-{bundle_size}"]'
-            self.page.click(bundle_selector)
-            time.sleep(1)
+            await self.page.click(bundle_selector)
+            await asyncio.sleep(1)
             
             logger.info(f"✅ Selected bundle size: {bundle_size}")
             return True
@@ -1189,12 +1220,12 @@ class FanvueMassDMBot:
             logger.error(f"❌ Error selecting bundle option: {e}")
             return False
 
-    def step_set_price(self, price):
+    async def step_set_price(self, price):
         """Set price for bundle"""
         try:
             price_selector = 'input[placeholder*="price"], input[type="number"]'
-            self.page.fill(price_selector, str(price))
-            time.sleep(1)
+            await self.page.fill(price_selector, str(price))
+            await asyncio.sleep(1)
             
             logger.info(f"✅ Set price: €{price}")
             return True
@@ -1203,7 +1234,7 @@ class FanvueMassDMBot:
             logger.error(f"❌ Error setting price: {e}")
             return False
 
-    def step_send_message(self):
+    async def step_send_message(self):
         """Send the message"""
         try:
             send_selectors = [
@@ -1214,9 +1245,9 @@ class FanvueMassDMBot:
             
             for selector in send_selectors:
                 try:
-                    if self.page.locator(selector).is_visible(timeout=2000):
-                        self.page.click(selector)
-                        time.sleep(3)
+                    if await self.page.locator(selector).is_visible(timeout=2000):
+                        await self.page.click(selector)
+                        await asyncio.sleep(3)
                         logger.info("✅ Message sent")
                         return True
                 except:
@@ -1229,7 +1260,7 @@ class FanvueMassDMBot:
             logger.error(f"❌ Error sending message: {e}")
             return False
 
-    def step_click_messages_button(self):
+    async def step_click_messages_button(self):
         """Click messages button to go back"""
         try:
             messages_selectors = [
@@ -1244,9 +1275,9 @@ class FanvueMassDMBot:
             
             for selector in messages_selectors:
                 try:
-                    if self.page.locator(selector).is_visible(timeout=2000):
-                        self.page.click(selector)
-                        time.sleep(2)
+                    if await self.page.locator(selector).is_visible(timeout=2000):
+                        await self.page.click(selector)
+                        await asyncio.sleep(2)
                         logger.info("✅ Clicked messages button")
                         return True
                 except:
@@ -1259,7 +1290,7 @@ class FanvueMassDMBot:
             logger.error(f"❌ Error clicking messages button: {e}")
             return False
 
-    def step_click_new_mass_message(self):
+    async def step_click_new_mass_message(self):
         """Click new mass message button"""
         try:
             mass_message_selectors = [
@@ -1270,9 +1301,9 @@ class FanvueMassDMBot:
             
             for selector in mass_message_selectors:
                 try:
-                    if self.page.locator(selector).is_visible(timeout=2000):
-                        self.page.click(selector)
-                        time.sleep(2)
+                    if await self.page.locator(selector).is_visible(timeout=2000):
+                        await self.page.click(selector)
+                        await asyncio.sleep(2)
                         logger.info("✅ Clicked new mass message button")
                         return True
                 except:
@@ -1285,7 +1316,7 @@ class FanvueMassDMBot:
             logger.error(f"❌ Error clicking new mass message: {e}")
             return False
 
-    def step_click_select_lists(self):
+    async def step_click_select_lists(self):
         """Click select lists button"""
         try:
             lists_selectors = [
@@ -1296,9 +1327,9 @@ class FanvueMassDMBot:
             
             for selector in lists_selectors:
                 try:
-                    if self.page.locator(selector).is_visible(timeout=2000):
-                        self.page.click(selector)
-                        time.sleep(2)
+                    if await self.page.locator(selector).is_visible(timeout=2000):
+                        await self.page.click(selector)
+                        await asyncio.sleep(2)
                         logger.info("✅ Clicked select lists button")
                         return True
                 except:
@@ -1311,7 +1342,7 @@ class FanvueMassDMBot:
             logger.error(f"❌ Error clicking select lists: {e}")
             return False
 
-    def step_select_all_members(self):
+    async def step_select_all_members(self):
         """Select all members"""
         try:
             all_members_selectors = [
@@ -1322,9 +1353,9 @@ class FanvueMassDMBot:
             
             for selector in all_members_selectors:
                 try:
-                    if self.page.locator(selector).is_visible(timeout=2000):
-                        self.page.click(selector)
-                        time.sleep(1)
+                    if await self.page.locator(selector).is_visible(timeout=2000):
+                        await self.page.click(selector)
+                        await asyncio.sleep(1)
                         logger.info("✅ Selected all members")
                         return True
                 except:
@@ -1337,7 +1368,7 @@ class FanvueMassDMBot:
             logger.error(f"❌ Error selecting all members: {e}")
             return False
 
-    def step_click_save_button(self):
+    async def step_click_save_button(self):
         """Click save button"""
         try:
             save_selectors = [
@@ -1348,9 +1379,9 @@ class FanvueMassDMBot:
             
             for selector in save_selectors:
                 try:
-                    if self.page.locator(selector).is_visible(timeout=2000):
-                        self.page.click(selector)
-                        time.sleep(2)
+                    if await self.page.locator(selector).is_visible(timeout=2000):
+                        await self.page.click(selector)
+                        await asyncio.sleep(2)
                         logger.info("✅ Clicked save button")
                         return True
                 except:
@@ -1363,29 +1394,29 @@ class FanvueMassDMBot:
             logger.error(f"❌ Error clicking save button: {e}")
             return False
 
-    def send_text_only_message(self, conversation_element, message):
+    async def send_text_only_message(self, conversation_element, message):
         """Send text-only message"""
         try:
             logger.info("💬 Sending text-only message")
             
             # Click conversation
-            if not self.step_click_conversation(conversation_element):
+            if not await self.step_click_conversation(conversation_element):
                 return False
             
             # Wait for message input
-            if not self.step_wait_for_message_input():
+            if not await self.step_wait_for_message_input():
                 return False
             
             # Fill message text
-            if not self.step_fill_message_text(message):
+            if not await self.step_fill_message_text(message):
                 return False
             
             # Send message
-            if not self.step_send_message():
+            if not await self.step_send_message():
                 return False
             
             # Go back to messages
-            self.step_click_messages_button()
+            await self.step_click_messages_button()
             
             logger.info("✅ Text-only message sent successfully")
             return True
@@ -1394,44 +1425,44 @@ class FanvueMassDMBot:
             logger.error(f"❌ Error sending text-only message: {e}")
             return False
 
-    def send_bundle_text_message(self, conversation_element, message, bundle_size, price):
+    async def send_bundle_text_message(self, conversation_element, message, bundle_size, price):
         """Send bundle + text message"""
         try:
             logger.info(f"📦 Sending bundle + text message (size: {bundle_size}, price: €{price})")
             
             # Click conversation
-            if not self.step_click_conversation(conversation_element):
+            if not await self.step_click_conversation(conversation_element):
                 return False
             
             # Wait for message input
-            if not self.step_wait_for_message_input():
+            if not await self.step_wait_for_message_input():
                 return False
             
             # Fill message text
-            if not self.step_fill_message_text(message):
+            if not await self.step_fill_message_text(message):
                 return False
             
             # Click attach button
-            if not self.step_click_attach_button():
+            if not await self.step_click_attach_button():
                 return False
             
             # Upload media (placeholder - would need actual file paths)
             # self.step_upload_media(file_paths)
             
             # Select bundle option
-            if not self.step_select_bundle_option(bundle_size):
+            if not await self.step_select_bundle_option(bundle_size):
                 return False
             
             # Set price
-            if not self.step_set_price(price):
+            if not await self.step_set_price(price):
                 return False
             
             # Send message
-            if not self.step_send_message():
+            if not await self.step_send_message():
                 return False
             
             # Go back to messages
-            self.step_click_messages_button()
+            await self.step_click_messages_button()
             
             logger.info("✅ Bundle + text message sent successfully")
             return True
@@ -1440,25 +1471,25 @@ class FanvueMassDMBot:
             logger.error(f"❌ Error sending bundle + text message: {e}")
             return False
 
-    def send_photo_text_message(self, conversation_element, message, photo_path=None):
+    async def send_photo_text_message(self, conversation_element, message, photo_path=None):
         """Send photo + text message"""
         try:
             logger.info("📸 Sending photo + text message")
             
             # Click conversation
-            if not self.step_click_conversation(conversation_element):
+            if not await self.step_click_conversation(conversation_element):
                 return False
             
             # Wait for message input
-            if not self.step_wait_for_message_input():
+            if not await self.step_wait_for_message_input():
                 return False
             
             # Fill message text
-            if not self.step_fill_message_text(message):
+            if not await self.step_fill_message_text(message):
                 return False
             
             # Click attach button
-            if not self.step_click_attach_button():
+            if not await self.step_click_attach_button():
                 return False
             
             # Upload photo (placeholder - would need actual file path)
@@ -1467,11 +1498,11 @@ class FanvueMassDMBot:
                 pass
             
             # Send message
-            if not self.step_send_message():
+            if not await self.step_send_message():
                 return False
             
             # Go back to messages
-            self.step_click_messages_button()
+            await self.step_click_messages_button()
             
             logger.info("✅ Photo + text message sent successfully")
             return True
@@ -1490,35 +1521,35 @@ class FanvueMassDMBot:
                 return False
             
             # 3. Click new mass DM button
-            if not self.click_new_mass_dm_button():
+            if not await self.click_new_mass_dm_button():
                 return False
             
             # 4. Click select lists button
-            if not self.click_select_lists_button():
+            if not await self.click_select_lists_button():
                 return False
             
             # 5. Select audience
             default_audience = self.config.get("audience_selection", {}).get("default", "all_contacts")
-            if not self.select_audience(default_audience):
+            if not await self.select_audience(default_audience):
                 return False
             
             # 6. Click save button
-            if not self.click_save_button():
+            if not await self.click_save_button():
                 return False
             
             # 7. (Optional) Click excluding list button
             if self.config.get("excluding_list", {}).get("enabled", False):
-                if not self.click_excluding_list_button():
+                if not await self.click_excluding_list_button():
                     return False
                 
                 # 8. Select excluding audience
                 excluding_type = self.config.get("excluding_list", {}).get("audience_type")
                 if excluding_type:
-                    if not self.select_excluding_audience(excluding_type):
+                    if not await self.select_excluding_audience(excluding_type):
                         return False
                 
                 # 9. Click save button again
-                if not self.click_save_button():
+                if not await self.click_save_button():
                     return False
             
             # 10. Fill message text
@@ -1528,14 +1559,14 @@ class FanvueMassDMBot:
                 message_manager = MessageManager("default.xlsx", str(self.config_dir))
             
             message = message_manager.get_random_message()
-            if not self.fill_message_text(message):
+            if not await self.fill_message_text(message):
                 return False
             
             # Handle different message types
             if phase_type == "text_only":
                 # For text only, just send the message
                 logger.info("💬 Text-only message - sending directly")
-                if not self.click_send_mass_dm_button():
+                if not await self.click_send_mass_dm_button():
                     return False
                     
             elif phase_type in ["photo_text", "bundle_text"]:
@@ -1543,11 +1574,11 @@ class FanvueMassDMBot:
                 logger.info(f"📸 {phase_type} message - adding media from vault")
                 
                 # 11. Click vault button
-                if not self.click_vault_button():
+                if not await self.click_vault_button():
                     return False
                 
                 # 12. Click filter button
-                if not self.click_filter_button():
+                if not await self.click_filter_button():
                     return False
                 
                 # 13. Select filter option
@@ -1556,7 +1587,7 @@ class FanvueMassDMBot:
                 else:
                     filter_name = self.config.get("media_settings", {}).get("vault_filter", "All folders")
                 
-                if not self.select_filter_option(filter_name):
+                if not await self.select_filter_option(filter_name):
                     return False
                 
                 # 14. Select media from vault
@@ -1565,11 +1596,11 @@ class FanvueMassDMBot:
                 else:
                     media_count = self.config.get("media_settings", {}).get("media_count", 1)
                 
-                if not self.select_media_from_vault(filter_name, media_count):
+                if not await self.select_media_from_vault(filter_name, media_count):
                     return False
                 
                 # 15. Click add media button
-                if not self.click_add_media_button():
+                if not await self.click_add_media_button():
                     return False
                 
                 # 16. Handle pricing (for bundle messages or photo messages with pricing enabled)
@@ -1587,19 +1618,19 @@ class FanvueMassDMBot:
                         price = self.config.get("pricing", {}).get("default_price", 15)
                     
                     # Click price button
-                    if not self.click_price_button():
+                    if not await self.click_price_button():
                         return False
                     
                     # Set price value
-                    if not self.set_price_value(price):
+                    if not await self.set_price_value(price):
                         return False
                     
                     # Click set price button
-                    if not self.click_set_price_button():
+                    if not await self.click_set_price_button():
                         return False
                 
                 # 17. Click send mass DM button
-                if not self.click_send_mass_dm_button():
+                if not await self.click_send_mass_dm_button():
                     return False
             
             logger.info("✅ Mass DM flow setup completed")
@@ -1652,7 +1683,15 @@ class FanvueMassDMBot:
             
             success_count = 0
             
+            # Resume after the last DM sent before a crash in this run
+            recovery_data = self.load_crash_recovery()
+            start_index = recovery_data.get('last_message_index', 0) if recovery_data.get('last_phase') == phase_time else 0
+            if start_index:
+                logger.info(f"♻️ Resuming phase {phase_time} at DM {start_index + 1}")
+            
             for i, conversation in enumerate(conversations[:max_dms]):
+                if i < start_index:
+                    continue
                 logger.info(f"📤 Sending DM {i+1}/{min(len(conversations), max_dms)}")
                 
                 success = False
@@ -1672,6 +1711,7 @@ class FanvueMassDMBot:
                 if success:
                     success_count += 1
                     message_manager.move_to_used_messages(message)
+                    self.save_crash_recovery(phase_time, i + 1)
                     
                     # Get new message for next DM
                     message = message_manager.get_random_message()
@@ -1682,8 +1722,9 @@ class FanvueMassDMBot:
                     await asyncio.sleep(delay_between_dms)
             
             # Mark phase as completed
-            if success_count > 0:
+            if success_count > 0 or start_index:
                 self.phase_tracker.mark_phase_completed(phase_time)
+                self.mark_phase_completed(phase_time)
                 logger.info(f"✅ Mass DM session completed: {success_count} messages sent")
                 return True
             else:
@@ -1694,13 +1735,42 @@ class FanvueMassDMBot:
             logger.error(f"❌ Error in mass DM session: {e}")
             return False
 
+    def plan_phase(self) -> Optional[str]:
+        """Phase this run should send, or None if there's nothing to do.
+
+        Only reads the config and tracker files, so a cron tick outside every
+        phase exits before a browser is launched."""
+        # Reset phase tracker if new day
+        self.phase_tracker.reset_if_new_day()
+        
+        # Check if current time matches any phase
+        current_time = datetime.now().strftime("%H:%M")
+        phases = self.config.get("phases", {})
+        resume_phase = self.get_resume_phase()
+        if current_time in phases:
+            logger.info(f"⏰ Current time {current_time} matches phase configuration")
+            phase_time = current_time
+        elif resume_phase in phases:
+            logger.info(f"♻️ Resuming interrupted phase {resume_phase} from run checkpoint")
+            phase_time = resume_phase
+        else:
+            logger.info(f"⏰ Current time {current_time} doesn't match any phase")
+            logger.info(f"📅 Available phases: {list(phases.keys())}")
+            return None
+        
+        if self.phase_tracker.is_phase_completed_today(phase_time):
+            logger.info(f"✅ Phase {phase_time} already completed today")
+            return None
+        return phase_time
+
     async def run(self):
         """Main run method"""
         try:
             logger.info("🤖 Starting Fanvue Mass DM Bot")
             
-            # Reset phase tracker if new day
-            self.phase_tracker.reset_if_new_day()
+            phase_time = self.plan_phase()
+            if phase_time is None:
+                return True
             
             # Initialize browser
             if not await self.init_browser():
@@ -1716,19 +1786,7 @@ class FanvueMassDMBot:
             
             logger.info("✅ Browser initialized with cookies and navigated to home")
             
-            # Get current time
-            current_time = datetime.now().strftime("%H:%M")
-            
-            # Check if current time matches any phase
-            phases = self.config.get("phases", {})
-            if current_time in phases:
-                logger.info(f"⏰ Current time {current_time} matches phase configuration")
-                success = await self.run_mass_dm_session(current_time)
-                return success
-            else:
-                logger.info(f"⏰ Current time {current_time} doesn't match any phase")
-                logger.info(f"📅 Available phases: {list(phases.keys())}")
-                return True
+            return await self.run_mass_dm_session(phase_time)
             
         except Exception as e:
             logger.error(f"❌ Bot failed: {e}")
@@ -1,16 +1,15 @@
 #!/usr/bin/env python3
 """
-Fanvue Posting Bot - Playwright Version
+Fanvue Posting Bot - Playwright Version (async)
 More reliable automation with better element detection
 """
 
+import asyncio
 import os
 import json
-import time
 import random
 import pandas as pd
 from datetime import datetime
-from playwright.sync_api import sync_playwright
 import logging
 import fcntl
 import sys
@@ -74,15 +73,17 @@ class PlaywrightFanvueBot:
         except Exception as e:
             logger.warning(f"⚠️ Error releasing lock: {e}")
     
-    def init_driver(self):
+    async def init_driver(self):
         """Initialize Playwright browser"""
         logger.info("🚀 Initializing Playwright browser...")
         
         try:
-            self.playwright = sync_playwright().start()
+            # Imported here so runs that have nothing to post never load Playwright
+            from playwright.async_api import async_playwright
+            self.playwright = await async_playwright().start()
             
             # Launch browser (headless=False for local testing, headless=True for VPS)
-            self.browser = self.playwright.chromium.launch(
+            self.browser = await self.playwright.chromium.launch(
                 headless=True,  # Set to True for VPS (no X server)
                 args=[
                     "--no-sandbox",
@@ -94,8 +95,8 @@ class PlaywrightFanvueBot:
             )
             
             # Create new page
-            self.page = self.browser.new_page()
-            self.page.set_viewport_size({"width": 1280, "height": 720})
+            self.page = await self.browser.new_page()
+            await self.page.set_viewport_size({"width": 1280, "height": 720})
             
             logger.info("✅ Playwright browser initialized successfully")
             return True
@@ -103,7 +104,7 @@ class PlaywrightFanvueBot:
             logger.error(f"❌ Failed to initialize Playwright: {e}")
             return False
     
-    def load_cookies(self):
+    async def load_cookies(self):
         """Load cookies from file"""
         try:
             if not os.path.exists(CONFIG['cookiesFile']):
@@ -116,13 +117,13 @@ class PlaywrightFanvueBot:
             logger.info(f"📄 Found {len(cookies)} cookies")
             
             # Navigate to domain first
-            self.page.goto(CONFIG['baseUrl'])
-            time.sleep(2)
+            await self.page.goto(CONFIG['baseUrl'])
+            await asyncio.sleep(2)
             
             # Add cookies
             for cookie in cookies:
                 try:
-                    self.page.context.add_cookies([{
+                    await self.page.context.add_cookies([{
                         'name': cookie['name'],
                         'value': cookie['value'],
                         'path': cookie.get('path', '/'),
@@ -138,11 +139,11 @@ class PlaywrightFanvueBot:
             logger.error(f"❌ Failed to load cookies: {e}")
             return False
     
-    def check_login(self):
+    async def check_login(self):
         """Check if logged in"""
         try:
-            self.page.goto(CONFIG['baseUrl'])
-            time.sleep(3)
+            await self.page.goto(CONFIG['baseUrl'])
+            await asyncio.sleep(3)
             
             current_url = self.page.url
             if '/signin' not in current_url and '/login' not in current_url:
@@ -179,10 +180,10 @@ class PlaywrightFanvueBot:
         except Exception as e:
             logger.error(f"❌ Failed to save used media: {e}")
     
-    def get_media_filename(self, media_item):
+    async def get_media_filename(self, media_item):
         """Extract the filename from a media item"""
         try:
-            filename = media_item.evaluate("""
+            filename = await media_item.evaluate("""
                 el => {
                     const container = el.closest('div[class*="MuiBox-root"]');
                     if (container) {
@@ -306,27 +307,49 @@ class PlaywrightFanvueBot:
             logger.error(f"❌ Error checking if should post now: {e}")
             return False
     
-    def create_post(self, post_number):
+    def plan_post(self, check_schedule=True):
+        """Number of the post to create this session, or None if there's nothing to do.
+
+        Only reads local files, so sessions that wouldn't post exit before a
+        browser is launched."""
+        # Get posts made today
+        posts_today = self.get_posts_made_today()
+        logger.info(f"📊 Posts already made today: {posts_today}")
+        
+        # Check if we've reached the maximum posts for today
+        if posts_today >= CONFIG['maxPosts']:
+            logger.info(f"✅ Already made {posts_today} posts today (max: {CONFIG['maxPosts']}). Exiting.")
+            return None
+        
+        # Check if it's time to post
+        if check_schedule and not self.should_post_now():
+            next_time = self.get_next_scheduled_time()
+            logger.info(f"⏰ Not time to post yet. Next scheduled time: {next_time}")
+            return None
+        
+        return posts_today + 1
+    
+    async def create_post(self, post_number):
         """Create a full post with media selection"""
         try:
             logger.info(f"📝 Creating post #{post_number}...")
             
             # Navigate to create page
-            self.page.goto(CONFIG['createUrl'])
-            time.sleep(CONFIG['buttonDelay'])
+            await self.page.goto(CONFIG['createUrl'])
+            await asyncio.sleep(CONFIG['buttonDelay'])
             
             # Get caption
             caption = self.get_random_caption()
             logger.info(f"📝 Using caption: {caption[:50]}...")
             
             # Add caption first
-            if not self.add_caption(caption):
+            if not await self.add_caption(caption):
                 logger.error("❌ Failed to add caption")
                 return False
             
             # Select audience (alternating) - BEFORE opening vault
             try:
-                if not self.select_audience(post_number):
+                if not await self.select_audience(post_number):
                     logger.error("❌ Failed to select audience")
                     return False
                 logger.info("✅ Audience selection completed")
@@ -344,7 +367,7 @@ class PlaywrightFanvueBot:
                 logger.info(f"🎯 Followers and Subscribers post -> Using filter: '{filter_name}'")
             
             try:
-                if not self.select_media(filter_name):
+                if not await self.select_media(filter_name):
                     logger.error("❌ Failed to select media")
                     return False
                 logger.info("✅ Media selection completed")
@@ -353,21 +376,21 @@ class PlaywrightFanvueBot:
                 return False
             
             # Submit post
-            if not self.submit_post():
+            if not await self.submit_post():
                 logger.error("❌ Failed to submit post")
                 return False
             
             # Move caption to used
             self.move_caption_to_used(caption)
             
-            time.sleep(2)
+            await asyncio.sleep(2)
             return True
             
         except Exception as e:
             logger.error(f"❌ Failed to create post: {e}")
             return False
     
-    def add_caption(self, caption):
+    async def add_caption(self, caption):
         """Add caption to the post"""
         try:
             logger.info("📝 Adding caption...")
@@ -384,7 +407,7 @@ class PlaywrightFanvueBot:
             caption_field = None
             for selector in caption_selectors:
                 try:
-                    caption_field = self.page.wait_for_selector(selector, timeout=5000)
+                    caption_field = await self.page.wait_for_selector(selector, timeout=5000)
                     if caption_field:
                         logger.info(f"✅ Found caption field with selector: {selector}")
                         break
@@ -396,10 +419,10 @@ class PlaywrightFanvueBot:
                 return False
             
             # Add caption (handle special characters)
-            caption_field.click()
-            time.sleep(1)
-            caption_field.fill("")  # Clear
-            time.sleep(1)
+            await caption_field.click()
+            await asyncio.sleep(1)
+            await caption_field.fill("")  # Clear
+            await asyncio.sleep(1)
             
             # Clean caption to remove only truly problematic characters while preserving emojis
             import re
@@ -412,8 +435,8 @@ class PlaywrightFanvueBot:
                 logger.info(f"🧹 Cleaned caption from '{str(caption)[:30]}...' to '{clean_caption[:30]}...'")
             
             # Type the caption
-            caption_field.type(clean_caption, delay=50)  # Type with delay for better reliability
-            time.sleep(2)
+            await caption_field.type(clean_caption, delay=50)  # Type with delay for better reliability
+            await asyncio.sleep(2)
             
             logger.info(f"✅ Caption added: {clean_caption[:50]}...")
             return True
@@ -422,7 +445,7 @@ class PlaywrightFanvueBot:
             logger.error(f"❌ Failed to add caption: {e}")
             return False
     
-    def select_audience(self, post_number):
+    async def select_audience(self, post_number):
         """Select audience - alternating between subscribers only and followers & subscribers"""
         try:
             # Determine audience based on post number and ensure proper alternation
@@ -446,7 +469,7 @@ class PlaywrightFanvueBot:
                 # For followers and subscribers, need to click dropdown
                 logger.info("🔍 Looking for audience dropdown...")
                 
-                time.sleep(3)
+                await asyncio.sleep(3)
                 
                 # Look for the specific audience dropdown with Playwright
                 audience_selectors = [
@@ -459,7 +482,7 @@ class PlaywrightFanvueBot:
                 audience_dropdown = None
                 for selector in audience_selectors:
                     try:
-                        audience_dropdown = self.page.wait_for_selector(selector, timeout=3000)
+                        audience_dropdown = await self.page.wait_for_selector(selector, timeout=3000)
                         if audience_dropdown:
                             logger.info(f"✅ Found audience dropdown with selector: {selector}")
                             break
@@ -472,9 +495,9 @@ class PlaywrightFanvueBot:
                 
                 # Click dropdown
                 try:
-                    audience_dropdown.click()
+                    await audience_dropdown.click()
                     logger.info("👆 Clicked audience dropdown")
-                    time.sleep(2)
+                    await asyncio.sleep(2)
                 except Exception as e:
                     logger.warning(f"⚠️ Failed to click audience dropdown: {e}")
                     return True
@@ -490,7 +513,7 @@ class PlaywrightFanvueBot:
                 followers_option = None
                 for selector in option_selectors:
                     try:
-                        followers_option = self.page.wait_for_selector(selector, timeout=3000)
+                        followers_option = await self.page.wait_for_selector(selector, timeout=3000)
                         if followers_option:
                             logger.info(f"✅ Found followers option with selector: {selector}")
                             break
@@ -499,9 +522,9 @@ class PlaywrightFanvueBot:
                 
                 if followers_option:
                     try:
-                        followers_option.click()
+                        await followers_option.click()
                         logger.info("✅ Selected 'Followers and subscribers'")
-                        time.sleep(2)
+                        await asyncio.sleep(2)
                     except Exception as e:
                         logger.warning(f"⚠️ Failed to click followers option: {e}")
                 else:
@@ -513,7 +536,7 @@ class PlaywrightFanvueBot:
             logger.error(f"❌ Failed to select audience: {e}")
             return True
     
-    def select_media(self, filter_name):
+    async def select_media(self, filter_name):
         """Select media from vault with filter"""
         try:
             logger.info(f"📁 Opening media vault for filter: '{filter_name}'...")
@@ -531,7 +554,7 @@ class PlaywrightFanvueBot:
             vault_button = None
             for selector in vault_selectors:
                 try:
-                    vault_button = self.page.wait_for_selector(selector, timeout=5000)
+                    vault_button = await self.page.wait_for_selector(selector, timeout=5000)
                     if vault_button:
                         logger.info(f"✅ Found vault button with selector: {selector}")
                         break
@@ -545,51 +568,51 @@ class PlaywrightFanvueBot:
             # Click vault button with better handling
             try:
                 # Scroll into view first
-                vault_button.scroll_into_view_if_needed()
-                time.sleep(1)
+                await vault_button.scroll_into_view_if_needed()
+                await asyncio.sleep(1)
                 
                 # Click with Playwright's better click handling
-                vault_button.click()
+                await vault_button.click()
                 logger.info("🖱️ Clicked vault button")
             except Exception as e:
                 logger.warning(f"⚠️ Regular click failed: {e}")
                 try:
                     # Try JavaScript click
-                    self.page.evaluate("arguments[0].click();", vault_button)
+                    await self.page.evaluate("arguments[0].click();", vault_button)
                     logger.info("🖱️ Clicked vault button (JavaScript)")
                 except Exception as js_e:
                     logger.warning(f"⚠️ JavaScript click failed: {js_e}")
                     # Try force click
-                    vault_button.click(force=True)
+                    await vault_button.click(force=True)
                     logger.info("🖱️ Clicked vault button (force)")
             
-            time.sleep(CONFIG['buttonDelay'])
+            await asyncio.sleep(CONFIG['buttonDelay'])
             
             # Wait for vault to open
             try:
-                self.page.wait_for_selector('.MuiDrawer-root, [role="dialog"]', timeout=10000)
+                await self.page.wait_for_selector('.MuiDrawer-root, [role="dialog"]', timeout=10000)
                 logger.info("✅ Vault drawer opened")
             except:
                 logger.error("❌ Vault drawer didn't open")
                 return False
             
             # Open filter menu
-            if not self.open_filter_menu():
+            if not await self.open_filter_menu():
                 logger.error("❌ Failed to open filter menu")
                 return False
             
             # Choose filter
-            if not self.choose_filter(filter_name):
+            if not await self.choose_filter(filter_name):
                 logger.error(f"❌ Failed to choose filter: {filter_name}")
                 return False
             
             # Find and select media
-            if not self.select_random_media():
+            if not await self.select_random_media():
                 logger.error("❌ Failed to select media")
                 return False
             
             # Add media to post
-            if not self.add_media():
+            if not await self.add_media():
                 logger.error("❌ Failed to add media")
                 return False
             
@@ -599,7 +622,7 @@ class PlaywrightFanvueBot:
             logger.error(f"❌ Media selection failed: {e}")
             return False
     
-    def open_filter_menu(self):
+    async def open_filter_menu(self):
         """Open the filter menu"""
         try:
             logger.info("🎛️ Opening filter menu...")
@@ -615,7 +638,7 @@ class PlaywrightFanvueBot:
             filter_button = None
             for selector in filter_selectors:
                 try:
-                    filter_button = self.page.wait_for_selector(selector, timeout=5000)
+                    filter_button = await self.page.wait_for_selector(selector, timeout=5000)
                     if filter_button:
                         logger.info(f"✅ Found filter button with selector: {selector}")
                         break
@@ -627,9 +650,9 @@ class PlaywrightFanvueBot:
                 return False
             
             # Click filter button
-            filter_button.click()
+            await filter_button.click()
             logger.info("✅ Clicked filter button")
-            time.sleep(CONFIG['filterDelay'])
+            await asyncio.sleep(CONFIG['filterDelay'])
             
             return True
             
@@ -637,7 +660,7 @@ class PlaywrightFanvueBot:
             logger.error(f"❌ Failed to open filter menu: {e}")
             return False
     
-    def choose_filter(self, filter_name):
+    async def choose_filter(self, filter_name):
         """Choose a specific filter"""
         try:
             logger.info(f"🎯 Looking for filter: '{filter_name}'...")
@@ -653,7 +676,7 @@ class PlaywrightFanvueBot:
             filter_option = None
             for selector in filter_selectors:
                 try:
-                    filter_option = self.page.wait_for_selector(selector, timeout=5000)
+                    filter_option = await self.page.wait_for_selector(selector, timeout=5000)
                     if filter_option:
                         logger.info(f"✅ Found filter option: '{filter_name}' with selector: {selector}")
                         break
@@ -670,12 +693,12 @@ class PlaywrightFanvueBot:
                 
                 for selector in all_folders_selectors:
                     try:
-                        all_folders = self.page.wait_for_selector(selector, timeout=3000)
+                        all_folders = await self.page.wait_for_selector(selector, timeout=3000)
                         if all_folders:
                             logger.info(f"✅ Found 'All folders' with selector: {selector}")
-                            all_folders.click()
+                            await all_folders.click()
                             logger.info("✅ Clicked 'All folders'")
-                            time.sleep(CONFIG['filterDelay'])
+                            await asyncio.sleep(CONFIG['filterDelay'])
                             return True
                     except:
                         continue
@@ -684,9 +707,9 @@ class PlaywrightFanvueBot:
                 return True
             
             # Click filter option
-            filter_option.click()
+            await filter_option.click()
             logger.info(f"✅ Clicked filter: '{filter_name}'")
-            time.sleep(CONFIG['filterDelay'])
+            await asyncio.sleep(CONFIG['filterDelay'])
             
             return True
             
@@ -694,7 +717,7 @@ class PlaywrightFanvueBot:
             logger.warning(f"⚠️ Failed to choose filter '{filter_name}': {e}")
             return True
     
-    def select_random_media(self):
+    async def select_random_media(self):
         """Select random media from available options with scrolling, avoiding used media"""
         try:
             logger.info("🎲 Selecting random media with used media tracking...")
@@ -705,10 +728,10 @@ class PlaywrightFanvueBot:
             
             # First, scroll to load all available media
             logger.info("📜 Scrolling to load all media items...")
-            self.scroll_media_container()
+            await self.scroll_media_container()
             
             # Get all media items
-            media_items = self.page.query_selector_all('button[aria-label="Select media"]')
+            media_items = await self.page.query_selector_all('button[aria-label="Select media"]')
             logger.info(f"✅ Found {len(media_items)} media items with selector: button[aria-label=\"Select media\"]")
             
             if not media_items:
@@ -728,7 +751,7 @@ class PlaywrightFanvueBot:
                 attempts += 1
                 
                 # Get a fresh list of media items each time to avoid memory issues
-                media_items = self.page.query_selector_all('button[aria-label="Select media"]')
+                media_items = await self.page.query_selector_all('button[aria-label="Select media"]')
                 if not media_items:
                     logger.error("❌ No media items found")
                     return False
@@ -745,7 +768,7 @@ class PlaywrightFanvueBot:
                 checked_items.add(random_index)
                 
                 # Get the filename of the selected item
-                filename = self.get_media_filename(selected_item)
+                filename = await self.get_media_filename(selected_item)
                 
                 if filename == "Unknown":
                     logger.info(f"🎲 Attempt {attempts}/{max_attempts}: Checking media item with unknown filename...")
@@ -767,11 +790,11 @@ class PlaywrightFanvueBot:
                     logger.info(f"🎯 Clicking media item at index {random_index}")
                     
                     # Click the "Select media" button
-                    self.page.click(f'button[aria-label="Select media"] >> nth={random_index}')
+                    await self.page.click(f'button[aria-label="Select media"] >> nth={random_index}')
                     
                     # Verify what was actually selected by checking the selected state
-                    time.sleep(1)
-                    selected_filename = self.page.evaluate(f"""
+                    await asyncio.sleep(1)
+                    selected_filename = await self.page.evaluate(f"""
                         () => {{
                             const buttons = document.querySelectorAll('button[aria-label="Select media"]');
                             if (buttons[{random_index}]) {{
@@ -794,7 +817,7 @@ class PlaywrightFanvueBot:
                     logger.info(f"💾 Added '{filename}' to used media list")
                     
                     selected_item = None  # Clean up immediately
-                    time.sleep(CONFIG['buttonDelay'])
+                    await asyncio.sleep(CONFIG['buttonDelay'])
                     return True
                 except Exception as e:
                     logger.error(f"❌ Failed to select media: {e}")
@@ -809,13 +832,13 @@ class PlaywrightFanvueBot:
             logger.error(f"❌ Failed to select random media: {e}")
             return False
     
-    def scroll_media_container(self):
+    async def scroll_media_container(self):
         """Scroll through the media container to load all items"""
         try:
             logger.info("📜 Starting media container scroll...")
             
             # Count initial items
-            initial_items = self.page.query_selector_all('button[aria-label="Select media"]')
+            initial_items = await self.page.query_selector_all('button[aria-label="Select media"]')
             initial_count = len(initial_items)
             logger.info(f"📊 Initial media count: {initial_count}")
             
@@ -841,12 +864,12 @@ class PlaywrightFanvueBot:
             
             for selector in content_selectors:
                 try:
-                    elements = self.page.query_selector_all(selector)
+                    elements = await self.page.query_selector_all(selector)
                     for element in elements:
-                        if element.is_visible():
+                        if await element.is_visible():
                             # Check if this element actually has scrollable content
-                            scroll_height = element.evaluate("el => el.scrollHeight")
-                            client_height = element.evaluate("el => el.clientHeight")
+                            scroll_height = await element.evaluate("el => el.scrollHeight")
+                            client_height = await element.evaluate("el => el.clientHeight")
                             
                             if scroll_height > client_height:
                                 dialog_content = element
@@ -884,11 +907,11 @@ class PlaywrightFanvueBot:
             media_grid = None
             for selector in media_grid_selectors:
                 try:
-                    elements = self.page.query_selector_all(selector)
+                    elements = await self.page.query_selector_all(selector)
                     for element in elements:
-                        if element.is_visible():
+                        if await element.is_visible():
                             # Check if this element contains media items
-                            media_items = element.query_selector_all('button[aria-label="Select media"]')
+                            media_items = await element.query_selector_all('button[aria-label="Select media"]')
                             if len(media_items) > 0:
                                 media_grid = element
                                 logger.info(f"✅ Found media grid with selector: {selector} (contains {len(media_items)} items)")
@@ -901,9 +924,9 @@ class PlaywrightFanvueBot:
             while scroll_attempts < max_scroll_attempts:
                 try:
                     # Get current scroll position
-                    current_scroll = dialog_content.evaluate("el => el.scrollTop")
-                    scroll_height = dialog_content.evaluate("el => el.scrollHeight")
-                    client_height = dialog_content.evaluate("el => el.clientHeight")
+                    current_scroll = await dialog_content.evaluate("el => el.scrollTop")
+                    scroll_height = await dialog_content.evaluate("el => el.scrollHeight")
+                    client_height = await dialog_content.evaluate("el => el.clientHeight")
                     
                     logger.info(f"📊 Scroll attempt {scroll_attempts + 1}: position {current_scroll}/{scroll_height}, client height: {client_height}")
                     
@@ -911,10 +934,10 @@ class PlaywrightFanvueBot:
                     # 1. Scroll the container with larger increments
                     scroll_increment = 800  # Much larger increments to force loading
                     new_scroll = min(current_scroll + scroll_increment, scroll_height)
-                    dialog_content.evaluate(f"el => el.scrollTop = {new_scroll}")
+                    await dialog_content.evaluate(f"el => el.scrollTop = {new_scroll}")
                     
                     # 2. Try scrolling the actual media grid
-                    self.page.evaluate("""
+                    await self.page.evaluate("""
                         var mediaButtons = document.querySelectorAll('button[aria-label="Select media"]');
                         if (mediaButtons.length > 0) {
                             var lastButton = mediaButtons[mediaButtons.length - 1];
@@ -923,23 +946,23 @@ class PlaywrightFanvueBot:
                     """)
                     
                     # Wait for content to load
-                    time.sleep(3)
+                    await asyncio.sleep(3)
                     
                     # 3. Force scroll the page itself more aggressively
-                    self.page.evaluate("window.scrollBy(0, 500);")
-                    time.sleep(2)
+                    await self.page.evaluate("window.scrollBy(0, 500);")
+                    await asyncio.sleep(2)
                     
                     # 4. Try scrolling the dialog content directly
-                    self.page.evaluate("""
+                    await self.page.evaluate("""
                         var dialogContent = document.querySelector('.MuiDialogContent-root');
                         if (dialogContent) {
                             dialogContent.scrollTop = dialogContent.scrollTop + 500;
                         }
                     """)
-                    time.sleep(2)
+                    await asyncio.sleep(2)
                     
                     # Count current items
-                    current_items = self.page.query_selector_all('button[aria-label="Select media"]')
+                    current_items = await self.page.query_selector_all('button[aria-label="Select media"]')
                     current_count = len(current_items)
                     
                     if current_count > max_count:
@@ -954,16 +977,16 @@ class PlaywrightFanvueBot:
                             logger.info("📊 Reached bottom, trying multiple scroll approaches...")
                             
                             # Try scrolling the entire dialog
-                            self.page.evaluate("""
+                            await self.page.evaluate("""
                                 var dialog = document.querySelector('.MuiDrawer-root');
                                 if (dialog) {
                                     dialog.scrollTop = dialog.scrollHeight;
                                 }
                             """)
-                            time.sleep(2)
+                            await asyncio.sleep(2)
                             
                             # Try scrolling any grid or media container
-                            self.page.evaluate("""
+                            await self.page.evaluate("""
                                 var mediaContainers = document.querySelectorAll('div[class*="grid"], div[class*="Grid"], div[class*="media"], div[class*="Media"]');
                                 for (var i = 0; i < mediaContainers.length; i++) {
                                     var container = mediaContainers[i];
@@ -972,18 +995,18 @@ class PlaywrightFanvueBot:
                                     }
                                 }
                             """)
-                            time.sleep(2)
+                            await asyncio.sleep(2)
                             
                             # Try scrolling the page itself
-                            self.page.evaluate("window.scrollTo(0, document.body.scrollHeight);")
-                            time.sleep(2)
+                            await self.page.evaluate("window.scrollTo(0, document.body.scrollHeight);")
+                            await asyncio.sleep(2)
                             
                             # Force scroll to the very bottom of the dialog
-                            dialog_content.evaluate("el => el.scrollTop = el.scrollHeight")
-                            time.sleep(3)
+                            await dialog_content.evaluate("el => el.scrollTop = el.scrollHeight")
+                            await asyncio.sleep(3)
                             
                             # Check again
-                            final_items = self.page.query_selector_all('button[aria-label="Select media"]')
+                            final_items = await self.page.query_selector_all('button[aria-label="Select media"]')
                             final_count = len(final_items)
                             
                             if final_count > current_count:
@@ -1014,7 +1037,7 @@ class PlaywrightFanvueBot:
             logger.error(f"❌ Failed to scroll media container: {e}")
             return False
     
-    def add_media(self):
+    async def add_media(self):
         """Add selected media to the post"""
         try:
             logger.info("➕ Looking for Add Media button...")
@@ -1031,7 +1054,7 @@ class PlaywrightFanvueBot:
             add_button = None
             for selector in add_selectors:
                 try:
-                    add_button = self.page.wait_for_selector(selector, timeout=5000)
+                    add_button = await self.page.wait_for_selector(selector, timeout=5000)
                     if add_button:
                         logger.info(f"✅ Found Add Media button with selector: {selector}")
                         break
@@ -1044,12 +1067,12 @@ class PlaywrightFanvueBot:
             
             # Click Add Media button
             try:
-                add_button.click()
+                await add_button.click()
                 logger.info("✅ Clicked Add Media button")
             except Exception as e:
                 logger.warning(f"⚠️ Regular click failed: {e}")
                 try:
-                    add_button.click(force=True)
+                    await add_button.click(force=True)
                     logger.info("✅ Clicked Add Media button (force)")
                 except Exception as force_e:
                     logger.error(f"❌ All click methods failed: {force_e}")
@@ -1058,27 +1081,27 @@ class PlaywrightFanvueBot:
             # Wait for loading to complete
             try:
                 # Wait for any loading indicators to disappear
-                self.page.wait_for_selector('[class*="loading"], [class*="spinner"]', state='hidden', timeout=10000)
+                await self.page.wait_for_selector('[class*="loading"], [class*="spinner"]', state='hidden', timeout=10000)
                 logger.info("✅ Loading completed")
             except:
                 logger.info("ℹ️ No loading indicator found or already completed")
             
-            time.sleep(CONFIG['buttonDelay'])
+            await asyncio.sleep(CONFIG['buttonDelay'])
             return True
             
         except Exception as e:
             logger.error(f"❌ Failed to add media: {e}")
             return False
     
-    def submit_post(self):
+    async def submit_post(self):
         """Submit the post"""
         try:
             logger.info("🚀 Submitting post...")
-            time.sleep(5)
+            await asyncio.sleep(5)
             
             # Wait for the page to fully load after adding media
             logger.info("⏳ Waiting for page to load after adding media...")
-            time.sleep(3)
+            await asyncio.sleep(3)
             
             # Look for Create post button with Playwright - try multiple approaches
             create_selectors = [
@@ -1097,13 +1120,13 @@ class PlaywrightFanvueBot:
             for selector in create_selectors:
                 try:
                     # Try to find the button
-                    buttons = self.page.query_selector_all(selector)
+                    buttons = await self.page.query_selector_all(selector)
                     logger.info(f"🔍 Found {len(buttons)} buttons with selector: {selector}")
                     
                     # Check each button to see if it's the right one
                     for i, button in enumerate(buttons):
                         try:
-                            button_text = button.evaluate("el => el.textContent || el.innerText || ''")
+                            button_text = await button.evaluate("el => el.textContent || el.innerText || ''")
                             logger.info(f"🔍 Button {i+1} text: '{button_text.strip()}'")
                             
                             # Check if this button contains "Create post" or similar
@@ -1123,11 +1146,11 @@ class PlaywrightFanvueBot:
                 logger.error("❌ Could not find Create post button")
                 # Debug: Let's see what buttons are available
                 try:
-                    all_buttons = self.page.query_selector_all('button')
+                    all_buttons = await self.page.query_selector_all('button')
                     logger.info(f"🔍 Debug: Found {len(all_buttons)} total buttons on page")
                     for i, btn in enumerate(all_buttons[:5]):  # Show first 5 buttons
                         try:
-                            btn_text = btn.evaluate("el => el.textContent || el.innerText || ''")
+                            btn_text = await btn.evaluate("el => el.textContent || el.innerText || ''")
                             logger.info(f"🔍 Debug button {i+1}: '{btn_text.strip()}'")
                         except:
                             logger.info(f"🔍 Debug button {i+1}: [error getting text]")
@@ -1137,11 +1160,11 @@ class PlaywrightFanvueBot:
             
             # Click Create post
             try:
-                create_button.scroll_into_view_if_needed()
-                time.sleep(1)
-                create_button.click()
+                await create_button.scroll_into_view_if_needed()
+                await asyncio.sleep(1)
+                await create_button.click()
                 logger.info("✅ Clicked Create post button")
-                time.sleep(10)
+                await asyncio.sleep(10)
                 
                 # Verify post was published by checking for success indicators
                 success_indicators = [
@@ -1155,7 +1178,7 @@ class PlaywrightFanvueBot:
                 post_published = False
                 for indicator in success_indicators:
                     try:
-                        success_element = self.page.wait_for_selector(indicator, timeout=3000)
+                        success_element = await self.page.wait_for_selector(indicator, timeout=3000)
                         if success_element:
                             logger.info(f"✅ Post published successfully! Found indicator: {indicator}")
                             post_published = True
@@ -1217,43 +1240,31 @@ class PlaywrightFanvueBot:
         except Exception as e:
             logger.error(f"❌ Failed to move caption: {e}")
     
-    def run(self):
+    async def run(self):
         """Main run method with scheduled posting times"""
         try:
             logger.info("🤖 Starting Playwright Fanvue Bot with scheduled posting...")
             logger.info(f"⏰ Scheduled times: {', '.join(CONFIG['scheduled_times'])}")
             
+            actual_post_number = self.plan_post()
+            if actual_post_number is None:
+                return True
+            
             # Initialize driver
-            if not self.init_driver():
+            if not await self.init_driver():
                 return False
             
             # Load cookies and check login
-            if not self.load_cookies():
+            if not await self.load_cookies():
                 return False
             
-            if not self.check_login():
+            if not await self.check_login():
                 return False
             
-            # Get posts made today
-            posts_today = self.get_posts_made_today()
-            logger.info(f"📊 Posts already made today: {posts_today}")
-            
-            # Check if we've reached the maximum posts for today
-            if posts_today >= CONFIG['maxPosts']:
-                logger.info(f"✅ Already made {posts_today} posts today (max: {CONFIG['maxPosts']}). Exiting.")
-                return True
-            
-            # Check if it's time to post
-            if not self.should_post_now():
-                next_time = self.get_next_scheduled_time()
-                logger.info(f"⏰ Not time to post yet. Next scheduled time: {next_time}")
-                return True
-            
             # Create exactly 1 post per session
-            actual_post_number = posts_today + 1
             logger.info(f"📝 Creating post #{actual_post_number} (scheduled time reached)")
             
-            if self.create_post(actual_post_number):
+            if await self.create_post(actual_post_number):
                 logger.info(f"✅ Post #{actual_post_number} created successfully!")
             else:
                 logger.error(f"❌ Failed to create post #{actual_post_number}")
@@ -1266,13 +1277,21 @@ class PlaywrightFanvueBot:
             logger.error(f"❌ Bot failed: {e}")
             return False
         finally:
+            await self.close_driver()
+
+    async def close_driver(self):
+        """Close the browser and stop Playwright, if they were started"""
+        try:
             if self.browser:
-                self.browser.close()
+                await self.browser.close()
+                self.browser = None
+        finally:
             if self.playwright:
-                self.playwright.stop()
+                await self.playwright.stop()
+                self.playwright = None
                 logger.info("🔒 Browser closed")
 
-def main():
+async def main():
     """Main function - PRODUCTION"""
     bot = None
     try:
@@ -1286,34 +1305,27 @@ def main():
             logger.error("❌ Cannot acquire lock - another instance is running")
             return False
         
-        # Production mode: check posts made today first
-        posts_today = bot.get_posts_made_today()
-        logger.info(f"📊 Posts made today: {posts_today}")
-        
-        if posts_today >= CONFIG['maxPosts']:
-            logger.info(f"✅ Already made {posts_today} posts today (max: {CONFIG['maxPosts']}). Exiting.")
+        # Production mode: runs are started at the posting times, so only
+        # check posts made today before launching a browser
+        post_number = bot.plan_post(check_schedule=False)
+        if post_number is None:
             return True
         
         # Initialize driver and login
         logger.info("🔧 Initializing driver and logging in...")
-        if not bot.init_driver():
+        if not await bot.init_driver():
             return False
         
-        if not bot.load_cookies():
+        if not await bot.load_cookies():
             return False
         
-        if not bot.check_login():
+        if not await bot.check_login():
             return False
         
         # Create exactly 1 post per session
-        if posts_today >= CONFIG['maxPosts']:
-            logger.info(f"✅ Already made {posts_today} posts today (max: {CONFIG['maxPosts']}). Exiting.")
-            return True
-        
-        post_number = posts_today + 1
         logger.info(f"📝 Will create exactly 1 post (#{post_number})")
         
-        success = bot.create_post(post_number)
+        success = await bot.create_post(post_number)
         if not success:
             logger.error(f"❌ Failed to create post #{post_number}")
             return False
@@ -1327,9 +1339,12 @@ def main():
         logger.error(f"❌ Main execution failed: {e}")
         return False
     finally:
-        # Always release the lock
+        # Always close the browser and release the lock
         if bot:
-            bot.release_lock()
+            try:
+                await bot.close_driver()
+            finally:
+                bot.release_lock()
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    asyncio.run(main()) 
\ No newline at end of file
@@ -5,8 +5,10 @@ Fanvue Posting Bot - Standardized Template
 - Tracks daily progress (1-10 posts per day)
 - Creates exactly 1 post per execution
 - Copy this template for new clients
+- Async Playwright, so it can share an event loop with other bots
 """
 
+import asyncio
 import os
 import json
 import time
@@ -15,7 +17,6 @@ import pandas as pd
 import fcntl
 import psutil
 from datetime import datetime
-from playwright.sync_api import sync_playwright
 import logging
 from pathlib import Path
 
@@ -134,13 +135,15 @@ class FanvuePostingBot:
         except Exception as e:
             logger.error(f"❌ Failed to update daily progress: {e}")
     
-    def init_driver(self):
+    async def init_driver(self):
         """Initialize Playwright browser"""
         try:
             logger.info("🚀 Initializing Playwright browser...")
             
-            self.playwright = sync_playwright().start()
-            self.browser = self.playwright.chromium.launch(
+            # Imported here so runs that have nothing to post never load Playwright
+            from playwright.async_api import async_playwright
+            self.playwright = await async_playwright().start()
+            self.browser = await self.playwright.chromium.launch(
                 headless=CONFIG['headless'],
                 args=[
                     "--no-sandbox",
@@ -151,8 +154,8 @@ class FanvuePostingBot:
                 ]
             )
             
-            self.page = self.browser.new_page()
-            self.page.set_viewport_size({"width": 1280, "height": 720})
+            self.page = await self.browser.new_page()
+            await self.page.set_viewport_size({"width": 1280, "height": 720})
             
             logger.info("✅ Playwright browser initialized successfully")
             return True
@@ -161,7 +164,7 @@ class FanvuePostingBot:
             logger.error(f"❌ Failed to initialize Playwright: {e}")
             return False
     
-    def load_cookies(self):
+    async def load_cookies(self):
         """Load cookies from file with format fixing"""
         try:
             if not os.path.exists(CONFIG['cookiesFile']):
@@ -174,8 +177,8 @@ class FanvuePostingBot:
             logger.info(f"📄 Found {len(cookies)} cookies")
             
             # Navigate to domain first
-            self.page.goto(CONFIG['baseUrl'])
-            time.sleep(2)
+            await self.page.goto(CONFIG['baseUrl'])
+            await asyncio.sleep(2)
             
             # Add cookies with format fixing
             formatted_cookies = []
@@ -201,7 +204,7 @@ class FanvuePostingBot:
                 formatted_cookies.append(formatted_cookie)
             
             try:
-                self.page.context.add_cookies(formatted_cookies)
+                await self.page.context.add_cookies(formatted_cookies)
                 logger.info("✅ Cookies loaded successfully")
                 return True
             except Exception as e:
@@ -212,11 +215,11 @@ class FanvuePostingBot:
             logger.error(f"❌ Failed to load cookies: {e}")
             return False
     
-    def check_login(self):
+    async def check_login(self):
         """Check if logged in"""
         try:
-            self.page.goto(CONFIG['baseUrl'])
-            time.sleep(3)
+            await self.page.goto(CONFIG['baseUrl'])
+            await asyncio.sleep(3)
             
             current_url = self.page.url
             if '/signin' not in current_url and '/login' not in current_url:
@@ -279,10 +282,10 @@ class FanvuePostingBot:
         except Exception as e:
             logger.error(f"❌ Failed to save used media: {e}")
     
-    def get_media_filename(self, media_item):
+    async def get_media_filename(self, media_item):
         """Extract filename from media item"""
         try:
-            filename = media_item.evaluate("""
+            filename = await media_item.evaluate("""
                 el => {
                     const container = el.closest('div[class*="MuiBox-root"]');
                     if (container) {
@@ -300,33 +303,33 @@ class FanvuePostingBot:
         except Exception as e:
             return f"unknown_{random.randint(1000, 9999)}"
     
-    def create_post(self, post_number):
+    async def create_post(self, post_number):
         """Create a single post"""
         try:
             logger.info(f"📝 Creating post #{post_number}/10...")
             
             # Navigate to create page
-            self.page.goto(CONFIG['createUrl'])
-            time.sleep(CONFIG['buttonDelay'])
+            await self.page.goto(CONFIG['createUrl'])
+            await asyncio.sleep(CONFIG['buttonDelay'])
             
             # Get and add caption
             caption = self.get_random_caption()
-            if not self.add_caption(caption):
+            if not await self.add_caption(caption):
                 logger.error("❌ Failed to add caption")
                 return False
             
             # Select audience (alternating)
-            if not self.select_audience(post_number):
+            if not await self.select_audience(post_number):
                 logger.error("❌ Failed to select audience")
                 return False
             
             # Select media with recycling
-            if not self.select_media_with_recycling():
+            if not await self.select_media_with_recycling():
                 logger.error("❌ Failed to select media")
                 return False
             
             # Submit post
-            if not self.submit_post():
+            if not await self.submit_post():
                 logger.error("❌ Failed to submit post")
                 return False
             
@@ -343,20 +346,20 @@ class FanvuePostingBot:
             logger.error(f"❌ Failed to create post: {e}")
             return False
     
-    def add_caption(self, caption):
+    async def add_caption(self, caption):
         """Add caption to post"""
         try:
-            caption_field = self.page.wait_for_selector('textarea[placeholder*="caption"]', timeout=10000)
+            caption_field = await self.page.wait_for_selector('textarea[placeholder*="caption"]', timeout=10000)
             if not caption_field:
                 logger.error("❌ Could not find caption field")
                 return False
             
-            caption_field.click()
-            time.sleep(1)
-            caption_field.fill("")
-            time.sleep(1)
-            caption_field.type(str(caption), delay=50)
-            time.sleep(2)
+            await caption_field.click()
+            await asyncio.sleep(1)
+            await caption_field.fill("")
+            await asyncio.sleep(1)
+            await caption_field.type(str(caption), delay=50)
+            await asyncio.sleep(2)
             
             logger.info(f"✅ Caption added: {str(caption)[:50]}...")
             return True
@@ -365,7 +368,7 @@ class FanvuePostingBot:
             logger.error(f"❌ Failed to add caption: {e}")
             return False
     
-    def select_audience(self, post_number):
+    async def select_audience(self, post_number):
         """Select audience - alternating between subscribers only and followers & subscribers"""
         try:
             # Odd posts = Followers and Subscribers, Even posts = Subscribers Only
@@ -380,16 +383,16 @@ class FanvuePostingBot:
             
             # Select Followers and Subscribers
             try:
-                dropdown = self.page.wait_for_selector('div[role="combobox"][aria-haspopup="listbox"]', timeout=5000)
+                dropdown = await self.page.wait_for_selector('div[role="combobox"][aria-haspopup="listbox"]', timeout=5000)
                 if dropdown:
-                    dropdown.click()
-                    time.sleep(2)
+                    await dropdown.click()
+                    await asyncio.sleep(2)
                     
-                    option = self.page.wait_for_selector('li[role="option"][data-value="1"]', timeout=3000)
+                    option = await self.page.wait_for_selector('li[role="option"][data-value="1"]', timeout=3000)
                     if option:
-                        option.click()
+                        await option.click()
                         logger.info("✅ Selected 'Followers and subscribers'")
-                        time.sleep(2)
+                        await asyncio.sleep(2)
             except:
                 logger.warning("⚠️ Could not change audience, using default")
             
@@ -399,42 +402,42 @@ class FanvuePostingBot:
             logger.error(f"❌ Failed to select audience: {e}")
             return True
     
-    def select_media_with_recycling(self):
+    async def select_media_with_recycling(self):
         """Select media with automatic recycling when all used"""
         try:
             logger.info("📁 Opening media vault...")
             
             # Open vault
-            vault_button = self.page.wait_for_selector('button[aria-label*="vault"], button[aria-label*="Vault"]', timeout=10000)
+            vault_button = await self.page.wait_for_selector('button[aria-label*="vault"], button[aria-label*="Vault"]', timeout=10000)
             if not vault_button:
                 logger.error("❌ Could not find vault button")
                 return False
             
-            vault_button.click()
-            time.sleep(CONFIG['buttonDelay'])
+            await vault_button.click()
+            await asyncio.sleep(CONFIG['buttonDelay'])
             
             # Wait for vault to open
-            self.page.wait_for_selector('.MuiDrawer-root, [role="dialog"]', timeout=10000)
+            await self.page.wait_for_selector('.MuiDrawer-root, [role="dialog"]', timeout=10000)
             
             # Open filter menu
-            filter_button = self.page.wait_for_selector('div[role="combobox"][aria-label="folders"]', timeout=5000)
+            filter_button = await self.page.wait_for_selector('div[role="combobox"][aria-label="folders"]', timeout=5000)
             if filter_button:
-                filter_button.click()
-                time.sleep(CONFIG['filterDelay'])
+                await filter_button.click()
+                await asyncio.sleep(CONFIG['filterDelay'])
                 
                 # Select filter
-                filter_option = self.page.wait_for_selector(f'li:has-text("{CONFIG["defaultFilter"]}")', timeout=5000)
+                filter_option = await self.page.wait_for_selector(f'li:has-text("{CONFIG["defaultFilter"]}")', timeout=5000)
                 if filter_option:
-                    filter_option.click()
+                    await filter_option.click()
                     logger.info(f"✅ Selected filter: {CONFIG['defaultFilter']}")
-                    time.sleep(CONFIG['filterDelay'])
+                    await asyncio.sleep(CONFIG['filterDelay'])
             
             # Load used media
             used_media = self.load_used_media()
             logger.info(f"📋 Avoiding {len(used_media)} previously used media files")
             
             # Get all media items
-            media_items = self.page.query_selector_all('button[aria-label="Select media"]')
+            media_items = await self.page.query_selector_all('button[aria-label="Select media"]')
             if not media_items:
                 logger.error("❌ No media items found")
                 return False
@@ -446,18 +449,18 @@ class FanvuePostingBot:
             for attempt in range(max_attempts):
                 random_index = random.randint(0, len(media_items) - 1)
                 selected_item = media_items[random_index]
-                filename = self.get_media_filename(selected_item)
+                filename = await self.get_media_filename(selected_item)
                 
                 if filename not in used_media:
                     # Found unused media
                     logger.info(f"✅ Selecting unused media: {filename}")
-                    selected_item.click()
+                    await selected_item.click()
                     
                     # Add to used list
                     used_media.add(filename)
                     self.save_used_media(used_media)
                     
-                    time.sleep(CONFIG['buttonDelay'])
+                    await asyncio.sleep(CONFIG['buttonDelay'])
                     break
             else:
                 # All media used - auto-clear and select any
@@ -468,22 +471,22 @@ class FanvuePostingBot:
                 # Select any random media
                 random_index = random.randint(0, len(media_items) - 1)
                 selected_item = media_items[random_index]
-                filename = self.get_media_filename(selected_item)
+                filename = await self.get_media_filename(selected_item)
                 
                 logger.info(f"🔄 Selecting recycled media: {filename}")
-                selected_item.click()
+                await selected_item.click()
                 
                 # Add to fresh used list
                 used_media.add(filename)
                 self.save_used_media(used_media)
-                time.sleep(CONFIG['buttonDelay'])
+                await asyncio.sleep(CONFIG['buttonDelay'])
             
             # Add media to post
-            add_button = self.page.wait_for_selector('.MuiDialogActions-root button, button:has-text("Add")', timeout=10000)
+            add_button = await self.page.wait_for_selector('.MuiDialogActions-root button, button:has-text("Add")', timeout=10000)
             if add_button:
-                add_button.click()
+                await add_button.click()
                 logger.info("✅ Added media to post")
-                time.sleep(CONFIG['buttonDelay'])
+                await asyncio.sleep(CONFIG['buttonDelay'])
                 return True
             else:
                 logger.error("❌ Could not find Add Media button")
@@ -493,21 +496,21 @@ class FanvuePostingBot:
             logger.error(f"❌ Failed to select media: {e}")
             return False
     
-    def submit_post(self):
+    async def submit_post(self):
         """Submit the post"""
         try:
             logger.info("🚀 Submitting post...")
-            time.sleep(5)
+            await asyncio.sleep(5)
             
             # Look for Create post button
-            create_button = self.page.wait_for_selector('button:has-text("Create post"), button[type="submit"]', timeout=10000)
+            create_button = await self.page.wait_for_selector('button:has-text("Create post"), button[type="submit"]', timeout=10000)
             if not create_button:
                 logger.error("❌ Could not find Create post button")
                 return False
             
-            create_button.click()
+            await create_button.click()
             logger.info("✅ Clicked Create post button")
-            time.sleep(10)
+            await asyncio.sleep(10)
             
             # Check for success (redirect or success message)
             current_url = self.page.url
@@ -547,7 +550,7 @@ class FanvuePostingBot:
         except Exception as e:
             logger.error(f"❌ Failed to move caption: {e}")
     
-    def run(self):
+    async def run(self):
         """Main execution - create exactly 1 post and exit"""
         try:
             logger.info("🤖 Starting Fanvue Posting Bot (Crontab Mode)")
@@ -565,17 +568,17 @@ class FanvuePostingBot:
             logger.info(f"🎯 Creating post #{next_post} this session")
             
             # Initialize browser and login
-            if not self.init_driver():
+            if not await self.init_driver():
                 return False
             
-            if not self.load_cookies():
+            if not await self.load_cookies():
                 return False
             
-            if not self.check_login():
+            if not await self.check_login():
                 return False
             
             # Create the next post
-            success = self.create_post(next_post)
+            success = await self.create_post(next_post)
             
             if success:
                 logger.info(f"🎉 Post #{next_post}/10 completed successfully!")
@@ -591,17 +594,17 @@ class FanvuePostingBot:
         finally:
             # Always cleanup
             if self.browser:
-                self.browser.close()
+                await self.browser.close()
             if self.playwright:
-                self.playwright.stop()
+                await self.playwright.stop()
             logger.info("🔒 Browser closed, script exiting")
 
-def main():
+async def main():
     """Main entry point for crontab execution"""
     try:
         with BotLock():
             bot = FanvuePostingBot()
-            success = bot.run()
+            success = await bot.run()
             exit_code = 0 if success else 1
             logger.info(f"🏁 Script exiting with code {exit_code}")
             return exit_code
@@ -614,4 +617,4 @@ def main():
         return 1
 
 if __name__ == "__main__":
-    exit(main())
+    exit(asyncio.run(main()))
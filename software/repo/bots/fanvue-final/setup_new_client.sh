@@ -56,6 +56,8 @@ mkdir -p "$CLIENT_DIR"
 # Copy mass DM bot template
 print_status "Setting up mass DM bot..."
 cp -r "mass dm bot" "$CLIENT_DIR/massdm"
+# Shared run checkpoint helpers (bots/common), imported next to the bot
+cp ../common/run_checkpoint.py "$CLIENT_DIR/massdm/"
 
 # Copy posting bot template
 print_status "Setting up posting bot..."
@@ -89,6 +89,8 @@ sudo chown $USER:$USER /var/log/fanvue
 # Copy bot files to VPS directory
 print_status "Copying bot files..."
 cp -r "$SCRIPT_DIR"/* "$VPS_BOT_DIR/"
+# Shared run checkpoint helpers (bots/common), imported next to the bot
+cp "$SCRIPT_DIR/../common/run_checkpoint.py" "$VPS_BOT_DIR/mass dm bot/"
 
 # Set up Python virtual environment
 print_status "Setting up Python virtual environment..."
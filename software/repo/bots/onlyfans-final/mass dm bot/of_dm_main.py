@@ -7,6 +7,7 @@ OnlyFans Mass DM Bot (Python + Playwright, async)
 - Audiences: Fans, Recent (period), Muted, Following (+ Exclude tab)
 - Message composer: caption (Excel/JSON/static), add media from Vault (+folder search), price, send
 - Optional close browser between campaigns
+- Optional concurrent models (max_parallel_models), one lane per browser_data_dir
 - Annotated selectors with '# [BTN]/[FIELD]/[STEP]' comments for quick updates
 """
 
@@ -690,6 +691,43 @@ async def run_model(model_cfg: Dict[str, Any], root_cfg: Dict[str, Any]):
     finally:
         await close_browser(pw, browser)
 
+def model_lanes(models: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+    """Group models by browser_data_dir, keeping their order.
+
+    Chromium locks a persistent profile, so models sharing a directory must
+    run one after another; separate directories can run side by side."""
+    lanes: Dict[str, List[Dict[str, Any]]] = {}
+    for model in models:
+        data_dir = str(Path(model.get("browser_data_dir", "./browser_data")).resolve())
+        lanes.setdefault(data_dir, []).append(model)
+    return list(lanes.values())
+
+async def run_models_concurrently(models: List[Dict[str, Any]], cfg: Dict[str, Any], max_parallel: int):
+    """Run up to max_parallel models at once; each keeps its own campaign pacing.
+
+    A failing model doesn't stop the others; the first error is raised once all are done."""
+    semaphore = asyncio.Semaphore(max_parallel)
+    order = {id(m): i for i, m in enumerate(models, 1)}
+    errors: List[BaseException] = []
+
+    async def run_lane(lane: List[Dict[str, Any]]):
+        for model in lane:
+            name = model.get("name", "Unnamed")
+            async with semaphore:
+                log(f"🤖 Starting model {order[id(model)]}/{len(models)}: {name}")
+                try:
+                    await run_model(model, cfg)
+                except Exception as e:
+                    # The next model in this lane still runs
+                    log(f"❌ Model {name} failed: {e}")
+                    errors.append(e)
+                    continue
+                log(f"✅ Finished model {name}")
+
+    await asyncio.gather(*(run_lane(lane) for lane in model_lanes(models)))
+    if errors:
+        raise errors[0]
+
 async def main():
     print("🚀 OnlyFans Mass DM Bot v1.0")
     print("=" * 50)
@@ -709,6 +747,7 @@ async def main():
     cfg.setdefault("retries", {"clicks": 3})
     cfg.setdefault("pace", {"between_min_s": 5, "between_max_s": 10})
     cfg.setdefault("reopen_between_campaigns", False)
+    cfg.setdefault("max_parallel_models", 1)
 
     # Show configuration summary
     models: List[Dict[str, Any]] = cfg.get("models", [])
@@ -718,6 +757,7 @@ async def main():
     log(f"🎯 Mode: {'TEST' if cfg.get('test_mode') else 'PRODUCTION'}")
     log(f"👁️ Browser: {'Hidden' if cfg.get('headless') else 'Visible'}")
     log(f"🔄 Reopen between campaigns: {cfg.get('reopen_between_campaigns')}")
+    log(f"🧵 Parallel models: {cfg.get('max_parallel_models')}")
     
     if cfg.get("test_mode"):
         log("🧪 TEST MODE: Messages will be composed but not sent")
@@ -731,10 +771,14 @@ async def main():
         random.shuffle(models)
         log("🔀 Shuffled model order")
 
+    max_parallel = max(int(cfg.get("max_parallel_models") or 1), 1)
     try:
-        for i, model in enumerate(models, 1):
-            log(f"🤖 Starting model {i}/{len(models)}: {model.get('name', 'Unnamed')}")
-            await run_model(model, cfg)
+        if max_parallel > 1:
+            await run_models_concurrently(models, cfg, max_parallel)
+        else:
+            for i, model in enumerate(models, 1):
+                log(f"🤖 Starting model {i}/{len(models)}: {model.get('name', 'Unnamed')}")
+                await run_model(model, cfg)
             
         log("🎉 All campaigns completed successfully!")
         
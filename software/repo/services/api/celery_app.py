@@ -1,18 +1,15 @@
 from celery import Celery
 import os
 
-# Create Celery app
+import celery_config
+
+# Create Celery app. The API only publishes: run state is read from Postgres,
+# so there is no result backend (which would also subscribe to a result
+# channel for every task sent).
 app = Celery(
     "api",
     broker=os.getenv("REDIS_URL", "redis://redis:6379/0"),
-    backend=os.getenv("REDIS_URL", "redis://redis:6379/0")
 )
 
-# Configure Celery
-app.conf.update(
-    task_serializer="json",
-    accept_content=["json"],
-    result_serializer="json",
-    timezone="UTC",
-    enable_utc=True,
-)
+celery_config.configure(app, celery_config.PUBLISHER_QUEUES)
+app.conf.task_ignore_result = True
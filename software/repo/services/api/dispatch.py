@@ -0,0 +1,54 @@
+import os
+import random
+from typing import Dict, Optional
+
+import redis
+
+import routing
+from celery_app import app
+from routing import queue_for, priority_for
+
+rds = redis.Redis.from_url(os.getenv("REDIS_URL", "redis://redis:6379/0"))
+
+def image_readiness(image_ref: str) -> Dict[str, dict]:
+    """Per-host readiness for an image as reported by workers"""
+    return routing.image_readiness(rds, image_ref)
+
+def pick_queue(image_ref: str, bot_key: Optional[str] = None) -> str:
+    """Prefer a host that already has the image, otherwise the shared queue"""
+    queue = queue_for(bot_key)
+    try:
+        hosts = routing.ready_hosts(rds, image_ref, queue)
+    except redis.RedisError:
+        hosts = []
+    if hosts:
+        return f"{queue}@{random.choice(hosts)}"
+    return queue
+
+def enqueue_run(image_ref: str, run_id: str, config: dict, bot_key: Optional[str] = None,
+                scheduled: bool = False, queue: Optional[str] = None,
+                max_run_seconds: Optional[int] = None, runner: str = "docker",
+                entrypoint: Optional[str] = None, max_retries: int = 0):
+    # task_id is the run id so a queued run can be revoked on cancel
+    app.send_task(
+        "tasks.run_bot",
+        args=[image_ref, run_id, config],
+        kwargs={
+            "max_run_seconds": max_run_seconds, "runner": runner, "entrypoint": entrypoint,
+            "max_retries": max_retries,
+        },
+        task_id=run_id,
+        queue=queue or pick_queue(image_ref, bot_key),
+        priority=priority_for(bot_key, scheduled),
+    )
+
+CANCEL_TTL_SEC = 24 * 3600
+
+def cancel_run(run_id: str):
+    """Flag the run for the worker supervising it and drop it if still queued"""
+    rds.set(f"run:cancel:{run_id}", 1, ex=CANCEL_TTL_SEC)
+    app.control.revoke(run_id)
+
+def broadcast_prepull(image_ref: str):
+    """Ask every worker to pull an image ahead of its first run"""
+    app.send_task("tasks.prepull_image", args=[image_ref])
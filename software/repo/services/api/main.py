@@ -3,7 +3,7 @@ from pydantic import BaseModel
 import os
 import datetime
 
-from routers import configs, schedules, runs
+from routers import bots, configs, schedules, runs
 
 app = FastAPI(title="Control Plane API")
 
@@ -17,6 +17,7 @@ def healthz():
     return Health(status="ok", time=datetime.datetime.utcnow().isoformat()+"Z")
 
 # Include routers
+app.include_router(bots.router)
 app.include_router(configs.router)
 app.include_router(schedules.router)
 app.include_router(runs.router)
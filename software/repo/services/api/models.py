@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Boolean, Integer, ForeignKey, Text, JSON
+from sqlalchemy import Column, String, DateTime, Boolean, Integer, Float, ForeignKey, Text, JSON, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from db import Base
@@ -44,6 +44,10 @@ class Bot(Base):
     key = Column(String(100), nullable=False, unique=True)
     name = Column(String(255), nullable=False)
     current_version = Column(String(36), ForeignKey("bot_versions.id"), nullable=True)
+    max_run_seconds = Column(Integer, nullable=True)
+    # Crash retries for failed runs. Only bots that resume from CHECKPOINT_URL
+    # should set this; a retried bot without a checkpoint redoes its side effects.
+    max_retries = Column(Integer, nullable=False, default=0)
 
 class BotVersion(Base):
     __tablename__ = "bot_versions"
@@ -52,6 +56,10 @@ class BotVersion(Base):
     bot_id = Column(String(36), ForeignKey("bots.id"), nullable=False)
     image_ref = Column(String(255), nullable=False)
     changelog = Column(Text, nullable=True)
+    # "docker" runs image_ref; "native" runs entrypoint in the worker's
+    # pre-forked Python pool (single-host deployments)
+    runner = Column(String(20), nullable=False, default="docker")
+    entrypoint = Column(String(500), nullable=True)
 
 class OrgBotEnable(Base):
     __tablename__ = "org_bot_enables"
@@ -83,7 +91,25 @@ class Schedule(Base):
     timezone = Column(String(50), nullable=False, default="UTC")
     phase_json = Column(JSON, nullable=True)
     is_active = Column(Boolean, default=True)
+    # Planned fire time: target_fire_at plus this occurrence's jitter
     next_fire_at = Column(DateTime(timezone=True), nullable=False)
+    # Cron time the next fire belongs to
+    target_fire_at = Column(DateTime(timezone=True), nullable=True)
+    # Fires land anywhere within spread_sec after the cron time, placed by the
+    # scheduler to avoid everyone launching on the same second
+    spread_sec = Column(Integer, nullable=False, default=0)
+    # What to do with fires missed while the scheduler was down or behind:
+    # "skip", "fire_once" (coalesce into one run) or "fire_all" (one run per
+    # fire within misfire_window_sec). Fires late by at most
+    # misfire_grace_sec count as on time.
+    misfire_policy = Column(String(20), nullable=False, default="fire_once")
+    misfire_grace_sec = Column(Integer, nullable=False, default=300)
+    misfire_window_sec = Column(Integer, nullable=False, default=3600)
+
+    __table_args__ = (
+        # The scheduler's due-schedule claim and slot occupancy scans
+        Index("ix_schedules_active_next_fire_at", "next_fire_at", postgresql_where=is_active),
+    )
 
 class Run(Base):
     __tablename__ = "runs"
@@ -95,6 +121,13 @@ class Run(Base):
     schedule_id = Column(String(36), ForeignKey("schedules.id"), nullable=True)
     status = Column(String(50), nullable=False, default="queued")
     queued_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Scheduled runs wait as "pending" until a worker has room, and expire
+    # if they can't start before this
+    deadline_at = Column(DateTime(timezone=True), nullable=True)
+    # Planned fire time of a scheduled run, and how long after it the run
+    # was sent to a worker
+    scheduled_for = Column(DateTime(timezone=True), nullable=True)
+    fire_lag_sec = Column(Float, nullable=True)
     started_at = Column(DateTime(timezone=True), nullable=True)
     finished_at = Column(DateTime(timezone=True), nullable=True)
     worker_host = Column(String(255), nullable=True)
@@ -115,6 +148,14 @@ class RunEvent(Base):
     message = Column(Text, nullable=False)
     data_json = Column(JSON, nullable=True)
 
+class RunCheckpoint(Base):
+    __tablename__ = "run_checkpoints"
+    
+    run_id = Column(String(36), ForeignKey("runs.id"), primary_key=True)
+    step = Column(String(255), nullable=True)
+    data_json = Column(JSON, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
 class Cookie(Base):
     __tablename__ = "cookies"
     
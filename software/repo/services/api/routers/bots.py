@@ -0,0 +1,63 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+import uuid
+
+from db import get_db
+from models import Bot, BotVersion
+from schemas import BotVersionCreate, BotVersionRead, ImageReadiness
+import dispatch
+
+router = APIRouter(prefix="/v1/bots", tags=["bots"])
+
+def _publish(db: Session, bot: Bot, version: BotVersion):
+    bot.current_version = version.id
+    db.commit()
+    if version.runner != "docker":
+        return
+    # Warm every worker before the first scheduled run needs the image
+    try:
+        dispatch.broadcast_prepull(version.image_ref)
+    except Exception as e:
+        print(f"[bots] Failed to broadcast pre-pull for {version.image_ref}: {e}")
+
+@router.post("/{bot_id}/versions", response_model=BotVersionRead)
+def create_version(bot_id: str, version: BotVersionCreate, db: Session = Depends(get_db)):
+    bot = db.query(Bot).filter(Bot.id == bot_id).first()
+    if not bot:
+        raise HTTPException(status_code=404, detail="Bot not found")
+    if version.runner == "native" and not version.entrypoint:
+        raise HTTPException(status_code=400, detail="Native bot versions need an entrypoint")
+
+    db_version = BotVersion(
+        id=str(uuid.uuid4()),
+        bot_id=bot_id,
+        image_ref=version.image_ref,
+        changelog=version.changelog,
+        runner=version.runner,
+        entrypoint=version.entrypoint
+    )
+    db.add(db_version)
+    db.commit()
+    db.refresh(db_version)
+
+    if version.publish:
+        _publish(db, bot, db_version)
+    return db_version
+
+@router.post("/{bot_id}/versions/{version_id}/publish", response_model=BotVersionRead)
+def publish_version(bot_id: str, version_id: str, db: Session = Depends(get_db)):
+    bot = db.query(Bot).filter(Bot.id == bot_id).first()
+    version = db.query(BotVersion).filter(BotVersion.id == version_id, BotVersion.bot_id == bot_id).first()
+    if not bot or not version:
+        raise HTTPException(status_code=404, detail="Bot version not found")
+
+    _publish(db, bot, version)
+    return version
+
+@router.get("/{bot_id}/versions/{version_id}/readiness", response_model=ImageReadiness)
+def get_version_readiness(bot_id: str, version_id: str, db: Session = Depends(get_db)):
+    version = db.query(BotVersion).filter(BotVersion.id == version_id, BotVersion.bot_id == bot_id).first()
+    if not version:
+        raise HTTPException(status_code=404, detail="Bot version not found")
+
+    return ImageReadiness(image_ref=version.image_ref, hosts=dispatch.image_readiness(version.image_ref))
@@ -7,8 +7,11 @@ import requests
 import os
 
 from db import get_db
-from models import Run, RunEvent
-from schemas import RunCreate, RunRead, RunEventRead, DevRunRequest, DevRunResponse
+from models import Bot, BotVersion, Run, RunEvent, RunCheckpoint
+from schemas import (
+    RunCreate, RunRead, RunEventRead, DevRunRequest, DevRunResponse,
+    RunCheckpointWrite, RunCheckpointRead,
+)
 
 router = APIRouter(prefix="/v1/runs", tags=["runs"])
 
@@ -38,6 +41,29 @@ def get_run(run_id: str, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Run not found")
     return run
 
+FINISHED_STATUSES = {"succeeded", "failed", "cancelled", "timed_out", "expired"}
+
+@router.post("/{run_id}/cancel", response_model=RunRead)
+def cancel_run(run_id: str, db: Session = Depends(get_db)):
+    run = db.query(Run).filter(Run.id == run_id, Run.org_id == DEV_ORG_ID).first()
+    if not run:
+        raise HTTPException(status_code=404, detail="Run not found")
+    if run.status in FINISHED_STATUSES:
+        raise HTTPException(status_code=409, detail=f"Run already {run.status}")
+
+    import dispatch
+    dispatch.cancel_run(run_id)
+
+    # A pending or queued run never reaches a worker; a running one is stopped by its worker
+    if run.status in ("pending", "queued"):
+        run.status = "cancelled"
+        run.finished_at = datetime.utcnow()
+    else:
+        run.status = "cancelling"
+    db.commit()
+    db.refresh(run)
+    return run
+
 @router.get("/{run_id}/events", response_model=List[RunEventRead])
 def get_run_events(run_id: str, db: Session = Depends(get_db)):
     # Verify run exists and belongs to dev org
@@ -68,6 +94,40 @@ def create_run_event(run_id: str, event: dict, db: Session = Depends(get_db)):
     db.refresh(db_event)
     return {"id": db_event.id}
 
+# Checkpoints let a retried run resume from its last completed step. Bots
+# read and write them through CHECKPOINT_URL in the run environment.
+@router.get("/{run_id}/checkpoint", response_model=RunCheckpointRead)
+def get_run_checkpoint(run_id: str, db: Session = Depends(get_db)):
+    run = db.query(Run).filter(Run.id == run_id, Run.org_id == DEV_ORG_ID).first()
+    if not run:
+        raise HTTPException(status_code=404, detail="Run not found")
+
+    checkpoint = db.query(RunCheckpoint).filter(RunCheckpoint.run_id == run_id).first()
+    if not checkpoint:
+        raise HTTPException(status_code=404, detail="Checkpoint not found")
+    return RunCheckpointRead(
+        run_id=run_id, step=checkpoint.step, data=checkpoint.data_json, updated_at=checkpoint.updated_at
+    )
+
+@router.put("/{run_id}/checkpoint", response_model=RunCheckpointRead)
+def put_run_checkpoint(run_id: str, checkpoint: RunCheckpointWrite, db: Session = Depends(get_db)):
+    run = db.query(Run).filter(Run.id == run_id, Run.org_id == DEV_ORG_ID).first()
+    if not run:
+        raise HTTPException(status_code=404, detail="Run not found")
+
+    db_checkpoint = db.query(RunCheckpoint).filter(RunCheckpoint.run_id == run_id).first()
+    if db_checkpoint:
+        db_checkpoint.step = checkpoint.step
+        db_checkpoint.data_json = checkpoint.data
+    else:
+        db_checkpoint = RunCheckpoint(run_id=run_id, step=checkpoint.step, data_json=checkpoint.data)
+        db.add(db_checkpoint)
+    db.commit()
+    db.refresh(db_checkpoint)
+    return RunCheckpointRead(
+        run_id=run_id, step=db_checkpoint.step, data=db_checkpoint.data_json, updated_at=db_checkpoint.updated_at
+    )
+
 @router.post("/dev", response_model=DevRunResponse)
 def enqueue_dev_run(request: DevRunRequest, db: Session = Depends(get_db)):
     # Create a run record
@@ -85,8 +145,17 @@ def enqueue_dev_run(request: DevRunRequest, db: Session = Depends(get_db)):
     # Enqueue Celery task
     try:
         # Import here to avoid circular imports
-        from celery_app import app
-        app.send_task("tasks.run_bot", args=[request.image_ref, request.run_id, request.config])
+        import dispatch
+        bot = db.query(Bot).filter(Bot.key == request.bot_key).first() if request.bot_key else None
+        version = db.query(BotVersion).filter(BotVersion.id == bot.current_version).first() if bot else None
+        dispatch.enqueue_run(
+            request.image_ref, request.run_id, request.config,
+            bot_key=request.bot_key,
+            max_run_seconds=bot.max_run_seconds if bot else None,
+            runner=version.runner if version else "docker",
+            entrypoint=version.entrypoint if version else None,
+            max_retries=bot.max_retries if bot else 0,
+        )
         return DevRunResponse(enqueued=True, run_id=request.run_id)
     except Exception as e:
         # Clean up the run record if enqueue fails
@@ -1,28 +1,97 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from typing import List
+import os
+import threading
 import uuid
-from datetime import datetime
-from croniter import croniter
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from sqlalchemy.sql import text
 
+from cron_tz import next_fire, jitter_offset, fires_between
 from db import get_db
 from models import Schedule
-from schemas import ScheduleCreate, ScheduleRead
+from schemas import ScheduleCreate, ScheduleRead, ScheduleUpdate, ScheduleOccurrence, check_spread
 
 router = APIRouter(prefix="/v1/schedules", tags=["schedules"])
 
 # Hardcoded dev org for now
 DEV_ORG_ID = "dev-org"
 
-@router.post("/", response_model=ScheduleRead)
-def create_schedule(schedule: ScheduleCreate, db: Session = Depends(get_db)):
-    # Calculate next_fire_at from cron expression
+# Must match NOTIFY_CHANNEL in services/scheduler/tick.py
+SCHEDULES_CHANNEL = "schedules_changed"
+
+def _notify_changed(db: Session, schedule_id: str):
+    # Sent on commit; wakes the scheduler to reload this schedule's fire time
+    db.execute(text("SELECT pg_notify(:channel, :id)"), {"channel": SCHEDULES_CHANNEL, "id": schedule_id})
+
+def _next_fire(cron_expr: str, tz_name: str) -> datetime:
     try:
-        cron = croniter(schedule.cron_expr, datetime.utcnow())
-        next_fire_at = cron.get_next(datetime)
+        return next_fire(cron_expr, tz_name)
+    except KeyError:
+        raise HTTPException(status_code=400, detail=f"Unknown timezone: {tz_name}")
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Invalid cron expression: {str(e)}")
-    
+
+def _plan_next(db_schedule: Schedule):
+    # The scheduler also weighs slot occupancy when it advances a schedule;
+    # here the hashed offset alone is enough
+    target = _next_fire(db_schedule.cron_expr, db_schedule.timezone)
+    db_schedule.target_fire_at = target
+    db_schedule.next_fire_at = target + timedelta(
+        seconds=jitter_offset(db_schedule.id, target, db_schedule.spread_sec or 0))
+
+# Longest window /occurrences expands in one request
+MAX_OCCURRENCE_DAYS = 62
+
+class _DayFiresCache:
+    """LRU cache of per-day expansions, bounded by the number of datetimes
+    held rather than days, so many sparse crons share the room one
+    minutely cron would take"""
+
+    def __init__(self, max_fires: int):
+        self.max_fires = max_fires
+        self._days = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, cron_expr: str, tz_name: str, day: datetime) -> tuple:
+        key = (cron_expr, tz_name, day)
+        with self._lock:
+            fires = self._days.get(key)
+            if fires is not None:
+                self._days.move_to_end(key)
+                return fires
+        fires = tuple(fires_between(cron_expr, tz_name, day - timedelta(microseconds=1),
+                                    day + timedelta(days=1) - timedelta(microseconds=1), limit=24 * 60))
+        with self._lock:
+            if key not in self._days:
+                self._days[key] = fires
+                self._size += len(fires)
+                while self._size > self.max_fires and len(self._days) > 1:
+                    _, evicted = self._days.popitem(last=False)
+                    self._size -= len(evicted)
+        return fires
+
+# ~70 bytes per cached datetime, so ~70 MB: a full window for hundreds of
+# hourly (cron, zone) pairs, or about ten minutely ones
+DAY_FIRES_CACHE_MAX = int(os.getenv("DAY_FIRES_CACHE_MAX", "1000000"))
+_day_fires_cache = _DayFiresCache(DAY_FIRES_CACHE_MAX)
+
+def _day_fires(cron_expr: str, tz_name: str, day: datetime) -> tuple:
+    """Fires of one UTC day; months share days, so expansions are reused"""
+    return _day_fires_cache.get(cron_expr, tz_name, day)
+
+def _occurrences(cron_expr: str, tz_name: str, start: datetime, end: datetime) -> list:
+    day = start.replace(hour=0, minute=0, second=0, microsecond=0)
+    fires = []
+    while day < end:
+        fires += [f for f in _day_fires(cron_expr, tz_name, day) if start <= f < end]
+        day += timedelta(days=1)
+    return fires
+
+@router.post("/", response_model=ScheduleRead)
+def create_schedule(schedule: ScheduleCreate, db: Session = Depends(get_db)):
     db_schedule = Schedule(
         id=str(uuid.uuid4()),
         org_id=DEV_ORG_ID,
@@ -32,9 +101,81 @@ def create_schedule(schedule: ScheduleCreate, db: Session = Depends(get_db)):
         timezone=schedule.timezone,
         phase_json=schedule.phase_json,
         is_active=schedule.is_active,
-        next_fire_at=next_fire_at
+        misfire_policy=schedule.misfire_policy,
+        misfire_grace_sec=schedule.misfire_grace_sec,
+        misfire_window_sec=schedule.misfire_window_sec,
+        spread_sec=schedule.spread_sec,
     )
+    # Calculate next_fire_at from cron expression
+    _plan_next(db_schedule)
     db.add(db_schedule)
+    db.flush()
+    _notify_changed(db, db_schedule.id)
+    db.commit()
+    db.refresh(db_schedule)
+    return db_schedule
+
+@router.get("/occurrences", response_model=List[ScheduleOccurrence])
+def list_occurrences(
+    start: datetime = Query(..., alias="from"),
+    end: datetime = Query(..., alias="to"),
+    db: Session = Depends(get_db),
+):
+    """Every fire of the org's active schedules in [from, to), by cron time"""
+    # Naive bounds are taken as UTC
+    start = start if start.tzinfo else start.replace(tzinfo=timezone.utc)
+    end = end if end.tzinfo else end.replace(tzinfo=timezone.utc)
+    start, end = start.astimezone(timezone.utc), end.astimezone(timezone.utc)
+    if end <= start:
+        raise HTTPException(status_code=400, detail="'to' must be after 'from'")
+    if end - start > timedelta(days=MAX_OCCURRENCE_DAYS):
+        raise HTTPException(status_code=400, detail=f"Window is limited to {MAX_OCCURRENCE_DAYS} days")
+
+    schedules = db.query(Schedule).filter(Schedule.org_id == DEV_ORG_ID, Schedule.is_active == True).all()
+    occurrences = []
+    for schedule in schedules:
+        try:
+            fires = _occurrences(schedule.cron_expr, schedule.timezone, start, end)
+        except Exception as e:
+            # Can't fire either; the scheduler reports it when it comes due
+            print(f"[schedules] Skipping schedule {schedule.id} in occurrences "
+                  f"({schedule.cron_expr!r} in {schedule.timezone}): {e}")
+            continue
+        occurrences += [
+            ScheduleOccurrence(
+                schedule_id=schedule.id,
+                bot_id=schedule.bot_id,
+                config_id=schedule.config_id,
+                fire_at=fire,
+                spread_sec=schedule.spread_sec or 0,
+            )
+            for fire in fires
+        ]
+    occurrences.sort(key=lambda o: o.fire_at)
+    return occurrences
+
+@router.patch("/{schedule_id}", response_model=ScheduleRead)
+def update_schedule(schedule_id: str, update: ScheduleUpdate, db: Session = Depends(get_db)):
+    db_schedule = db.query(Schedule).filter(Schedule.id == schedule_id, Schedule.org_id == DEV_ORG_ID).first()
+    if not db_schedule:
+        raise HTTPException(status_code=404, detail="Schedule not found")
+
+    was_active = db_schedule.is_active
+    fields = update.model_dump(exclude_unset=True)
+    if fields.keys() & {"cron_expr", "spread_sec"}:
+        try:
+            check_spread(fields.get("cron_expr", db_schedule.cron_expr),
+                         fields.get("spread_sec", db_schedule.spread_sec))
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+    for name, value in fields.items():
+        setattr(db_schedule, name, value)
+    # A resumed schedule starts from its next fire instead of treating every
+    # fire since it was paused as missed
+    resumed = fields.get("is_active") and not was_active
+    if resumed or fields.keys() & {"cron_expr", "timezone", "spread_sec"}:
+        _plan_next(db_schedule)
+    _notify_changed(db, db_schedule.id)
     db.commit()
     db.refresh(db_schedule)
     return db_schedule
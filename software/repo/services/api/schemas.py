@@ -1,8 +1,10 @@
-from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from pydantic import BaseModel, Field, model_validator
+from typing import Optional, Dict, Any, Literal
 from datetime import datetime
 import uuid
 
+from cron_tz import min_interval_sec
+
 # BotConfig schemas
 class BotConfigCreate(BaseModel):
     bot_id: str
@@ -23,7 +25,45 @@ class BotConfigRead(BaseModel):
     class Config:
         from_attributes = True
 
+# BotVersion schemas
+class BotVersionCreate(BaseModel):
+    image_ref: str
+    changelog: Optional[str] = None
+    runner: Literal["docker", "native"] = "docker"
+    entrypoint: Optional[str] = None
+    publish: bool = True
+
+class BotVersionRead(BaseModel):
+    id: str
+    bot_id: str
+    image_ref: str
+    changelog: Optional[str]
+    runner: str
+    entrypoint: Optional[str]
+
+    class Config:
+        from_attributes = True
+
+class ImageReadiness(BaseModel):
+    image_ref: str
+    hosts: Dict[str, Dict[str, Any]]
+
 # Schedule schemas
+def check_spread(cron_expr: Optional[str], spread_sec: Optional[int]):
+    """Occurrences spread over as long as the cron's shortest interval would
+    overlap the next one, so spread_sec must stay below it"""
+    if not cron_expr or not spread_sec:
+        return
+    try:
+        interval = min_interval_sec(cron_expr)
+    except Exception:
+        # An invalid expression is reported when the fire time is planned
+        return
+    if spread_sec >= interval:
+        raise ValueError(
+            f"spread_sec ({spread_sec}) must be less than the shortest interval of "
+            f"{cron_expr!r} ({interval}s)")
+
 class ScheduleCreate(BaseModel):
     bot_id: str
     config_id: str
@@ -31,6 +71,50 @@ class ScheduleCreate(BaseModel):
     timezone: str = "UTC"
     phase_json: Optional[Dict[str, Any]] = None
     is_active: bool = True
+    misfire_policy: Literal["skip", "fire_once", "fire_all"] = "fire_once"
+    misfire_grace_sec: int = Field(300, ge=0)
+    misfire_window_sec: int = Field(3600, ge=0)
+    spread_sec: int = Field(0, ge=0, le=3600)
+
+    @model_validator(mode="after")
+    def _spread_within_interval(self):
+        check_spread(self.cron_expr, self.spread_sec)
+        return self
+
+# ScheduleUpdate fields are optional so they can be left out, but only these
+# may be cleared; the others back NOT NULL columns
+NULLABLE_SCHEDULE_FIELDS = {"phase_json"}
+
+class ScheduleUpdate(BaseModel):
+    cron_expr: Optional[str] = None
+    timezone: Optional[str] = None
+    phase_json: Optional[Dict[str, Any]] = None
+    is_active: Optional[bool] = None
+    misfire_policy: Optional[Literal["skip", "fire_once", "fire_all"]] = None
+    misfire_grace_sec: Optional[int] = Field(None, ge=0)
+    misfire_window_sec: Optional[int] = Field(None, ge=0)
+    spread_sec: Optional[int] = Field(None, ge=0, le=3600)
+
+    @model_validator(mode="after")
+    def _no_nulls(self):
+        nulls = sorted(n for n in self.model_fields_set - NULLABLE_SCHEDULE_FIELDS if getattr(self, n) is None)
+        if nulls:
+            raise ValueError(f"{', '.join(nulls)} can't be null")
+        return self
+
+    @model_validator(mode="after")
+    def _spread_within_interval(self):
+        # Only when both are given; update_schedule checks the merged schedule
+        check_spread(self.cron_expr, self.spread_sec)
+        return self
+
+class ScheduleOccurrence(BaseModel):
+    schedule_id: str
+    bot_id: str
+    config_id: str
+    # Cron time; the actual fire lands within spread_sec after it
+    fire_at: datetime
+    spread_sec: int
 
 class ScheduleRead(BaseModel):
     id: str
@@ -41,7 +125,12 @@ class ScheduleRead(BaseModel):
     timezone: str
     phase_json: Optional[Dict[str, Any]]
     is_active: bool
+    misfire_policy: str
+    misfire_grace_sec: int
+    misfire_window_sec: int
+    spread_sec: int
     next_fire_at: datetime
+    target_fire_at: Optional[datetime]
 
     class Config:
         from_attributes = True
@@ -61,6 +150,9 @@ class RunRead(BaseModel):
     schedule_id: Optional[str]
     status: str
     queued_at: datetime
+    scheduled_for: Optional[datetime] = None
+    fire_lag_sec: Optional[float] = None
+    deadline_at: Optional[datetime] = None
     started_at: Optional[datetime]
     finished_at: Optional[datetime]
     worker_host: Optional[str]
@@ -86,11 +178,23 @@ class RunEventRead(BaseModel):
     class Config:
         from_attributes = True
 
+# RunCheckpoint schemas
+class RunCheckpointWrite(BaseModel):
+    step: Optional[str] = None
+    data: Dict[str, Any]
+
+class RunCheckpointRead(BaseModel):
+    run_id: str
+    step: Optional[str]
+    data: Dict[str, Any]
+    updated_at: Optional[datetime]
+
 # Dev run endpoint schema
 class DevRunRequest(BaseModel):
     image_ref: str
     run_id: str
     config: Dict[str, Any]
+    bot_key: Optional[str] = None
 
 class DevRunResponse(BaseModel):
     enqueued: bool
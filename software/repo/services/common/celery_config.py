@@ -0,0 +1,44 @@
+# services/common/celery_config.py
+# Broker settings the api, scheduler and worker Celery apps must agree on
+import os
+
+from kombu import Queue
+from kombu.common import Broadcast
+
+# Fanout queue every worker consumes, so each receives image pre-pull requests
+BROADCAST_QUEUE = "broadcast"
+
+# Priority 0 is served first (scheduled DM phases), 9 last
+PRIORITY_STEPS = list(range(10))
+# Separator between a queue name and its priority step in Redis list names
+QUEUE_SEP = ":"
+
+BROKER_TRANSPORT_OPTIONS = {
+    # Redelivery of a run whose container is still alive is dropped by the
+    # run lease in worker.py, so this only bounds recovery of lost runs.
+    "visibility_timeout": int(os.getenv("BROKER_VISIBILITY_TIMEOUT_SEC", "3600")),
+    "fanout_prefix": True,
+    "fanout_patterns": True,
+    "queue_order_strategy": "priority",
+    "priority_steps": PRIORITY_STEPS,
+    "sep": QUEUE_SEP,
+}
+
+# Queues of the publish-only apps (api, scheduler)
+PUBLISHER_QUEUES = (Queue("celery"), Broadcast(BROADCAST_QUEUE))
+
+def queue_keys(queue: str) -> list:
+    """Redis lists holding a queue's waiting messages, one per priority step"""
+    return [queue if step == 0 else f"{queue}{QUEUE_SEP}{step}" for step in PRIORITY_STEPS]
+
+def configure(app, task_queues):
+    """Apply the shared broker settings to a Celery app"""
+    app.conf.update(
+        task_serializer="json",
+        accept_content=["json"],
+        timezone="UTC",
+        enable_utc=True,
+        task_queues=task_queues,
+        task_routes={"tasks.prepull_image": {"queue": BROADCAST_QUEUE, "exchange": BROADCAST_QUEUE}},
+        broker_transport_options=BROKER_TRANSPORT_OPTIONS,
+    )
@@ -0,0 +1,112 @@
+# services/common/cron_tz.py
+# Shared by the api and scheduler images, which copy services/common into /app
+import hashlib
+import threading
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+from croniter import croniter
+
+class ZonedCron:
+    """A cron expression evaluated on the wall clock of an IANA time zone.
+
+    Fire times are matched in local time and converted to UTC, so "0 8 * * *"
+    in Europe/Amsterdam is 08:00 local in summer and winter. Around DST:
+    a local time skipped by spring-forward fires right after the jump
+    (02:30 -> 03:30), and a local time repeated by fall-back fires once,
+    on its first occurrence.
+    """
+
+    def __init__(self, cron_expr: str, tz_name: str):
+        self.zone = ZoneInfo(tz_name)
+        self._cron = croniter(cron_expr)
+        self._lock = threading.Lock()
+
+    def _to_utc(self, wall: datetime) -> datetime:
+        # fold=0 picks the first of a repeated time and, for a skipped time,
+        # the pre-transition offset, which lands just after the gap
+        return wall.replace(tzinfo=self.zone).astimezone(timezone.utc)
+
+    def next_after(self, after: datetime) -> datetime:
+        """First fire strictly after `after` (aware), as an aware UTC datetime"""
+        wall = after.astimezone(self.zone).replace(tzinfo=None)
+        with self._lock:
+            self._cron.set_current(wall, force=True)
+            while True:
+                fire = self._to_utc(self._cron.get_next(datetime))
+                # Wall times repeated by fall-back can map before `after`
+                if fire > after:
+                    return fire
+
+    def prev_before(self, before: datetime) -> datetime:
+        """Last fire strictly before `before` (aware), as an aware UTC datetime"""
+        local = before.astimezone(self.zone)
+        wall = local.replace(tzinfo=None)
+        if local.fold:
+            # In the second pass of a repeated hour, first-pass fires later on
+            # the wall clock are still earlier in UTC; start past the repeat
+            wall += local.replace(fold=0).utcoffset() - local.utcoffset()
+        with self._lock:
+            self._cron.set_current(wall, force=True)
+            while True:
+                fire = self._to_utc(self._cron.get_prev(datetime))
+                # Times skipped by spring-forward map after the gap
+                if fire < before:
+                    return fire
+
+@lru_cache(maxsize=4096)
+def zoned_cron(cron_expr: str, tz_name: str) -> ZonedCron:
+    """Parsed cron and zone, cached per (expression, zone)"""
+    return ZonedCron(cron_expr, tz_name or "UTC")
+
+def next_fire(cron_expr: str, tz_name: str, after: datetime = None) -> datetime:
+    """Next fire time in UTC; raises ValueError/KeyError for a bad expression or zone"""
+    return zoned_cron(cron_expr, tz_name).next_after(after or datetime.now(timezone.utc))
+
+def fires_between(cron_expr: str, tz_name: str, start: datetime, end: datetime, limit: int = 1000) -> list:
+    """Fire times in (start, end] as aware UTC datetimes, at most `limit`"""
+    cron = zoned_cron(cron_expr, tz_name)
+    fires = []
+    fire = cron.next_after(start)
+    while fire <= end and len(fires) < limit:
+        fires.append(fire)
+        fire = cron.next_after(fire)
+    return fires
+
+def last_fires(cron_expr: str, tz_name: str, start: datetime, end: datetime, limit: int) -> list:
+    """The newest `limit` fire times in (start, end], oldest first.
+
+    Enumerates backwards from `end`, so the cost is bounded by `limit`
+    however far back `start` is."""
+    cron = zoned_cron(cron_expr, tz_name)
+    fires = []
+    fire = cron.prev_before(end + timedelta(microseconds=1))
+    while fire > start and len(fires) < limit:
+        fires.append(fire)
+        fire = cron.prev_before(fire)
+    fires.reverse()
+    return fires
+
+@lru_cache(maxsize=1024)
+def min_interval_sec(cron_expr: str, limit: int = 1000) -> int:
+    """Shortest gap between consecutive fires, over the next `limit` fires
+    (or a year) of the expression on a plain UTC clock"""
+    cron = zoned_cron(cron_expr, "UTC")
+    fire = cron.next_after(datetime.now(timezone.utc).replace(second=0, microsecond=0))
+    end = fire + timedelta(days=366)
+    shortest = None
+    for _ in range(limit):
+        following = cron.next_after(fire)
+        if following > end:
+            break
+        gap = int((following - fire).total_seconds())
+        shortest = gap if shortest is None else min(shortest, gap)
+        fire = following
+    return shortest or int((end - fire).total_seconds())
+
+def jitter_offset(schedule_id: str, target: datetime, spread_sec: int) -> int:
+    """Deterministic offset in [0, spread_sec) for one occurrence of a schedule"""
+    if not spread_sec:
+        return 0
+    digest = hashlib.sha1(f"{schedule_id}:{target.isoformat()}".encode()).digest()
+    return int.from_bytes(digest[:8], "big") % spread_sec
@@ -0,0 +1,60 @@
+# services/common/routing.py
+# Run queue and priority routing, shared by the api, scheduler and worker images
+import json
+from typing import Dict, List, Optional
+
+PLATFORMS = ("onlyfans", "f2f", "fanvue")
+PLATFORM_ALIASES = {"of": "onlyfans"}
+DEFAULT_QUEUE = "celery"
+
+# Run queues, one per platform and bot type, plus the legacy 'celery' queue for
+# runs whose bot can't be classified
+RUN_QUEUES = [f"runs.{platform}.{kind}" for platform in PLATFORMS for kind in ("dm", "posting")] + [DEFAULT_QUEUE]
+
+# Redis transport serves priority 0 first
+PRIORITY_DM_PHASE = 0
+PRIORITY_DM = 3
+PRIORITY_POSTING = 6
+PRIORITY_DEFAULT = 9
+
+def classify_bot(bot_key: Optional[str]):
+    """Return (platform, kind) for a Bot.key such as 'fanvue_mass_dm', or (None, None)"""
+    tokens = (bot_key or "").lower().replace("-", "_").split("_")
+    platforms = [PLATFORM_ALIASES.get(t, t) for t in tokens]
+    platform = next((p for p in platforms if p in PLATFORMS), None)
+    if platform is None:
+        return None, None
+    kind = "dm" if "dm" in tokens or "massdm" in tokens else "posting"
+    return platform, kind
+
+def queue_for(bot_key: Optional[str]) -> str:
+    platform, kind = classify_bot(bot_key)
+    if platform is None:
+        return DEFAULT_QUEUE
+    return f"runs.{platform}.{kind}"
+
+def priority_for(bot_key: Optional[str], scheduled: bool = False) -> int:
+    _, kind = classify_bot(bot_key)
+    if kind == "dm":
+        return PRIORITY_DM_PHASE if scheduled else PRIORITY_DM
+    if kind == "posting":
+        return PRIORITY_POSTING
+    return PRIORITY_DEFAULT
+
+def image_readiness(rds, image_ref: str) -> Dict[str, dict]:
+    """Per-host readiness for an image as reported by workers"""
+    raw = rds.hgetall(f"image_ready:{image_ref}")
+    return {host.decode(): json.loads(value) for host, value in raw.items()}
+
+def alive_hosts(rds, queue: str) -> List[str]:
+    """Hosts with a live worker consuming the given queue"""
+    prefix = f"worker:alive:{queue}:"
+    return [key.decode()[len(prefix):] for key in rds.scan_iter(f"{prefix}*")]
+
+def ready_hosts(rds, image_ref: str, queue: str) -> List[str]:
+    """Live worker hosts for the queue that already have the image pulled"""
+    readiness = image_readiness(rds, image_ref)
+    return [
+        host for host in alive_hosts(rds, queue)
+        if readiness.get(host, {}).get("status") == "ready"
+    ]
@@ -0,0 +1,28 @@
+# services/common/run_memory.py
+# Expected peak memory of a run, used by worker admission and scheduler routing
+import os
+
+# Used for bots with no recorded runs yet
+DEFAULT_RUN_MEMORY_MB = int(os.getenv("DEFAULT_RUN_MEMORY_MB", "1536"))
+# Headroom added on top of a bot's historical peak RSS
+RUN_MEMORY_MARGIN = float(os.getenv("RUN_MEMORY_MARGIN", "1.2"))
+
+MB = 1024 * 1024
+
+def _bot_key(image_ref: str) -> str:
+    """Image repository without tag or digest, so new versions inherit history"""
+    repo = image_ref.split("@", 1)[0]
+    if ":" in repo.rsplit("/", 1)[-1]:
+        repo = repo.rsplit(":", 1)[0]
+    return repo
+
+def peaks_key(image_ref: str) -> str:
+    """Redis list of the bot's recent peak RSS values, newest first"""
+    return f"bot:peak_rss:{_bot_key(image_ref)}"
+
+def estimate_bytes(rds, image_ref: str) -> int:
+    """Expected peak memory of a run, from the bot's recorded peaks"""
+    peaks = [int(p) for p in rds.lrange(peaks_key(image_ref), 0, -1)]
+    if not peaks:
+        return DEFAULT_RUN_MEMORY_MB * MB
+    return int(max(peaks) * RUN_MEMORY_MARGIN)
@@ -0,0 +1,6 @@
+# services/common/tests/conftest.py
+# The services import the shared modules flat (they are copied into /app)
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,71 @@
+# services/common/tests/test_cron_tz.py
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from cron_tz import fires_between, last_fires, min_interval_sec, next_fire
+
+UTC = timezone.utc
+
+def utc(*args) -> datetime:
+    return datetime(*args, tzinfo=UTC)
+
+# Europe/Amsterdam: 2024-03-31 02:00 CET -> 03:00 CEST (01:00 UTC),
+# 2024-10-27 03:00 CEST -> 02:00 CET (01:00 UTC)
+AMS = "Europe/Amsterdam"
+
+def test_spring_forward_skipped_time_fires_after_the_gap():
+    # 02:30 doesn't exist that night; it fires at 03:30 CEST
+    assert next_fire("30 2 * * *", AMS, utc(2024, 3, 30, 12)) == utc(2024, 3, 31, 1, 30)
+    assert next_fire("30 2 * * *", AMS, utc(2024, 3, 31, 1, 30)) == utc(2024, 4, 1, 0, 30)
+
+def test_spring_forward_hourly_fires_once_per_real_hour():
+    assert fires_between("0 * * * *", AMS, utc(2024, 3, 30, 22, 30), utc(2024, 3, 31, 2, 30)) == [
+        utc(2024, 3, 30, 23), utc(2024, 3, 31, 0), utc(2024, 3, 31, 1), utc(2024, 3, 31, 2),
+    ]
+
+def test_fall_back_hourly_fires_repeated_hour_once():
+    # 02:00 local occurs at 00:00 and 01:00 UTC; only the first fires
+    assert fires_between("0 * * * *", AMS, utc(2024, 10, 26, 23, 30), utc(2024, 10, 27, 2, 30)) == [
+        utc(2024, 10, 27, 0), utc(2024, 10, 27, 2),
+    ]
+
+def test_fall_back_half_hourly_fires_repeated_hour_once():
+    assert fires_between("*/30 * * * *", AMS, utc(2024, 10, 26, 23, 45), utc(2024, 10, 27, 2, 45)) == [
+        utc(2024, 10, 27, 0), utc(2024, 10, 27, 0, 30), utc(2024, 10, 27, 2), utc(2024, 10, 27, 2, 30),
+    ]
+
+def test_fall_back_next_fire_from_second_pass_does_not_refire():
+    # 01:10 UTC is 02:10 CET, the second pass; 02:30 already fired at 00:30 UTC
+    assert next_fire("30 2 * * *", AMS, utc(2024, 10, 27, 1, 10)) == utc(2024, 10, 28, 1, 30)
+    assert next_fire("*/30 * * * *", AMS, utc(2024, 10, 27, 1, 10)) == utc(2024, 10, 27, 2)
+
+@pytest.mark.parametrize("after, expected", [
+    (utc(2024, 1, 15), utc(2024, 1, 15, 13)),  # EST, UTC-5
+    (utc(2024, 7, 15), utc(2024, 7, 15, 12)),  # EDT, UTC-4
+])
+def test_new_york_summer_and_winter_offsets(after, expected):
+    assert next_fire("0 8 * * *", "America/New_York", after) == expected
+
+@pytest.mark.parametrize("cron_expr", ["0 * * * *", "*/30 * * * *", "30 2 * * *", "0,30 1-3 * * *"])
+@pytest.mark.parametrize("start", [utc(2024, 3, 30, 12), utc(2024, 10, 26, 12)])
+def test_last_fires_matches_forward_enumeration_across_dst(cron_expr, start):
+    end = start + timedelta(days=2)
+    forward = fires_between(cron_expr, AMS, start, end)
+    assert last_fires(cron_expr, AMS, start, end, len(forward) + 5) == forward
+    assert last_fires(cron_expr, AMS, start, end, 3) == forward[-3:]
+
+def test_last_fires_is_bounded_for_a_stale_start():
+    now = utc(2024, 5, 20, 13, 0, 20)
+    assert last_fires("*/30 * * * *", "UTC", now - timedelta(weeks=3), now, 2) == [
+        utc(2024, 5, 20, 12, 30), utc(2024, 5, 20, 13),
+    ]
+
+@pytest.mark.parametrize("cron_expr, expected", [
+    ("*/5 * * * *", 300),
+    ("0,50 * * * *", 600),
+    ("0 9 * * 1-5", 24 * 3600),
+    ("0 0 1,2 * *", 24 * 3600),
+])
+def test_min_interval_is_the_shortest_gap(cron_expr, expected):
+    assert min_interval_sec(cron_expr) == expected
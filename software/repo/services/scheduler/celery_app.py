@@ -0,0 +1,15 @@
+# services/scheduler/celery_app.py
+from celery import Celery
+import os
+
+import celery_config
+
+# Publish-only app: the scheduler sends runs straight to the run queues and
+# never reads results, so there is no result backend.
+app = Celery(
+    "scheduler",
+    broker=os.getenv("REDIS_URL", "redis://redis:6379/0"),
+)
+
+celery_config.configure(app, celery_config.PUBLISHER_QUEUES)
+app.conf.task_ignore_result = True
@@ -0,0 +1,241 @@
+# services/scheduler/dispatch.py
+import json
+import os
+import random
+import time
+from typing import Dict, List
+
+import redis
+
+import celery_config
+import routing
+import run_memory
+from celery_app import app
+from routing import queue_for, priority_for
+
+rds = redis.Redis.from_url(os.getenv("REDIS_URL", "redis://redis:6379/0"))
+
+def alive_hosts(queue: str) -> List[str]:
+    return routing.alive_hosts(rds, queue)
+
+def warm_hosts(image_ref: str, queue: str) -> List[str]:
+    try:
+        return routing.ready_hosts(rds, image_ref, queue)
+    except redis.RedisError:
+        return []
+
+# Runs released to a host stay reserved against its headroom until the host
+# reports again; the TTL only cleans up after hosts that stop reporting
+RESERVATION_TTL_SEC = int(os.getenv("SCHED_RESERVATION_TTL_SEC", "120"))
+
+# Check a host's headroom and the free slots of the worker pools consuming
+# the run's queue there against what is already released or waiting, and
+# reserve the run if it fits, in one step so replicas can't both take the
+# last slot.
+# KEYS: host reservations zset, headroom report, pool reservations zset,
+#       then ARGV[6] pool reports, then the queue@host priority lists.
+# ARGV: run id, estimate, now, ttl, queue, number of pool reports.
+# Must match Capacity.fits.
+RESERVE_SCRIPT = rds.register_script("""
+local raw = redis.call('GET', KEYS[2])
+if not raw then return 0 end
+local report = cjson.decode(raw)
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', report['ts'])
+local held = redis.call('ZRANGE', KEYS[1], 0, -1)
+local memory = report['free_memory_bytes']
+for _, member in ipairs(held) do
+    memory = memory - tonumber(string.match(member, ':(%d+)$'))
+end
+local slots = report['free_slots']
+if slots ~= cjson.null and slots - #held <= 0 then return 0 end
+local idle = report['running'] == 0 and #held == 0
+if not idle and memory < tonumber(ARGV[2]) then return 0 end
+local pools = tonumber(ARGV[6])
+local pool_free, oldest = 0, nil
+for i = 4, 3 + pools do
+    local raw_pool = redis.call('GET', KEYS[i])
+    if raw_pool then
+        local pool = cjson.decode(raw_pool)
+        for _, queue in ipairs(pool['queues']) do
+            if queue == ARGV[5] then
+                pool_free = pool_free + pool['free_slots']
+                if oldest == nil or pool['ts'] < oldest then oldest = pool['ts'] end
+                break
+            end
+        end
+    end
+end
+if oldest == nil then return 0 end
+redis.call('ZREMRANGEBYSCORE', KEYS[3], '-inf', oldest)
+pool_free = pool_free - redis.call('ZCARD', KEYS[3])
+for i = 4 + pools, #KEYS do
+    pool_free = pool_free - redis.call('LLEN', KEYS[i])
+end
+if pool_free <= 0 then return 0 end
+redis.call('ZADD', KEYS[1], ARGV[3], ARGV[1] .. ':' .. ARGV[2])
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+redis.call('ZADD', KEYS[3], ARGV[3], ARGV[1])
+redis.call('EXPIRE', KEYS[3], ARGV[4])
+return 1
+""")
+
+def _reservations_key(host: str) -> str:
+    return f"sched:reserved:{host}"
+
+def _pool_reservations_key(queue: str, host: str) -> str:
+    return f"sched:reserved:{queue}@{host}"
+
+class Capacity:
+    """Free run capacity per worker host: its last published headroom minus
+    the runs released to it after that report, and per queue the free slots
+    of the worker pools consuming it there minus the runs released to them
+    after their reports or still waiting in the host's queue.
+
+    Releases are reserved in Redis, so every scheduler replica counts the
+    runs the others sent to a host since its report."""
+
+    HEADROOM_PREFIX = "worker:headroom:"
+    POOL_PREFIX = "worker:pool:"
+
+    def _pools(self, host: str, pool_keys: List[bytes]) -> Dict[str, int]:
+        """Free pool slots on the host for each queue its workers consume"""
+        free, oldest = {}, {}
+        for key in pool_keys:
+            raw = rds.get(key)
+            if raw is None:
+                continue
+            report = json.loads(raw)
+            for queue in report["queues"]:
+                free[queue] = free.get(queue, 0) + report["free_slots"]
+                oldest[queue] = min(oldest.get(queue, report["ts"]), report["ts"])
+        for queue in free:
+            free[queue] -= rds.zcount(_pool_reservations_key(queue, host), f"({oldest[queue]}", "+inf")
+            free[queue] -= sum(rds.llen(key) for key in celery_config.queue_keys(f"{queue}@{host}"))
+        return free
+
+    def _free(self, host: str, raw: bytes, pool_keys: List[bytes]) -> dict:
+        report = json.loads(raw)
+        reserved = [
+            int(member.rsplit(b":", 1)[1])
+            for member, ts in rds.zrange(_reservations_key(host), 0, -1, withscores=True)
+            if ts > report["ts"]
+        ]
+        slots = report["free_slots"]
+        return {
+            "slots": None if slots is None else slots - len(reserved),
+            "memory": report["free_memory_bytes"] - sum(reserved),
+            "idle": report["running"] == 0 and not reserved,
+            "pools": self._pools(host, pool_keys),
+            "pool_keys": pool_keys,
+        }
+
+    def _host(self, host: str) -> dict:
+        raw = rds.get(f"{self.HEADROOM_PREFIX}{host}")
+        if raw is None:
+            return {"slots": 0, "memory": 0, "idle": False, "pools": {}, "pool_keys": []}
+        return self._free(host, raw, list(rds.scan_iter(f"{self.POOL_PREFIX}{host}:*")))
+
+    def hosts(self) -> Dict[str, dict]:
+        pool_keys: Dict[str, List[bytes]] = {}
+        for key in rds.scan_iter(f"{self.POOL_PREFIX}*"):
+            host = key.decode()[len(self.POOL_PREFIX):].rsplit(":", 1)[0]
+            pool_keys.setdefault(host, []).append(key)
+        hosts = {}
+        for key in rds.scan_iter(f"{self.HEADROOM_PREFIX}*"):
+            raw = rds.get(key)
+            if raw is None:
+                continue
+            host = key.decode()[len(self.HEADROOM_PREFIX):]
+            hosts[host] = self._free(host, raw, pool_keys.get(host, []))
+        return hosts
+
+    def fits(self, free: dict, queue: str, estimate: int) -> bool:
+        # A host without a pool consuming the queue can't start the run
+        if free["pools"].get(queue, 0) <= 0:
+            return False
+        if free["slots"] is not None and free["slots"] <= 0:
+            return False
+        # Like worker admission, an idle host takes a run whatever its size
+        return free["idle"] or free["memory"] >= estimate
+
+    def reserve(self, hosts: Dict[str, dict], host: str, queue: str, run_id: str, estimate: int) -> bool:
+        """Reserve room for the run on the host; False if another replica
+        took the room first (`hosts` is then refreshed for that host)"""
+        free = hosts[host]
+        reserved = RESERVE_SCRIPT(
+            keys=[_reservations_key(host), f"{self.HEADROOM_PREFIX}{host}", _pool_reservations_key(queue, host)]
+            + free["pool_keys"] + celery_config.queue_keys(f"{queue}@{host}"),
+            args=[run_id, estimate, time.time(), RESERVATION_TTL_SEC, queue, len(free["pool_keys"])],
+        )
+        if not reserved:
+            hosts[host] = self._host(host)
+            return False
+        if free["slots"] is not None:
+            free["slots"] -= 1
+        free["pools"][queue] -= 1
+        free["memory"] -= estimate
+        free["idle"] = False
+        return True
+
+def route_runs(runs: List[Dict], capacity: Capacity):
+    """Assign runs (earliest deadline first) to hosts that can start them now.
+
+    Returns (routed, held). Routed runs get a per-host "queue", preferring
+    hosts that already have the image. Held runs have no host with a free
+    slot in a pool consuming their queue and enough memory. If no worker publishes headroom at all, every
+    run is routed as the API does it: a warm host if any, else the shared
+    queue."""
+    hosts = capacity.hosts()
+    if not hosts:
+        for run in runs:
+            queue = queue_for(run["bot_key"])
+            ready = warm_hosts(run["image_ref"], queue)
+            run["queue"] = f"{queue}@{random.choice(ready)}" if ready else queue
+        return runs, []
+
+    routed, held = [], []
+    estimates, alive, warm = {}, {}, {}
+    for run in runs:
+        queue = queue_for(run["bot_key"])
+        image_ref = run["image_ref"]
+        if image_ref not in estimates:
+            estimates[image_ref] = run_memory.estimate_bytes(rds, image_ref)
+        if queue not in alive:
+            alive[queue] = alive_hosts(queue)
+        if (image_ref, queue) not in warm:
+            warm[(image_ref, queue)] = set(warm_hosts(image_ref, queue))
+        estimate = estimates[image_ref]
+        candidates = [h for h in alive[queue] if h in hosts and capacity.fits(hosts[h], queue, estimate)]
+        candidates.sort(key=lambda h: (
+            h in warm[(image_ref, queue)], hosts[h]["memory"], hosts[h]["pools"][queue]), reverse=True)
+        host = next((h for h in candidates if capacity.reserve(hosts, h, queue, run["run_id"], estimate)), None)
+        if host is None:
+            held.append(run)
+            continue
+        run["queue"] = f"{queue}@{host}"
+        routed.append(run)
+    return routed, held
+
+def enqueue_runs(runs: List[Dict]):
+    """Publish a batch of routed runs over one broker connection.
+
+    Each run is a dict with image_ref, run_id, config, bot_key, queue,
+    max_run_seconds, max_retries, runner, entrypoint and deadline (epoch seconds)."""
+    with app.producer_or_acquire() as producer:
+        for run in runs:
+            # task_id is the run id so a queued run can be revoked on cancel
+            app.send_task(
+                "tasks.run_bot",
+                args=[run["image_ref"], run["run_id"], run["config"]],
+                kwargs={
+                    "max_run_seconds": run["max_run_seconds"],
+                    "max_retries": run["max_retries"],
+                    "runner": run["runner"],
+                    "entrypoint": run["entrypoint"],
+                    "deadline": run["deadline"],
+                },
+                task_id=run["run_id"],
+                queue=run["queue"],
+                priority=priority_for(run["bot_key"], scheduled=True),
+                producer=producer,
+            )
@@ -0,0 +1,47 @@
+# services/scheduler/metrics.py
+import os
+
+from prometheus_client import Counter, Gauge, Histogram, start_http_server
+
+# Port the scheduler serves /metrics on; 0 disables it
+METRICS_PORT = int(os.getenv("SCHED_METRICS_PORT", "9100"))
+
+LAG_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+
+FIRE_LAG = Histogram(
+    "scheduler_fire_lag_seconds",
+    "Time from a run's planned fire time until it was sent to a worker",
+    buckets=LAG_BUCKETS,
+)
+DUE_SET = Histogram(
+    "scheduler_due_schedules",
+    "Schedules due per firing pass",
+    buckets=(0, 1, 5, 10, 50, 100, 500, 1000, 5000, 10000),
+)
+PASS_DURATION = Histogram(
+    "scheduler_pass_duration_seconds",
+    "Duration of a firing or release pass",
+    ["stage"],
+)
+RUNS_FIRED = Counter("scheduler_runs_fired_total", "Runs created from due schedules")
+RUNS_RELEASED = Counter("scheduler_runs_released_total", "Pending runs sent to workers")
+RUNS_EXPIRED = Counter("scheduler_runs_expired_total", "Pending runs that missed their start deadline")
+FAILURES = Counter(
+    "scheduler_enqueue_failures_total",
+    "Schedules or runs that could not be fired or released",
+    ["cause"],
+)
+PENDING = Gauge("scheduler_pending_runs", "Pending runs held back for lack of worker capacity")
+
+def failure_cause(e: Exception) -> str:
+    """Coarse cause label for a failed pass"""
+    module = type(e).__module__.split(".")[0]
+    if module in ("sqlalchemy", "psycopg"):
+        return "database"
+    if module in ("kombu", "redis", "amqp"):
+        return "broker"
+    return "other"
+
+def start():
+    if METRICS_PORT:
+        start_http_server(METRICS_PORT)
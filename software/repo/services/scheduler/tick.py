@@ -1,105 +1,474 @@
-import os, time, datetime
-from croniter import croniter
-import requests
+import os, time, datetime, heapq, select
+import psycopg
 import uuid
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.sql import text
 
+import dispatch
+import fair_share
+import metrics
+from cron_tz import next_fire, last_fires, jitter_offset
+
 # Database setup
 DATABASE_URL = os.getenv("DATABASE_URL", "postgresql+psycopg://app:app@db:5432/app")
 engine = create_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-# API endpoint for enqueueing runs
-API_BASE_URL = "http://api:8000"
+# Due schedules fired per transaction
+BATCH_SIZE = int(os.getenv("SCHED_BATCH_SIZE", "200"))
+# The API sends NOTIFY on this channel (payload: schedule id) on create/edit
+NOTIFY_CHANNEL = "schedules_changed"
+# Full reload of fire times, in case a change was made without a NOTIFY
+RESYNC_SEC = int(os.getenv("SCHED_RESYNC_SEC", "300"))
+# Delay before retrying a schedule that was due but couldn't be fired
+RETRY_SEC = int(os.getenv("SCHED_RETRY_SEC", "10"))
+RECONNECT_SEC = 5
+# Most catch-up runs a fire_all schedule gets after an outage; older fires
+# are coalesced away so recovery can't flood workers
+MAX_CATCHUP_RUNS = int(os.getenv("SCHED_MAX_CATCHUP_RUNS", "10"))
+# How often pending runs are offered to workers again while capacity is short
+RELEASE_SEC = float(os.getenv("SCHED_RELEASE_SEC", "2"))
+# Granularity of jitter placement: spread fires go to the least-booked slot
+SLOT_SEC = int(os.getenv("SCHED_SLOT_SEC", "15"))
+
+class FireHeap:
+    """Min-heap of upcoming fire times (epoch seconds) keyed by schedule.
+
+    Changing a schedule pushes a new entry; superseded entries are skipped
+    when they reach the top instead of being removed from the heap."""
+
+    def __init__(self):
+        self._heap = []
+        self._next = {}
+
+    def set(self, schedule_id: str, fire_at: float = None):
+        if fire_at is None:
+            self._next.pop(schedule_id, None)
+            return
+        if self._next.get(schedule_id) == fire_at:
+            return
+        self._next[schedule_id] = fire_at
+        heapq.heappush(self._heap, (fire_at, schedule_id))
+
+    def replace_all(self, fire_times: dict):
+        self._next = dict(fire_times)
+        self._heap = [(t, s) for s, t in self._next.items()]
+        heapq.heapify(self._heap)
+
+    def peek(self):
+        while self._heap:
+            fire_at, schedule_id = self._heap[0]
+            if self._next.get(schedule_id) == fire_at:
+                return fire_at
+            heapq.heappop(self._heap)
+        return None
+
+    def due(self, now: float) -> list:
+        """Take the schedules due at `now` off the heap; the caller set()s
+        them again once they have been fired (or deferred)"""
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            fire_at, schedule_id = heapq.heappop(self._heap)
+            if self._next.get(schedule_id) == fire_at:
+                del self._next[schedule_id]
+                due.append(schedule_id)
+        return due
+
+    def __len__(self):
+        return len(self._next)
+
+def load_fire_times(db_session, schedule_ids=None) -> dict:
+    """next_fire_at (epoch seconds) of active schedules, all or the given ids"""
+    query = "SELECT id, next_fire_at FROM schedules WHERE is_active = true"
+    params = {}
+    if schedule_ids is not None:
+        query += " AND id = ANY(:ids)"
+        params["ids"] = list(schedule_ids)
+    return {row.id: row.next_fire_at.timestamp() for row in db_session.execute(text(query), params)}
+
+def refresh(heap: FireHeap, db_session, schedule_ids):
+    """Reload the given schedules; inactive or deleted ones leave the heap"""
+    fire_times = load_fire_times(db_session, schedule_ids)
+    for schedule_id in schedule_ids:
+        heap.set(schedule_id, fire_times.get(schedule_id))
+
+def get_due_schedules(db_session, limit: int):
+    """Claim up to `limit` due schedules, oldest first.
 
-INTERVAL = int(os.getenv("SCHED_INTERVAL_SEC", "30"))
+    Rows are locked until the batch commits, and rows another scheduler
+    replica has locked are skipped, so replicas never fire the same
+    schedule twice. A row a replica has just advanced is re-checked
+    against next_fire_at and dropped."""
+    now = datetime.datetime.now(datetime.timezone.utc)
 
-def get_due_schedules(db_session):
-    """Get schedules that are due to run"""
-    now = datetime.datetime.utcnow()
-    
     # Query for active schedules where next_fire_at <= now
     result = db_session.execute(text("""
         SELECT s.id, s.org_id, s.bot_id, s.config_id, s.cron_expr, s.timezone, s.phase_json,
-               bv.image_ref
+               s.next_fire_at, s.misfire_policy, s.misfire_grace_sec, s.misfire_window_sec,
+               COALESCE(s.target_fire_at, s.next_fire_at) AS target_fire_at, s.spread_sec,
+               bc.config_json, b.key AS bot_key, b.max_run_seconds, b.max_retries,
+               bv.image_ref, bv.runner, bv.entrypoint
         FROM schedules s
         JOIN bot_configs bc ON s.config_id = bc.id
         JOIN bots b ON s.bot_id = b.id
         JOIN bot_versions bv ON b.current_version = bv.id
         WHERE s.is_active = true AND s.next_fire_at <= :now
-    """), {"now": now})
-    
+        ORDER BY s.next_fire_at
+        LIMIT :limit
+        FOR UPDATE OF s SKIP LOCKED
+    """), {"now": now, "limit": limit})
+
     return result.fetchall()
 
-def advance_schedule_next_fire(db_session, schedule_id, cron_expr):
-    """Advance the next_fire_at time for a schedule"""
+def run_config(schedule) -> dict:
+    """Config passed to the bot: the saved config plus the schedule's phase"""
+    config = dict(schedule.config_json or {})
+    if schedule.phase_json:
+        config["phase"] = schedule.phase_json
+    return config
+
+def plan_fires(schedule, now: datetime.datetime):
+    """Apply the schedule's misfire policy; returns (fire times to run, next_fire_at).
+
+    Every cron time from target_fire_at up to now is due. Those late by at
+    most misfire_grace_sec (on top of the spread window) are on time.
+    Otherwise:
+      skip      - late fires are dropped; on-time ones coalesce into one run
+      fire_once - everything due coalesces into one run
+      fire_all  - one run per fire within misfire_window_sec, newest
+                  MAX_CATCHUP_RUNS kept
+    Only the newest fires are enumerated, so a long-stale schedule costs
+    no more than a punctual one.
+    """
+    grace = datetime.timedelta(seconds=(schedule.misfire_grace_sec or 0) + (schedule.spread_sec or 0))
+    if schedule.misfire_policy == "skip":
+        window, limit = grace, 1
+    elif schedule.misfire_policy == "fire_all":
+        window = max(grace, datetime.timedelta(seconds=schedule.misfire_window_sec or 0))
+        limit = MAX_CATCHUP_RUNS
+    else:
+        window, limit = None, 1
+    target = schedule.target_fire_at
+    due = last_fires(schedule.cron_expr, schedule.timezone, target, now, limit)
+    if len(due) < limit:
+        due.insert(0, target)
+    fires = [f for f in due if window is None or now - f <= window]
+    if not fires or fires[0] != target:
+        print(f"[scheduler] Schedule {schedule.id} missed fires since {target.isoformat()} "
+              f"({schedule.misfire_policy}), running {len(fires)}")
+    return fires, next_fire(schedule.cron_expr, schedule.timezone, now)
+
+def slot_of(t: datetime.datetime) -> int:
+    return int(t.timestamp()) // SLOT_SEC
+
+def load_occupancy(db_session, occupancy: dict, start: datetime.datetime, end: datetime.datetime):
+    """Add planned fires per slot in [start, end) to `occupancy`, keeping
+    slots already counted (they include this batch's placements).
+
+    Only slots not counted yet are queried; schedules sharing a cron time
+    share a window, so most placements in a batch need no query."""
+    slots = range(slot_of(start), slot_of(end - datetime.timedelta(microseconds=1)) + 1)
+    missing = [slot for slot in slots if slot not in occupancy]
+    if not missing:
+        return
+    rows = db_session.execute(text("""
+        SELECT floor(extract(epoch FROM next_fire_at) / :slot)::bigint AS slot, count(*) AS n
+        FROM schedules
+        WHERE is_active = true AND next_fire_at >= :start AND next_fire_at < :end
+        GROUP BY 1
+    """), {
+        "slot": SLOT_SEC,
+        "start": datetime.datetime.fromtimestamp(missing[0] * SLOT_SEC, datetime.timezone.utc),
+        "end": datetime.datetime.fromtimestamp((missing[-1] + 1) * SLOT_SEC, datetime.timezone.utc),
+    })
+    loaded = {row.slot: row.n for row in rows}
+    for slot in missing:
+        occupancy[slot] = loaded.get(slot, 0)
+
+def place_fire(db_session, occupancy: dict, schedule_id: str, target: datetime.datetime,
+               spread_sec: int) -> datetime.datetime:
+    """Pick the fire time for a cron target within its spread window.
+
+    The schedule's hashed offset picks its preferred slot; if another slot
+    in the window has fewer planned fires, the least-booked one nearest to
+    the preferred slot wins. Deterministic for the same occupancy."""
+    if not spread_sec:
+        return target
+    offset = jitter_offset(schedule_id, target, spread_sec)
+    end = target + datetime.timedelta(seconds=spread_sec)
+    load_occupancy(db_session, occupancy, target, end)
+    slots = list(range(slot_of(target), slot_of(end - datetime.timedelta(microseconds=1)) + 1))
+    preferred = slot_of(target + datetime.timedelta(seconds=offset))
+    best = min(slots, key=lambda slot: (occupancy[slot], (slot - preferred) % len(slots)))
+    occupancy[best] += 1
+    # Same position inside the chosen slot as the hashed offset, clamped to the window
+    fire = datetime.datetime.fromtimestamp(best * SLOT_SEC + offset % SLOT_SEC, datetime.timezone.utc)
+    return min(max(fire, target), end - datetime.timedelta(seconds=1))
+
+def fire_batch(db_session) -> list:
+    """Claim and fire one batch of due schedules in a single transaction.
+
+    Inserts the runs as pending (release_pending sends them to workers) and
+    advances next_fire_at; if anything fails the whole batch is rolled back
+    and retried. Returns (number of due schedules claimed, ids of the
+    schedules that were advanced)."""
+    runs, advances = [], []
+    occupancy = {}
+    now = datetime.datetime.now(datetime.timezone.utc)
+    due = get_due_schedules(db_session, BATCH_SIZE)
+    for schedule in due:
+        try:
+            fires, target = plan_fires(schedule, now)
+        except Exception as e:
+            print(f"[scheduler] Error advancing schedule {schedule.id}: {e}")
+            metrics.FAILURES.labels("cron").inc()
+            continue
+        advances.append({
+            "schedule_id": schedule.id,
+            "target_fire_at": target,
+            "next_fire_at": place_fire(db_session, occupancy, schedule.id, target, schedule.spread_sec),
+        })
+        # A run that can't start within the grace period after its planned
+        # time (or after now, for catch-up fires) has missed its window
+        start_window = datetime.timedelta(seconds=schedule.spread_sec or 0)
+        grace = datetime.timedelta(seconds=schedule.misfire_grace_sec or 0)
+        runs += [{
+            "run_id": str(uuid.uuid4()),
+            "schedule_id": schedule.id,
+            "org_id": schedule.org_id,
+            "bot_id": schedule.bot_id,
+            "config_id": schedule.config_id,
+            "image_ref": schedule.image_ref,
+            # The current fire was placed within its spread window; catch-up
+            # fires are measured from their cron time
+            "scheduled_for": schedule.next_fire_at if fire == schedule.target_fire_at else fire,
+            "deadline_at": max(fire + start_window, now) + grace,
+        } for fire in fires]
+    if not advances:
+        return len(due), []
+
     try:
-        cron = croniter(cron_expr, datetime.datetime.utcnow())
-        next_fire_at = cron.get_next(datetime.datetime)
-        
+        if runs:
+            db_session.execute(text("""
+                INSERT INTO runs (id, org_id, bot_id, config_id, schedule_id, status, image_ref,
+                                  scheduled_for, deadline_at)
+                VALUES (:run_id, :org_id, :bot_id, :config_id, :schedule_id, 'pending', :image_ref,
+                        :scheduled_for, :deadline_at)
+            """), runs)
         db_session.execute(text("""
-            UPDATE schedules 
-            SET next_fire_at = :next_fire_at 
+            UPDATE schedules
+            SET next_fire_at = :next_fire_at, target_fire_at = :target_fire_at
             WHERE id = :schedule_id
-        """), {"next_fire_at": next_fire_at, "schedule_id": schedule_id})
-        
+        """), advances)
         db_session.commit()
-        return next_fire_at
-    except Exception as e:
-        print(f"[scheduler] Error advancing schedule {schedule_id}: {e}")
+    except Exception:
         db_session.rollback()
-        return None
+        raise
+    metrics.RUNS_FIRED.inc(len(runs))
+    for run in runs:
+        print(f"[scheduler] Created run {run['run_id']} for schedule {run['schedule_id']}")
+    return len(due), [advance["schedule_id"] for advance in advances]
+
+def fire_due(db_session) -> list:
+    """Fire every due schedule, batch by batch; returns the ids that were advanced"""
+    fired = []
+    claimed = 0
+    started = time.monotonic()
+    while True:
+        try:
+            due, batch = fire_batch(db_session)
+        except Exception as e:
+            print(f"[scheduler] Error firing batch: {e}")
+            metrics.FAILURES.labels(metrics.failure_cause(e)).inc()
+            break
+        claimed += due
+        fired += batch
+        if len(batch) < BATCH_SIZE:
+            break
+    elapsed = time.monotonic() - started
+    metrics.PASS_DURATION.labels("fire").observe(elapsed)
+    metrics.DUE_SET.observe(claimed)
+    print(f"[scheduler] fired {len(fired)} due schedules in {elapsed:.3f}s")
+    return fired
+
+def expire_pending(db_session):
+    """Expire pending runs whose start deadline has passed"""
+    now = datetime.datetime.now(datetime.timezone.utc)
+    expired = db_session.execute(text("""
+        UPDATE runs
+        SET status = 'expired', finished_at = :now, error_code = 'deadline_passed'
+        WHERE status = 'pending' AND deadline_at < :now
+        RETURNING id
+    """), {"now": now}).fetchall()
+    db_session.commit()
+    metrics.RUNS_EXPIRED.inc(len(expired))
+    if expired:
+        metrics.FAILURES.labels("deadline").inc(len(expired))
+    for row in expired:
+        print(f"[scheduler] Run {row.id} expired before a worker could start it")
+
+def get_pending_runs(db_session, limit: int):
+    """Claim up to `limit` pending runs, taking every org's earliest-deadline
+    runs in turn so one org's backlog can't fill the batch"""
+    return db_session.execute(text("""
+        SELECT r.id AS run_id, r.org_id, r.schedule_id, r.image_ref, r.deadline_at,
+               COALESCE(r.scheduled_for, r.queued_at) AS scheduled_for,
+               s.phase_json, bc.config_json, b.key AS bot_key, b.max_run_seconds, b.max_retries,
+               bv.runner, bv.entrypoint
+        FROM runs r
+        JOIN schedules s ON r.schedule_id = s.id
+        JOIN bot_configs bc ON r.config_id = bc.id
+        JOIN bots b ON r.bot_id = b.id
+        LEFT JOIN bot_versions bv ON b.current_version = bv.id
+        WHERE r.status = 'pending' AND r.id IN (
+            SELECT id FROM (
+                SELECT id, deadline_at,
+                       ROW_NUMBER() OVER (PARTITION BY org_id ORDER BY deadline_at) AS org_rank
+                FROM runs
+                WHERE status = 'pending'
+            ) ranked
+            ORDER BY org_rank, deadline_at
+            LIMIT :limit
+        )
+        FOR UPDATE OF r SKIP LOCKED
+    """), {"limit": limit}).fetchall()
+
+def release_pending(db_session, capacity: dispatch.Capacity) -> int:
+    """Send pending runs to workers that can start them now, in one
+    transaction per batch; returns how many are still held.
+
+    Runs are offered in weighted fair order across orgs (by subscription
+    plan), earliest deadline first within an org."""
+    expire_pending(db_session)
+    weights = fair_share.org_weights(db_session)
+    inflight = fair_share.in_flight(db_session)
+    # Held runs are offered again with the next batch; count each one once
+    held_ids = set()
+    while True:
+        pending = get_pending_runs(db_session, BATCH_SIZE)
+        runs = [{
+            "run_id": row.run_id,
+            "org_id": row.org_id,
+            "image_ref": row.image_ref,
+            "config": run_config(row),
+            "bot_key": row.bot_key,
+            "max_run_seconds": row.max_run_seconds,
+            "max_retries": row.max_retries,
+            "runner": row.runner or "docker",
+            "entrypoint": row.entrypoint,
+            "deadline": row.deadline_at.timestamp(),
+            "scheduled_for": row.scheduled_for,
+        } for row in pending]
+        try:
+            runs = fair_share.fair_order(runs, weights, inflight)
+            routed, held = dispatch.route_runs(runs, capacity)
+            now = datetime.datetime.now(datetime.timezone.utc)
+            for run in routed:
+                run["fire_lag_sec"] = max((now - run["scheduled_for"]).total_seconds(), 0)
+            if routed:
+                db_session.execute(text("""
+                    UPDATE runs SET status = 'queued', fire_lag_sec = :fire_lag_sec WHERE id = :run_id
+                """), routed)
+                dispatch.enqueue_runs(routed)
+            db_session.commit()
+        except Exception:
+            db_session.rollback()
+            raise
+        metrics.RUNS_RELEASED.inc(len(routed))
+        for run in routed:
+            metrics.FIRE_LAG.observe(run["fire_lag_sec"])
+        held_ids.update(run["run_id"] for run in held)
+        for run in routed:
+            inflight[run["org_id"]] = inflight.get(run["org_id"], 0) + 1
+        if len(pending) < BATCH_SIZE or not routed:
+            return len(held_ids)
+
+def listen_connection():
+    conn = psycopg.connect(DATABASE_URL.replace("+psycopg", ""), autocommit=True)
+    conn.execute(f"LISTEN {NOTIFY_CHANNEL}")
+    return conn
+
+def wait_for_notifies(conn, timeout: float) -> list:
+    """Block until a NOTIFY arrives or the timeout passes; returns the payloads"""
+    ready, _, _ = select.select([conn.fileno()], [], [], max(timeout, 0))
+    if not ready:
+        return []
+    conn.pgconn.consume_input()
+    payloads = []
+    while True:
+        notify = conn.pgconn.notifies()
+        if notify is None:
+            return payloads
+        payloads.append(notify.extra.decode())
 
-def create_run_via_api(schedule_data):
-    """Create a run via API call"""
+def release(capacity: dispatch.Capacity):
+    """Release what workers can take; returns when to try again, if anything is held"""
     try:
-        run_id = str(uuid.uuid4())
-        payload = {
-            "bot_id": schedule_data.bot_id,
-            "config_id": schedule_data.config_id,
-            "schedule_id": schedule_data.id,
-            "image_ref": schedule_data.image_ref
-        }
-        
-        response = requests.post(f"{API_BASE_URL}/v1/runs", json=payload, timeout=10)
-        if response.status_code == 200:
-            print(f"[scheduler] Created run {run_id} for schedule {schedule_data.id}")
-            return True
-        else:
-            print(f"[scheduler] Failed to create run: {response.status_code} - {response.text}")
-            return False
+        with metrics.PASS_DURATION.labels("release").time(), SessionLocal() as db_session:
+            held = release_pending(db_session, capacity)
     except Exception as e:
-        print(f"[scheduler] Error creating run: {e}")
-        return False
+        print(f"[scheduler] Error releasing pending runs: {e}")
+        metrics.FAILURES.labels(metrics.failure_cause(e)).inc()
+        return time.time() + RETRY_SEC
+    metrics.PENDING.set(held)
+    return time.time() + RELEASE_SEC if held else None
+
+def run(conn):
+    heap = FireHeap()
+    capacity = dispatch.Capacity()
+    with SessionLocal() as db_session:
+        heap.replace_all(load_fire_times(db_session))
+    print(f"[scheduler] tracking {len(heap)} schedules")
+    resync_at = time.time() + RESYNC_SEC
+    # Runs left pending by a previous scheduler are picked up straight away
+    release_at = time.time()
+
+    while True:
+        now = time.time()
+        if now >= resync_at:
+            with SessionLocal() as db_session:
+                heap.replace_all(load_fire_times(db_session))
+            resync_at = now + RESYNC_SEC
+
+        due = heap.due(now)
+        if due:
+            with SessionLocal() as db_session:
+                fire_due(db_session)
+                refresh(heap, db_session, due)
+            # Whatever is still due couldn't be fired (database down, no
+            # published version); back off instead of spinning on it
+            retry_at = time.time() + RETRY_SEC
+            for schedule_id in heap.due(time.time()):
+                heap.set(schedule_id, retry_at)
+            release_at = time.time()
+
+        if release_at is not None and release_at <= time.time():
+            release_at = release(capacity)
+        if due:
+            continue
+
+        wake_at = [t for t in (resync_at, heap.peek(), release_at) if t is not None]
+        timeout = min(wake_at) - time.time()
+        changed = wait_for_notifies(conn, timeout)
+        if changed:
+            with SessionLocal() as db_session:
+                if "" in changed:
+                    heap.replace_all(load_fire_times(db_session))
+                else:
+                    refresh(heap, db_session, set(changed))
 
 def main():
     print("[scheduler] starting")
+    metrics.start()
     while True:
         try:
-            db_session = SessionLocal()
-            
-            # Get due schedules
-            due_schedules = get_due_schedules(db_session)
-            
-            for schedule in due_schedules:
-                print(f"[scheduler] Processing due schedule {schedule.id}")
-                
-                # Create run via API
-                if create_run_via_api(schedule):
-                    # Advance the schedule's next_fire_at
-                    advance_schedule_next_fire(db_session, schedule.id, schedule.cron_expr)
-                else:
-                    print(f"[scheduler] Failed to process schedule {schedule.id}")
-            
-            db_session.close()
-            
+            # LISTEN before the initial load so no change can slip in between
+            with listen_connection() as conn:
+                run(conn)
         except Exception as e:
             print(f"[scheduler] Error in main loop: {e}")
-        
-        print(f"[scheduler] tick {datetime.datetime.utcnow().isoformat()}Z")
-        time.sleep(INTERVAL)
+        time.sleep(RECONNECT_SEC)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,127 @@
+# services/worker/admission.py
+import os, re, subprocess, time
+
+import run_memory
+from run_memory import MB
+
+# Memory kept free for the OS, docker and the worker itself
+HOST_MEMORY_RESERVE_MB = int(os.getenv("HOST_MEMORY_RESERVE_MB", "512"))
+# Number of recent peaks kept per bot; the estimate is their maximum
+PEAK_HISTORY = int(os.getenv("RUN_PEAK_HISTORY", "20"))
+
+# Slots are members of a sorted set scored by lease expiry, so slots of a
+# crashed worker free themselves once their lease lapses. The memory hash
+# holds, per running run, how much of its estimate it hasn't used yet.
+_ADMIT = """
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])
+local running = redis.call('ZCARD', KEYS[1])
+local max_runs = tonumber(ARGV[3])
+if max_runs > 0 and running >= max_runs then
+    return 0
+end
+local outstanding = 0
+local mem = redis.call('HGETALL', KEYS[2])
+for i = 1, #mem, 2 do
+    if redis.call('ZSCORE', KEYS[1], mem[i]) then
+        outstanding = outstanding + tonumber(mem[i + 1])
+    else
+        redis.call('HDEL', KEYS[2], mem[i])
+    end
+end
+-- An idle host always admits, so an oversized bot can't starve forever
+if running > 0 and tonumber(ARGV[5]) - outstanding < tonumber(ARGV[6]) then
+    return -1
+end
+redis.call('ZADD', KEYS[1], ARGV[2], ARGV[4])
+redis.call('HSET', KEYS[2], ARGV[4], ARGV[6])
+return 1
+"""
+
+_MEM_USAGE = re.compile(r"^\s*([\d.]+)\s*([KMGT]?i?B)", re.IGNORECASE)
+_UNITS = {
+    "b": 1, "kb": 1000, "mb": 1000 ** 2, "gb": 1000 ** 3, "tb": 1000 ** 4,
+    "kib": 1024, "mib": 1024 ** 2, "gib": 1024 ** 3, "tib": 1024 ** 4,
+}
+
+def mem_available_bytes() -> int:
+    with open("/proc/meminfo") as f:
+        for line in f:
+            if line.startswith("MemAvailable:"):
+                return int(line.split()[1]) * 1024
+    return 0
+
+def container_rss_bytes(container: str) -> int:
+    """Current memory usage of a running container, 0 if unknown"""
+    try:
+        out = subprocess.run(
+            ["docker", "stats", "--no-stream", "--format", "{{.MemUsage}}", container],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, timeout=15,
+        ).stdout.decode()
+    except Exception:
+        return 0
+    m = _MEM_USAGE.match(out)
+    if not m:
+        return 0
+    return int(float(m.group(1)) * _UNITS.get(m.group(2).lower(), 1))
+
+class HostAdmission:
+    """Admit a run on this host only if a slot is free and its expected peak
+    memory fits next to the runs already here."""
+
+    def __init__(self, rds, host: str, max_runs: int, lease_ttl: int):
+        self.rds = rds
+        self.max_runs = max_runs
+        self.lease_ttl = lease_ttl
+        self.slots_key = f"host:slots:{host}"
+        self.mem_key = f"host:mem:{host}"
+        self._admit = rds.register_script(_ADMIT)
+
+    def estimate_bytes(self, image_ref: str) -> int:
+        return run_memory.estimate_bytes(self.rds, image_ref)
+
+    def admit(self, run_id: str, image_ref: str):
+        """Return (admitted, reason)"""
+        now = time.time()
+        estimate = self.estimate_bytes(image_ref)
+        free = mem_available_bytes() - HOST_MEMORY_RESERVE_MB * MB
+        result = self._admit(
+            keys=[self.slots_key, self.mem_key],
+            args=[now, now + self.lease_ttl, self.max_runs, run_id, free, estimate],
+        )
+        if result == 0:
+            return False, "no free run slot"
+        if result == -1:
+            return False, f"not enough memory (needs ~{estimate // MB} MB, {max(free, 0) // MB} MB free)"
+        return True, None
+
+    def renew(self, run_id: str):
+        self.rds.zadd(self.slots_key, {run_id: time.time() + self.lease_ttl}, xx=True)
+
+    def update_usage(self, run_id: str, image_ref: str, rss: int):
+        """Shrink the run's outstanding reservation as its real usage grows"""
+        outstanding = max(self.estimate_bytes(image_ref) - rss, 0)
+        self.rds.hset(self.mem_key, run_id, outstanding)
+
+    def release(self, run_id: str):
+        self.rds.zrem(self.slots_key, run_id)
+        self.rds.hdel(self.mem_key, run_id)
+
+    def record_peak(self, image_ref: str, peak: int):
+        key = run_memory.peaks_key(image_ref)
+        self.rds.lpush(key, peak)
+        self.rds.ltrim(key, 0, PEAK_HISTORY - 1)
+
+    def running(self) -> int:
+        return self.rds.zcount(self.slots_key, time.time(), "+inf")
+
+    def headroom(self) -> dict:
+        """What this host could still take, as published for the scheduler"""
+        running = self.running()
+        outstanding = sum(int(v) for v in self.rds.hvals(self.mem_key))
+        free = mem_available_bytes() - HOST_MEMORY_RESERVE_MB * MB - outstanding
+        return {
+            "running": running,
+            "free_slots": max(self.max_runs - running, 0) if self.max_runs > 0 else None,
+            "free_memory_bytes": max(free, 0),
+            "ts": time.time(),
+        }
@@ -1,17 +1,48 @@
 # services/worker/celery_app.py
 import os
+import socket
 from celery import Celery
+from kombu import Queue
+from kombu.common import Broadcast
+
+import celery_config
+from routing import RUN_QUEUES
 
 broker_url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
 
 app = Celery("worker", broker=broker_url, backend=broker_url)
 
-# Keep default 'celery' queue for now (simplest while setting up)
-# If you later want a dedicated 'runs' queue, we can add routes and start worker with -Q runs.
-# app.conf.task_routes = {"tasks.run_bot": {"queue": "runs"}}
+# Name this worker host reports under (image readiness, per-host queues)
+WORKER_HOST = os.getenv("WORKER_HOST", socket.gethostname())
+
+# Which run queues this worker process consumes. Start one worker per queue
+# (or group of queues) with its own WORKER_CONCURRENCY to tune each
+# queue's throughput independently.
+WORKER_QUEUES = [q.strip() for q in os.getenv("WORKER_QUEUES", ",".join(RUN_QUEUES)).split(",") if q.strip()]
 
+# Each run queue also has a per-host twin ('<queue>@<host>') the dispatcher
+# uses to prefer hosts that already have an image, plus a fanout queue so
+# every worker receives image pre-pull requests.
+celery_config.configure(app, tuple(
+    [Queue(q) for q in WORKER_QUEUES]
+    + [Queue(f"{q}@{WORKER_HOST}") for q in WORKER_QUEUES]
+    + [Broadcast(celery_config.BROADCAST_QUEUE)]
+))
+app.conf.task_default_queue = WORKER_QUEUES[0]
+
+# Runs spend nearly all their time waiting on a container, so a gevent pool
+# (WORKER_POOL=gevent, passed to celery as --pool) lets one process supervise
+# many runs; WORKER_CONCURRENCY is then the number of greenlets. The
+# host-wide run cap is MAX_HOST_RUNS in worker.py.
+app.conf.worker_concurrency = int(os.getenv("WORKER_CONCURRENCY", "1"))
 app.conf.worker_prefetch_multiplier = 1
-app.conf.broker_transport_options = {"visibility_timeout": 3600}
+
+# Run state lives in Postgres and nothing reads task results, so they are
+# not stored unless STORE_TASK_RESULTS=1 (debugging), and then only briefly.
+app.conf.task_ignore_result = os.getenv("STORE_TASK_RESULTS", "0") != "1"
+app.conf.task_store_errors_even_if_ignored = False
+app.conf.result_expires = int(os.getenv("RESULT_EXPIRES_SEC", "3600"))
+app.conf.result_extended = False
 
 # 🔑 This import registers tasks defined in worker.py
 import worker  # noqa: F401
@@ -0,0 +1,193 @@
+# services/worker/native_runner.py
+import importlib, importlib.util, multiprocessing, os, runpy, signal, sys, threading, traceback
+
+# Heavy modules imported once in the fork server, so every pooled process
+# starts with them already loaded instead of paying a cold interpreter.
+NATIVE_PRELOAD = [m.strip() for m in os.getenv(
+    "NATIVE_PRELOAD", "playwright.async_api,pandas,openpyxl,yaml"
+).split(",") if m.strip()]
+# Idle pre-forked processes kept ready for the next run
+NATIVE_POOL_SIZE = int(os.getenv("NATIVE_POOL_SIZE", "2"))
+# Entrypoints are resolved relative to this directory
+NATIVE_BOTS_ROOT = os.getenv("NATIVE_BOTS_ROOT", "/bots")
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+def _tree_rss_bytes(root_pid: int) -> int:
+    """RSS of root_pid and every process below it"""
+    parents, rss = {}, {}
+    try:
+        entries = os.listdir("/proc")
+    except OSError:
+        return 0
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "r") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            parents[int(entry)] = int(fields[1])
+            rss[int(entry)] = int(fields[21]) * PAGE_SIZE
+        except (OSError, IndexError, ValueError):
+            continue
+    total = 0
+    for pid in rss:
+        p = pid
+        while p and p != root_pid:
+            p = parents.get(p)
+        if p == root_pid:
+            total += rss[pid]
+    return total
+
+def _gevent_active() -> bool:
+    try:
+        from gevent import monkey
+        return monkey.is_module_patched("os")
+    except ImportError:
+        return False
+
+def _pool_child(job_conn, out_conn):
+    """Body of a pooled process: wait for one job, run it, exit.
+
+    Each process runs a single bot so module state never leaks between runs."""
+    os.dup2(out_conn.fileno(), 1)
+    os.dup2(out_conn.fileno(), 2)
+    sys.stdout.reconfigure(line_buffering=True)
+    sys.stderr.reconfigure(line_buffering=True)
+
+    job = job_conn.recv()
+    if job is None:
+        os._exit(0)
+
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+    os.environ.update(job["env"])
+    os.chdir(job["cwd"])
+    sys.argv = [job["entrypoint"]]
+    sys.path.insert(0, job["cwd"])
+    try:
+        # The fork server ignores preload ImportErrors; a module that failed
+        # there fails here, with its traceback in the run's output
+        for module in NATIVE_PRELOAD:
+            importlib.import_module(module)
+        runpy.run_path(job["entrypoint"], run_name="__main__")
+        code = 0
+    except SystemExit as e:
+        code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    except BaseException:
+        traceback.print_exc()
+        code = 1
+    sys.stdout.flush()
+    sys.stderr.flush()
+    os._exit(code)
+
+class NativeRun:
+    """Popen-like handle for a bot running in a pooled process"""
+
+    def __init__(self, process, stdout):
+        self.process = process
+        self.stdout = stdout
+        self.pid = process.pid
+
+    def poll(self):
+        return None if self.process.is_alive() else self.process.exitcode
+
+    def wait(self):
+        self.process.join()
+        return self.process.exitcode
+
+    def stop(self, grace: int):
+        """SIGTERM, then SIGKILL after the grace period"""
+        if not self.process.is_alive():
+            return
+        self.process.terminate()
+        self.process.join(grace)
+        if self.process.is_alive():
+            self.process.kill()
+
+    def kill(self):
+        self.process.kill()
+
+    def rss(self) -> int:
+        """Current RSS of the bot process and everything it spawned
+        (Playwright driver, Chromium), 0 if unknown"""
+        return _tree_rss_bytes(self.pid)
+
+class NativePool:
+    """Pool of pre-forked Python processes for docker-less runs.
+
+    Processes are forked from a fork server that has NATIVE_PRELOAD imported,
+    and NATIVE_POOL_SIZE of them wait idle so a run starts immediately."""
+
+    def __init__(self, size: int = NATIVE_POOL_SIZE):
+        self.size = size
+        self._ctx = None
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def _context(self):
+        if self._ctx is None:
+            # The fork server silently skips preloads it can't import
+            missing = [m for m in NATIVE_PRELOAD if importlib.util.find_spec(m) is None]
+            if missing:
+                raise ImportError(f"NATIVE_PRELOAD modules not installed: {', '.join(missing)}")
+            ctx = multiprocessing.get_context("forkserver")
+            ctx.set_forkserver_preload(NATIVE_PRELOAD)
+            self._ctx = ctx
+        return self._ctx
+
+    def _fork(self):
+        ctx = self._context()
+        job_r, job_w = ctx.Pipe(duplex=False)
+        out_r, out_w = ctx.Pipe(duplex=False)
+        process = ctx.Process(target=_pool_child, args=(job_r, out_w), daemon=False)
+        process.start()
+        job_r.close()
+        out_w.close()
+        return process, job_w, out_r
+
+    def _refill(self):
+        with self._lock:
+            missing = self.size - len(self._idle)
+        for _ in range(missing):
+            entry = self._fork()
+            with self._lock:
+                self._idle.append(entry)
+
+    def start(self, entrypoint: str, env: dict) -> NativeRun:
+        path = os.path.join(NATIVE_BOTS_ROOT, entrypoint)
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"Native entrypoint not found: {path}")
+
+        with self._lock:
+            entry = None
+            while self._idle and entry is None:
+                candidate = self._idle.pop()
+                if candidate[0].is_alive():
+                    entry = candidate
+        if entry is None:
+            entry = self._fork()
+        process, job_w, out_r = entry
+
+        job_w.send({"entrypoint": path, "cwd": os.path.dirname(path), "env": env})
+        job_w.close()
+        threading.Thread(target=self._refill, name="native-pool-refill", daemon=True).start()
+
+        fd = os.dup(out_r.fileno())
+        out_r.close()
+        if _gevent_active():
+            from gevent.fileobject import FileObjectPosix
+            stdout = FileObjectPosix(fd, "rb")
+        else:
+            stdout = os.fdopen(fd, "rb")
+        return NativeRun(process, stdout)
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for process, job_w, out_r in idle:
+            try:
+                job_w.send(None)
+            except OSError:
+                pass
+            process.join(timeout=5)
@@ -0,0 +1,109 @@
+# services/worker/pump.py
+import collections, json, os, threading, time
+
+# Lines longer than this are cut; the rest of the line is discarded
+MAX_LINE_BYTES = int(os.getenv("PUMP_MAX_LINE_BYTES", "8192"))
+# Last N lines kept in memory for failure diagnostics
+TAIL_LINES = int(os.getenv("PUMP_TAIL_LINES", "200"))
+# Token bucket for logging; lines over the rate are counted, not logged
+LOG_LINES_PER_SEC = float(os.getenv("PUMP_LOG_LINES_PER_SEC", "20"))
+LOG_BURST = int(os.getenv("PUMP_LOG_BURST", "200"))
+
+READ_CHUNK = 65536
+
+class OutputPump(threading.Thread):
+    """Drain a child's stdout on its own thread with bounded memory.
+
+    Reads fixed-size chunks instead of readline so one huge line can't
+    balloon memory, keeps a ring buffer of recent lines, and rate-limits
+    logging so a chatty bot can't stall the worker.
+    """
+
+    def __init__(self, stream, log, name: str):
+        super().__init__(name=name, daemon=True)
+        self.stream = stream
+        self.log = log
+        self.tail = collections.deque(maxlen=TAIL_LINES)
+        self.lines = 0
+        self.truncated = 0
+        self.dropped = 0
+        self._buf = bytearray()
+        self._discarding = False
+        self._tokens = float(LOG_BURST)
+        self._refilled_at = time.monotonic()
+        self._dropped_unreported = 0
+
+    def run(self):
+        read = getattr(self.stream, "read1", self.stream.read)
+        try:
+            while True:
+                chunk = read(READ_CHUNK)
+                if not chunk:
+                    break
+                self._feed(chunk)
+        except (OSError, ValueError) as e:
+            self.log.warning(f"[pump] stopped reading: {e}")
+        if self._buf:
+            self._emit(bytes(self._buf), truncated=False)
+            self._buf.clear()
+        if self.dropped or self.truncated:
+            self.log.warning(
+                f"[pump] {self.lines} lines, {self.dropped} not logged (rate limit), {self.truncated} truncated"
+            )
+
+    def tail_text(self, n: int = None) -> str:
+        lines = list(self.tail)
+        return "\n".join(lines[-n:] if n else lines)
+
+    def _feed(self, chunk: bytes):
+        start = 0
+        while True:
+            nl = chunk.find(b"\n", start)
+            piece = chunk[start:] if nl == -1 else chunk[start:nl]
+            if self._discarding:
+                # Skip the remainder of an over-long line
+                if nl != -1:
+                    self._discarding = False
+            else:
+                room = MAX_LINE_BYTES - len(self._buf)
+                self._buf += piece[:room]
+                if len(piece) > room:
+                    self._emit(bytes(self._buf), truncated=True)
+                    self._buf.clear()
+                    self._discarding = nl == -1
+                elif nl != -1:
+                    self._emit(bytes(self._buf), truncated=False)
+                    self._buf.clear()
+            if nl == -1:
+                return
+            start = nl + 1
+
+    def _emit(self, raw: bytes, truncated: bool):
+        line = raw.decode("utf-8", "replace").rstrip("\r")
+        if truncated:
+            self.truncated += 1
+            line += " …[truncated]"
+        self.lines += 1
+        self.tail.append(line)
+
+        if not self._take_token():
+            self.dropped += 1
+            self._dropped_unreported += 1
+            return
+        if self._dropped_unreported:
+            self.log.warning(f"[pump] {self._dropped_unreported} lines not logged (rate limit)")
+            self._dropped_unreported = 0
+        try:
+            ev = json.loads(line)
+            self.log.info(f"[event] {ev}")
+        except Exception:
+            self.log.info(line)
+
+    def _take_token(self) -> bool:
+        now = time.monotonic()
+        self._tokens = min(LOG_BURST, self._tokens + (now - self._refilled_at) * LOG_LINES_PER_SEC)
+        self._refilled_at = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        return False
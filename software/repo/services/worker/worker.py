@@ -1,21 +1,325 @@
 # services/worker/worker.py
-import json, os, subprocess, tempfile, shutil
+import json, os, socket, subprocess, tempfile, shutil, threading, time, uuid
+from datetime import datetime, timezone
 from pathlib import Path
+from celery.signals import worker_ready, worker_shutting_down
 from celery.utils.log import get_task_logger
 import boto3
 from botocore.exceptions import ClientError
+import psycopg
+import redis
 
-from celery_app import app  # <-- import the SAME Celery app
+from celery_app import app, broker_url, WORKER_HOST, WORKER_QUEUES  # <-- import the SAME Celery app
+from pump import OutputPump
+from admission import HostAdmission, container_rss_bytes
+from native_runner import NativePool
 
 log = get_task_logger(__name__)
 
-def _stream_lines(proc):
-    for line in iter(proc.stdout.readline, b""):
+rds = redis.Redis.from_url(broker_url)
+
+HEARTBEAT_SEC = int(os.getenv("WORKER_HEARTBEAT_SEC", "15"))
+
+# Hard cap for bots without Bot.max_run_seconds
+DEFAULT_MAX_RUN_SEC = int(os.getenv("DEFAULT_MAX_RUN_SEC", "7200"))
+# Run leases are renewed every LEASE_RENEW_SEC while the container is alive;
+# a redelivered task finding a live lease is dropped instead of run twice.
+LEASE_TTL_SEC = int(os.getenv("RUN_LEASE_TTL_SEC", "60"))
+LEASE_RENEW_SEC = int(os.getenv("RUN_LEASE_RENEW_SEC", "20"))
+STOP_GRACE_SEC = int(os.getenv("RUN_STOP_GRACE_SEC", "10"))
+# A run still alive this long after its stop grace period is killed; so is
+# a docker run client that stays attached this long after the kill
+STOP_CALL_TIMEOUT_SEC = int(os.getenv("RUN_STOP_CALL_TIMEOUT_SEC", "15"))
+# Pulls that take longer are abandoned; an inline pull fails its run
+IMAGE_PULL_TIMEOUT_SEC = int(os.getenv("IMAGE_PULL_TIMEOUT_SEC", "600"))
+# Marks a run as finished so late redeliveries are dropped
+RUN_DONE_TTL_SEC = int(os.getenv("RUN_DONE_TTL_SEC", str(24 * 3600)))
+
+# On shutdown (SIGTERM) the worker stops consuming and gives running
+# containers DRAIN_TIMEOUT_SEC to finish; the rest are stopped and requeued
+# to resume from their checkpoint. The drain file carries the deadline to
+# prefork children, which don't see the shutdown signal themselves.
+DRAIN_TIMEOUT_SEC = int(os.getenv("DRAIN_TIMEOUT_SEC", "300"))
+DRAIN_FILE = Path(os.getenv("WORKER_DRAIN_FILE", "/tmp/worker-drain"))
+# Identifies containers started by this worker across restarts. The default
+# (container hostname) changes when compose recreates the container, so
+# deployments set a stable id per worker service.
+WORKER_ID = os.getenv("WORKER_ID", socket.gethostname())
+
+# Host-wide cap on concurrently supervised runs, shared by every worker
+# process reporting under WORKER_HOST. 0 means no cap beyond the pool size.
+MAX_HOST_RUNS = int(os.getenv("MAX_HOST_RUNS", "0"))
+# A run that can't be admitted goes back to its queue after this delay
+ADMISSION_RETRY_SEC = int(os.getenv("ADMISSION_RETRY_SEC", "10"))
+# How often a running container's memory is sampled for admission accounting
+RSS_SAMPLE_SEC = int(os.getenv("RUN_RSS_SAMPLE_SEC", "15"))
+
+# Failed runs are retried with the same run id; bots resume from the
+# checkpoint they stored under CHECKPOINT_URL. Retries are opt-in per bot
+# (Bot.max_retries) since a bot without checkpoints would redo its sends;
+# this is the fallback for tasks enqueued without max_retries.
+RUN_MAX_RETRIES = int(os.getenv("RUN_MAX_RETRIES", "0"))
+RUN_RETRY_DELAY_SEC = int(os.getenv("RUN_RETRY_DELAY_SEC", "30"))
+API_BASE_URL = os.getenv("API_BASE_URL", "http://api:8000")
+# Docker network bot containers join so they can reach the API at
+# API_BASE_URL; without it checkpointing bots fail on their first request
+RUN_NETWORK = os.getenv("RUN_NETWORK")
+
+DATABASE_URL = os.getenv("DATABASE_URL", "postgresql+psycopg://app:app@db:5432/app").replace("+psycopg", "")
+
+admission = HostAdmission(rds, WORKER_HOST, MAX_HOST_RUNS, LEASE_TTL_SEC)
+# Docker-less runner for BotVersions with runner="native"; started lazily
+native_pool = NativePool()
+
+# Runs this worker is supervising, scored by lease expiry like the host
+# slots, so the pool report below only counts this worker's own runs
+BUSY_KEY = f"worker:busy:{WORKER_ID}"
+
+def _pool_report() -> dict:
+    """Free run slots of this worker's pool, for the queues it consumes"""
+    now = time.time()
+    # Runs of a crashed worker process free their slot once their lease lapses
+    rds.zremrangebyscore(BUSY_KEY, "-inf", now)
+    busy = rds.zcard(BUSY_KEY)
+    return {"queues": WORKER_QUEUES, "free_slots": max(app.conf.worker_concurrency - busy, 0), "ts": now}
+
+def _heartbeat_loop():
+    """Keep this host's queues marked alive so the dispatcher only targets live
+    hosts, and publish the host's headroom and this worker's free pool slots
+    for capacity-aware scheduling"""
+    while True:
         try:
-            ev = json.loads(line.decode("utf-8").strip())
-            log.info(f"[event] {ev}")
-        except Exception:
-            log.info(line.decode("utf-8").rstrip())
+            for queue in WORKER_QUEUES:
+                rds.set(f"worker:alive:{queue}:{WORKER_HOST}", int(time.time()), ex=HEARTBEAT_SEC * 3)
+            rds.set(f"worker:headroom:{WORKER_HOST}", json.dumps(admission.headroom()), ex=HEARTBEAT_SEC * 3)
+            rds.set(f"worker:pool:{WORKER_HOST}:{WORKER_ID}", json.dumps(_pool_report()), ex=HEARTBEAT_SEC * 3)
+        except Exception as e:
+            log.warning(f"Heartbeat failed: {e}")
+        time.sleep(HEARTBEAT_SEC)
+
+@worker_ready.connect
+def _start_heartbeat(**kwargs):
+    DRAIN_FILE.unlink(missing_ok=True)
+    if not RUN_NETWORK:
+        log.error(f"RUN_NETWORK is not set; bot containers can't reach {API_BASE_URL} for checkpoints")
+    _reconcile_orphans()
+    threading.Thread(target=_heartbeat_loop, name="heartbeat", daemon=True).start()
+
+@worker_shutting_down.connect
+def _start_drain(sig=None, how=None, **kwargs):
+    deadline = time.time() + DRAIN_TIMEOUT_SEC
+    DRAIN_FILE.write_text(str(deadline))
+    log.warning(f"Draining: running containers have {DRAIN_TIMEOUT_SEC}s to finish ({how} shutdown on {sig})")
+
+def _drain_expired() -> bool:
+    try:
+        return time.time() >= float(DRAIN_FILE.read_text())
+    except (OSError, ValueError):
+        return False
+
+def _reconcile_orphans():
+    """Remove containers a previous incarnation of this worker left behind.
+
+    Their tasks were never acked (acks_late), so the broker redelivers them;
+    clearing the lease and slot lets the redelivery start straight away."""
+    out = subprocess.run(
+        ["docker", "ps", "-a", "--filter", f"label=bots.worker_id={WORKER_ID}",
+         "--format", '{{.ID}} {{.Label "bots.run_id"}}'],
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+    ).stdout.decode()
+    for line in out.splitlines():
+        container_id, _, run_id = line.partition(" ")
+        log.warning(f"Removing orphaned container {container_id} of run {run_id}")
+        subprocess.call(["docker", "rm", "-f", container_id], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        if run_id:
+            _release_admission(run_id)
+            _release_lease(run_id)
+            _update_run(run_id, status="requeued")
+
+def _report_image(image_ref: str, status: str):
+    """Record this host's readiness for an image (ready / pulling / failed)"""
+    try:
+        rds.hset(f"image_ready:{image_ref}", WORKER_HOST, json.dumps({"status": status, "ts": int(time.time())}))
+    except Exception as e:
+        log.warning(f"Failed to report image status for {image_ref}: {e}")
+
+def _image_present(image_ref: str) -> bool:
+    return subprocess.call(
+        ["docker", "image", "inspect", image_ref],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    ) == 0
+
+def _pull_image(image_ref: str, run_id: str = None) -> bool:
+    """Pull the image, giving up after IMAGE_PULL_TIMEOUT_SEC. An inline pull
+    for a run keeps renewing the run's lease and admission slot meanwhile."""
+    _report_image(image_ref, "pulling")
+    deadline = time.monotonic() + IMAGE_PULL_TIMEOUT_SEC
+    with tempfile.TemporaryFile() as out:
+        proc = subprocess.Popen(["docker", "pull", image_ref], stdout=out, stderr=subprocess.STDOUT)
+        while True:
+            try:
+                proc.wait(timeout=min(LEASE_RENEW_SEC, max(deadline - time.monotonic(), 0)))
+                break
+            except subprocess.TimeoutExpired:
+                if time.monotonic() >= deadline:
+                    proc.kill()
+                    proc.wait()
+                    break
+                if run_id:
+                    _renew_lease(run_id)
+        out.seek(0)
+        output = out.read()[-500:].decode("utf-8", "replace")
+    if proc.returncode != 0:
+        log.error(f"Pull of {image_ref} failed (exit {proc.returncode}): {output}")
+        _report_image(image_ref, "failed")
+        return False
+    _report_image(image_ref, "ready")
+    return True
+
+def _ensure_image(image_ref: str, run_id: str) -> bool:
+    if _image_present(image_ref):
+        _report_image(image_ref, "ready")
+        return True
+    log.warning(f"Image {image_ref} was not pre-pulled on {WORKER_HOST}, pulling inline")
+    return _pull_image(image_ref, run_id)
+
+def _update_run(run_id: str, **fields):
+    """Best-effort update of the run's row in Postgres"""
+    if not fields:
+        return
+    assignments = ", ".join(f"{name} = %({name})s" for name in fields)
+    try:
+        with psycopg.connect(DATABASE_URL, connect_timeout=5) as conn:
+            conn.execute(f"UPDATE runs SET {assignments} WHERE id = %(run_id)s", {**fields, "run_id": run_id})
+    except Exception as e:
+        log.warning(f"Failed to update run {run_id}: {e}")
+
+def _record_event(run_id: str, level: str, code: str, message: str, data: dict = None):
+    """Best-effort insert of a run event (shown in the run's event log)"""
+    try:
+        with psycopg.connect(DATABASE_URL, connect_timeout=5) as conn:
+            conn.execute(
+                "INSERT INTO run_events (id, run_id, level, code, message, data_json) "
+                "VALUES (%s, %s, %s, %s, %s, %s)",
+                (str(uuid.uuid4()), run_id, level, code, message, json.dumps(data) if data else None),
+            )
+    except Exception as e:
+        log.warning(f"Failed to record event for run {run_id}: {e}")
+
+def _acquire_lease(run_id: str) -> bool:
+    return bool(rds.set(f"run:lease:{run_id}", f"{WORKER_HOST}:{os.getpid()}", nx=True, ex=LEASE_TTL_SEC))
+
+def _renew_lease(run_id: str):
+    try:
+        rds.expire(f"run:lease:{run_id}", LEASE_TTL_SEC)
+        rds.zadd(BUSY_KEY, {run_id: time.time() + LEASE_TTL_SEC}, xx=True)
+        admission.renew(run_id)
+    except Exception as e:
+        log.warning(f"Failed to renew lease for run {run_id}: {e}")
+
+def _release_lease(run_id: str):
+    try:
+        rds.delete(f"run:lease:{run_id}")
+    except Exception as e:
+        log.warning(f"Failed to release lease for run {run_id}: {e}")
+
+def _release_admission(run_id: str):
+    try:
+        rds.zrem(BUSY_KEY, run_id)
+        admission.release(run_id)
+    except Exception as e:
+        log.warning(f"Failed to release admission for run {run_id}: {e}")
+
+def _cancel_requested(run_id: str) -> bool:
+    try:
+        return bool(rds.exists(f"run:cancel:{run_id}"))
+    except Exception:
+        return False
+
+def _container_name(run_id: str) -> str:
+    return f"run-{run_id}"
+
+class DockerRun:
+    """Popen wrapper exposing the same handle as native_runner.NativeRun"""
+
+    def __init__(self, cmd, run_id: str):
+        self.run_id = run_id
+        self.proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        self.stdout = self.proc.stdout
+
+    def poll(self):
+        return self.proc.poll()
+
+    def wait(self):
+        return self.proc.wait()
+
+    def stop(self, grace: int):
+        """docker stop sends SIGTERM, then SIGKILL after the grace period.
+        Runs in the background so the lease keeps being renewed meanwhile."""
+        subprocess.Popen(
+            ["docker", "stop", "-t", str(grace), _container_name(self.run_id)],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+
+    def kill(self):
+        """Kill a container that outlived its stop, then the docker run
+        client if it is still attached (e.g. the daemon lost the container)"""
+        try:
+            subprocess.call(
+                ["docker", "kill", _container_name(self.run_id)],
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=STOP_CALL_TIMEOUT_SEC,
+            )
+            self.proc.wait(timeout=STOP_CALL_TIMEOUT_SEC)
+        except subprocess.TimeoutExpired:
+            log.warning(f"docker run client of run {self.run_id} still attached after kill, killing it")
+            self.proc.kill()
+
+    def rss(self) -> int:
+        return container_rss_bytes(_container_name(self.run_id))
+
+def _supervise(proc, run_id: str, image_ref: str, max_run_seconds: int):
+    """Wait for the container while renewing the lease, sampling memory and
+    enforcing cancellation and the run deadline.
+    Returns (stop reason or None, peak RSS in bytes)."""
+    deadline = time.monotonic() + max_run_seconds
+    next_renew = time.monotonic() + LEASE_RENEW_SEC
+    next_sample = time.monotonic() + RSS_SAMPLE_SEC
+    stop_reason = None
+    next_stop = None
+    peak_rss = 0
+    while proc.poll() is None:
+        now = time.monotonic()
+        if now >= next_renew:
+            _renew_lease(run_id)
+            next_renew = now + LEASE_RENEW_SEC
+        if now >= next_sample:
+            rss = proc.rss()
+            if rss > peak_rss:
+                peak_rss = rss
+                try:
+                    admission.update_usage(run_id, image_ref, rss)
+                except Exception as e:
+                    log.warning(f"Failed to update memory usage for run {run_id}: {e}")
+            next_sample = time.monotonic() + RSS_SAMPLE_SEC
+        if stop_reason is not None and now >= next_stop:
+            # The stop didn't take; kill the run, again each time this passes
+            log.warning(f"Run {run_id} still running after stop, killing it")
+            proc.kill()
+            next_stop = time.monotonic() + STOP_CALL_TIMEOUT_SEC
+        if stop_reason is None:
+            if _cancel_requested(run_id):
+                stop_reason = "cancelled"
+            elif now >= deadline:
+                stop_reason = "timed_out"
+            elif _drain_expired():
+                stop_reason = "drained"
+            if stop_reason:
+                log.warning(f"Stopping run {run_id}: {stop_reason}")
+                proc.stop(STOP_GRACE_SEC)
+                next_stop = time.monotonic() + STOP_GRACE_SEC + STOP_CALL_TIMEOUT_SEC
+        time.sleep(1)
+
+    return stop_reason, peak_rss
 
 def upload_artifacts_to_minio(artifacts_dir: Path, run_id: str):
     """Upload artifacts to MinIO"""
@@ -56,28 +360,180 @@ def upload_artifacts_to_minio(artifacts_dir: Path, run_id: str):
         log.error(f"Unexpected error uploading artifacts: {e}")
         return None
 
-@app.task(name="tasks.run_bot", bind=True, max_retries=0)
-def run_bot(self, image_ref: str, run_id: str, config: dict):
+def _prepull(image_ref: str):
+    # Every worker container on a host gets the broadcast; one of them pulls
+    lock = f"image:pull:{WORKER_HOST}:{image_ref}"
+    try:
+        if not rds.set(lock, WORKER_ID, nx=True, ex=IMAGE_PULL_TIMEOUT_SEC):
+            log.info(f"Image {image_ref} is being pre-pulled by another worker on {WORKER_HOST}")
+            return
+    except Exception as e:
+        log.warning(f"Failed to take the pull lock for {image_ref}: {e}")
+        return
+    try:
+        if _image_present(image_ref):
+            log.info(f"Image {image_ref} already present")
+            _report_image(image_ref, "ready")
+            return
+        log.info(f"Pre-pulling {image_ref}")
+        if _pull_image(image_ref):
+            log.info(f"Pre-pulled {image_ref}")
+    finally:
+        try:
+            rds.delete(lock)
+        except Exception as e:
+            log.warning(f"Failed to release the pull lock for {image_ref}: {e}")
+
+@app.task(name="tasks.prepull_image", ignore_result=True)
+def prepull_image(image_ref: str):
+    """Broadcast to every worker when a BotVersion is published. The pull
+    runs in the background so it doesn't hold one of the pool's run slots."""
+    threading.Thread(target=_prepull, args=(image_ref,), name=f"prepull-{image_ref}", daemon=True).start()
+
+def _result(run_id: str, status: str, exit_code: int = None) -> dict:
+    """Compact task result; everything else about the run is in Postgres"""
+    return {"run_id": run_id, "status": status, "exit_code": exit_code}
+
+def _requeue(task, countdown: int, **kwargs):
+    """Send the run back to its shared queue (not this host's twin queue)"""
+    queue = (task.request.delivery_info or {}).get("routing_key") or None
+    if queue:
+        queue = queue.split("@", 1)[0]
+    return task.retry(countdown=countdown, queue=queue, **kwargs)
+
+# Retries are unbounded so admission deferrals don't use up the crash retry
+# budget; crash retries are counted explicitly through `attempt`.
+@app.task(name="tasks.run_bot", bind=True, max_retries=None, acks_late=True, reject_on_worker_lost=True)
+def run_bot(self, image_ref: str, run_id: str, config: dict, max_run_seconds: int = None, attempt: int = 0,
+            runner: str = "docker", entrypoint: str = None, deadline: float = None,
+            max_retries: int = None):
+    if max_retries is None:
+        max_retries = RUN_MAX_RETRIES
+    if rds.exists(f"run:done:{run_id}"):
+        log.warning(f"Run {run_id} already finished, dropping duplicate delivery")
+        return _result(run_id, "duplicate")
+    # Scheduled runs that waited in the queue past their window are dropped
+    # rather than started late; retries and requeues don't carry a deadline
+    if deadline and time.time() > deadline:
+        log.warning(f"Run {run_id} missed its start deadline, expiring it")
+        _update_run(run_id, status="expired", finished_at=datetime.now(timezone.utc), error_code="deadline_passed")
+        rds.set(f"run:done:{run_id}", "expired", ex=RUN_DONE_TTL_SEC)
+        return _result(run_id, "expired")
+    if not _acquire_lease(run_id):
+        # Alive elsewhere; check again once that lease could have lapsed
+        log.warning(f"Run {run_id} is leased by another worker, deferring duplicate delivery")
+        raise _requeue(self, LEASE_TTL_SEC)
+    admitted, reason = admission.admit(run_id, image_ref)
+    if not admitted:
+        _release_lease(run_id)
+        log.info(f"Run {run_id} not admitted on {WORKER_HOST} ({reason}), requeueing")
+        raise _requeue(self, ADMISSION_RETRY_SEC)
+    try:
+        rds.zadd(BUSY_KEY, {run_id: time.time() + LEASE_TTL_SEC})
+        result = _run_bot(image_ref, run_id, config, max_run_seconds or DEFAULT_MAX_RUN_SEC, attempt,
+                          runner, entrypoint)
+    finally:
+        _release_admission(run_id)
+        _release_lease(run_id)
+
+    if result["status"] == "drained":
+        log.warning(f"Run {run_id} interrupted by worker shutdown, requeueing to resume from checkpoint")
+        _update_run(run_id, status="requeued", finished_at=None)
+        raise _requeue(self, 0, kwargs={
+            "max_run_seconds": max_run_seconds, "attempt": attempt, "runner": runner, "entrypoint": entrypoint,
+            "max_retries": max_retries,
+        })
+    if result["status"] == "failed" and attempt < max_retries:
+        log.warning(f"Run {run_id} failed (attempt {attempt + 1}), retrying from checkpoint")
+        _update_run(run_id, status="retrying", finished_at=None)
+        raise self.retry(
+            kwargs={
+                "max_run_seconds": max_run_seconds, "attempt": attempt + 1,
+                "runner": runner, "entrypoint": entrypoint, "max_retries": max_retries,
+            },
+            countdown=RUN_RETRY_DELAY_SEC,
+        )
+    rds.set(f"run:done:{run_id}", result["status"], ex=RUN_DONE_TTL_SEC)
+    return result
+
+def _run_bot(image_ref: str, run_id: str, config: dict, max_run_seconds: int, attempt: int,
+             runner: str, entrypoint: str):
+    if _cancel_requested(run_id):
+        log.info(f"Run {run_id} was cancelled before it started")
+        _update_run(run_id, status="cancelled", finished_at=datetime.now(timezone.utc))
+        return _result(run_id, "cancelled")
+
     artifacts_dir = Path(f"/tmp/artifacts-{run_id}")
     artifacts_dir.mkdir(parents=True, exist_ok=True)
+    checkpoint_url = f"{API_BASE_URL}/v1/runs/{run_id}/checkpoint"
 
     with tempfile.TemporaryDirectory() as tmpd:
         cfg_path = Path(tmpd) / "config.json"
         cfg_path.write_text(json.dumps(config, indent=2))
-        cmd = [
-            "docker","run","--rm",
-            "-e","RUN_ID="+run_id,
-            "-e","ARTIFACTS_DIR=/artifacts",
-            "-e","CONFIG_PATH=/config/config.json",
-            "-v",f"{cfg_path}:/config/config.json:ro",
-            "-v",f"{artifacts_dir}:/artifacts",
-            image_ref,
-        ]
-        log.info("Running: " + " ".join(cmd))
-        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
-        _stream_lines(proc)
+        if runner == "native":
+            # Same RUN_ID/CONFIG_PATH/ARTIFACTS_DIR contract, without docker
+            log.info(f"Running natively: {entrypoint}")
+            try:
+                proc = native_pool.start(entrypoint, {
+                    "RUN_ID": run_id,
+                    "ARTIFACTS_DIR": str(artifacts_dir),
+                    "CONFIG_PATH": str(cfg_path),
+                    "CHECKPOINT_URL": checkpoint_url,
+                    "RUN_ATTEMPT": str(attempt),
+                })
+            except (FileNotFoundError, TypeError, ImportError) as e:
+                log.error(f"Cannot start native run {run_id}: {e}")
+                shutil.rmtree(artifacts_dir, ignore_errors=True)
+                _update_run(run_id, status="failed", finished_at=datetime.now(timezone.utc),
+                            error_code="native_preload_failed" if isinstance(e, ImportError)
+                            else "entrypoint_missing")
+                return _result(run_id, "failed")
+        else:
+            if not _ensure_image(image_ref, run_id):
+                shutil.rmtree(artifacts_dir, ignore_errors=True)
+                _update_run(run_id, status="failed", finished_at=datetime.now(timezone.utc),
+                            error_code="image_unavailable")
+                return _result(run_id, "failed")
+            cmd = [
+                # The image was pulled above within IMAGE_PULL_TIMEOUT_SEC;
+                # never let docker run pull it again without that bound
+                "docker","run","--rm","--pull","never",
+                "--name",_container_name(run_id),
+                "--label",f"bots.run_id={run_id}",
+                "--label",f"bots.worker_id={WORKER_ID}",
+                "-e","RUN_ID="+run_id,
+                "-e","ARTIFACTS_DIR=/artifacts",
+                "-e","CONFIG_PATH=/config/config.json",
+                "-e",f"CHECKPOINT_URL={checkpoint_url}",
+                "-e",f"RUN_ATTEMPT={attempt}",
+                "-v",f"{cfg_path}:/config/config.json:ro",
+                "-v",f"{artifacts_dir}:/artifacts",
+            ]
+            if RUN_NETWORK:
+                cmd += ["--network", RUN_NETWORK]
+            cmd.append(image_ref)
+            log.info("Running: " + " ".join(cmd))
+            proc = DockerRun(cmd, run_id)
+        pump = OutputPump(proc.stdout, log, name=f"stdout-{run_id}")
+        pump.start()
+        _update_run(run_id, status="running", started_at=datetime.now(timezone.utc), worker_host=WORKER_HOST)
+        stop_reason, peak_rss = _supervise(proc, run_id, image_ref, max_run_seconds)
         code = proc.wait()
-        log.info(f"Exit code: {code}")
+        pump.join(timeout=5)
+        log.info(f"Exit code: {code}, peak RSS: {peak_rss // (1024 * 1024)} MB")
+        if peak_rss:
+            try:
+                admission.record_peak(image_ref, peak_rss)
+            except Exception as e:
+                log.warning(f"Failed to record peak RSS for {image_ref}: {e}")
+        status = stop_reason or ("succeeded" if code == 0 else "failed")
+        if status != "succeeded":
+            _record_event(run_id, "error", status, f"Run {status} with exit code {code}", {
+                "output_tail": pump.tail_text(),
+                "lines": pump.lines,
+                "dropped_log_lines": pump.dropped,
+                "truncated_lines": pump.truncated,
+            })
         
         # Upload artifacts to MinIO
         artifacts_url = upload_artifacts_to_minio(artifacts_dir, run_id)
@@ -88,4 +544,12 @@ def run_bot(self, image_ref: str, run_id: str, config: dict):
         
         # Clean up local artifacts
         shutil.rmtree(artifacts_dir, ignore_errors=True)
-        return {"run_id": run_id, "exit_code": code, "artifacts_url": artifacts_url}
+        _update_run(
+            run_id,
+            status=status,
+            finished_at=datetime.now(timezone.utc),
+            exit_code=code,
+            error_code=stop_reason,
+            artifacts_url=artifacts_url,
+        )
+        return _result(run_id, status, code)